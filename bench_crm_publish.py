@@ -0,0 +1,136 @@
+"""
+CRM 发布流程基准测试 - 在本地桩 CRM 上重复执行完整的登录/发布流程，统计各阶段 p50/p95 耗时
+
+用法:
+    python bench_crm_publish.py -n 20 --backend http
+    python bench_crm_publish.py -n 3 --backend playwright --json bench_crm.json
+"""
+import argparse
+import contextlib
+import io
+import json
+import math
+import sys
+import time
+from typing import Dict, List
+
+from stub_crm_server import StubCRMServer
+
+BRIEF = (
+    "*上午时间安排与工作内容\n"
+    "1. 优化证书关联关系的逻辑代码\n"
+    "2. 修复登录模块的会话过期问题\n"
+    "\n"
+    "*下午时间安排与工作内容\n"
+    "1. 完成变更管理优化方案的讨论和联调测试\n"
+    "\n"
+    "*今日计划的学习内容与进度\n"
+    "学习Spring Boot配置管理相关技术，已完成基础概念学习\n"
+)
+
+PHASES = ('login', 'publish', 'close', 'total')
+
+
+def percentile(values: List[float], pct: float) -> float:
+    """最近秩法计算百分位数"""
+    if not values:
+        return 0.0
+    ordered = sorted(values)
+    rank = max(1, math.ceil(pct / 100.0 * len(ordered)))
+    return ordered[min(rank, len(ordered)) - 1]
+
+
+def _create_service(backend: str, server: StubCRMServer):
+    if backend == 'http':
+        from service.crm_http_service import CRMHttpService
+        return CRMHttpService(server.url, server.username, server.password)
+    from service.crm_service import CRMService
+    return CRMService(server.url, server.username, server.password, headless=True)
+
+
+def run_once(backend: str, server: StubCRMServer, verbose: bool = False) -> Dict[str, float]:
+    """执行一次完整发布流程，返回各阶段耗时（秒）"""
+    timings = {}
+    ok = False
+    output = contextlib.nullcontext() if verbose else contextlib.redirect_stdout(io.StringIO())
+    with output:
+        started = time.perf_counter()
+        crm_service = _create_service(backend, server)
+        try:
+            t0 = time.perf_counter()
+            logged_in = crm_service.login()
+            timings['login'] = time.perf_counter() - t0
+            if logged_in:
+                t0 = time.perf_counter()
+                ok = crm_service.publish_report(BRIEF)
+                timings['publish'] = time.perf_counter() - t0
+        finally:
+            t0 = time.perf_counter()
+            crm_service.close()
+            timings['close'] = time.perf_counter() - t0
+        timings['total'] = time.perf_counter() - started
+    timings['ok'] = ok
+    return timings
+
+
+def run_benchmark(backend: str, iterations: int, verbose: bool = False) -> Dict:
+    """在本地桩 CRM 上运行 N 次发布流程并汇总"""
+    server = StubCRMServer().start()
+    runs = []
+    try:
+        for _ in range(iterations):
+            runs.append(run_once(backend, server, verbose))
+    finally:
+        server.stop()
+
+    summary = {}
+    for phase in PHASES:
+        values = [r[phase] for r in runs if phase in r]
+        summary[phase] = {
+            'count': len(values),
+            'p50': percentile(values, 50),
+            'p95': percentile(values, 95),
+            'max': max(values) if values else 0.0,
+        }
+    return {
+        'backend': backend,
+        'iterations': iterations,
+        'succeeded': sum(1 for r in runs if r['ok']),
+        'published': len(server.published),
+        'phases': summary,
+        'runs': runs,
+    }
+
+
+def print_summary(result: Dict):
+    print("=" * 60)
+    print(f"CRM 发布基准测试 - backend={result['backend']}, "
+          f"成功 {result['succeeded']}/{result['iterations']}")
+    print("=" * 60)
+    print(f"  {'阶段':<10}{'p50(ms)':>12}{'p95(ms)':>12}{'max(ms)':>12}")
+    for phase, stats in result['phases'].items():
+        if not stats['count']:
+            continue
+        print(f"  {phase:<10}{stats['p50'] * 1000:>12.1f}{stats['p95'] * 1000:>12.1f}{stats['max'] * 1000:>12.1f}")
+    print("=" * 60)
+
+
+def main(argv: List[str] = None) -> int:
+    parser = argparse.ArgumentParser(description="CRM 发布流程基准测试（本地桩 CRM）")
+    parser.add_argument('-n', '--iterations', type=int, default=10, help="重复次数")
+    parser.add_argument('--backend', choices=('http', 'playwright'), default='http', help="发布方式")
+    parser.add_argument('--json', dest='json_path', help="将结果写入 JSON 文件")
+    parser.add_argument('-v', '--verbose', action='store_true', help="显示发布流程输出")
+    args = parser.parse_args(argv)
+
+    result = run_benchmark(args.backend, args.iterations, args.verbose)
+    print_summary(result)
+    if args.json_path:
+        with open(args.json_path, 'w', encoding='utf-8') as f:
+            json.dump(result, f, ensure_ascii=False, indent=2)
+        print(f"结果已保存到: {args.json_path}")
+    return 0 if result['succeeded'] == args.iterations else 1
+
+
+if __name__ == '__main__':
+    sys.exit(main())
@@ -0,0 +1,257 @@
+"""
+Git 收集与日报渲染基准测试 - 生成合成的仓库森林（N 个仓库、每天 M 条提交、深层非仓库目录、
+大体积 node_modules、长提交体），在多个规模下测量热点路径耗时，结果输出为 JSON，并支持对比两次结果
+
+用法:
+    python bench_git.py --scales small,medium --json bench_git.json
+    python bench_git.py --compare base.json bench_git.json --threshold 0.2
+"""
+import argparse
+import contextlib
+import io
+import json
+import os
+import platform
+import shutil
+import statistics
+import subprocess
+import sys
+import tempfile
+import time
+from datetime import datetime
+from typing import Callable, Dict, List
+
+from service.git_service import GitService
+from service.report_service import ReportService
+from service.telemetry_service import telemetry
+
+# 规模预设：repos 仓库数，commits 每个仓库当天提交数，depth/fanout 非仓库目录树深度与分叉，
+# node_modules 每个仓库 node_modules 下的包目录数，body_lines 提交体行数
+SCALES = {
+    'small': {'repos': 10, 'commits': 5, 'depth': 3, 'fanout': 3, 'node_modules': 50, 'body_lines': 3},
+    'medium': {'repos': 50, 'commits': 20, 'depth': 4, 'fanout': 4, 'node_modules': 200, 'body_lines': 10},
+    'large': {'repos': 200, 'commits': 20, 'depth': 5, 'fanout': 4, 'node_modules': 500, 'body_lines': 30},
+}
+
+AUTHORS = ['张三', '李四', '王五', 'eddy.yang']
+
+
+def _fast_import_stream(repo_index: int, commits: int, body_lines: int, day_start: int, tz: str) -> bytes:
+    """生成 git fast-import 输入：当天 09:00 起每 7 分钟一条提交；提交说明和内容带仓库序号，各仓库提交 hash 互不相同"""
+    chunks = []
+    for i in range(1, commits + 1):
+        author = AUTHORS[i % len(AUTHORS)]
+        ts = day_start + 9 * 3600 + i * 420
+        body = '\n'.join(f"- 变更细节 {i}.{j}: 调整模块参数并补充单元测试说明" for j in range(body_lines))
+        message = f"feat: 仓库 {repo_index} 合成提交 {i}\n\n{body}\n".encode('utf-8')
+        content = f"repo {repo_index} revision {i}\n".encode('utf-8')
+        chunks.append(b'commit refs/heads/main\n')
+        chunks.append(f'mark :{i}\n'.encode())
+        chunks.append(f'author {author} <{i % len(AUTHORS)}@example.com> {ts} {tz}\n'.encode('utf-8'))
+        chunks.append(f'committer {author} <{i % len(AUTHORS)}@example.com> {ts} {tz}\n'.encode('utf-8'))
+        chunks.append(f'data {len(message)}\n'.encode() + message)
+        if i > 1:
+            chunks.append(f'from :{i - 1}\n'.encode())
+        chunks.append(f'M 644 inline file.txt\ndata {len(content)}\n'.encode() + content + b'\n')
+    return b''.join(chunks)
+
+
+def _make_dir_tree(root: str, depth: int, fanout: int):
+    """生成不含仓库的目录树"""
+    if depth <= 0:
+        return
+    for i in range(fanout):
+        child = os.path.join(root, f"dir{i}")
+        os.makedirs(child, exist_ok=True)
+        with open(os.path.join(child, 'README.txt'), 'w') as f:
+            f.write('placeholder\n')
+        _make_dir_tree(child, depth - 1, fanout)
+
+
+def build_forest(root: str, scale: Dict, duplicate_ratio: float = 0.0) -> str:
+    """
+    在 root 下生成合成仓库森林
+
+    Args:
+        duplicate_ratio: 与第 0 个仓库历史完全相同的仓库比例（模拟同一项目的多个克隆，收集时按 hash 去重）
+
+    Returns:
+        搜索根目录
+    """
+    git_cmd = shutil.which('git') or 'git'
+    day_start = int(time.mktime(datetime.now().replace(hour=0, minute=0, second=0, microsecond=0).timetuple()))
+    tz = time.strftime('%z') or '+0000'
+    env = dict(os.environ, GIT_CONFIG_NOSYSTEM='1')
+    duplicates = duplicate_repos(scale, duplicate_ratio)
+
+    for r in range(scale['repos']):
+        # 第 1..duplicates 个仓库复用第 0 个仓库的历史
+        stream = _fast_import_stream(0 if r <= duplicates else r, scale['commits'], scale['body_lines'], day_start, tz)
+        # 仓库分布在不同深度的分组目录下
+        repo = os.path.join(root, f"group{r % 5}", f"team{r % 3}", f"repo{r:04d}")
+        os.makedirs(repo, exist_ok=True)
+        subprocess.run([git_cmd, 'init', '-q', '-b', 'main', repo], check=True, env=env)
+        subprocess.run([git_cmd, 'fast-import', '--quiet'], input=stream, cwd=repo, check=True, env=env)
+        subprocess.run([git_cmd, 'checkout', '-q', 'main'], cwd=repo, check=True, env=env)
+        node_modules = os.path.join(repo, 'node_modules')
+        for p in range(scale['node_modules']):
+            pkg = os.path.join(node_modules, f"pkg{p}", 'lib')
+            os.makedirs(pkg, exist_ok=True)
+            with open(os.path.join(pkg, 'index.js'), 'w') as f:
+                f.write('module.exports = {};\n')
+    _make_dir_tree(os.path.join(root, 'docs'), scale['depth'], scale['fanout'])
+    return root
+
+
+def duplicate_repos(scale: Dict, duplicate_ratio: float) -> int:
+    """与第 0 个仓库历史相同的仓库数"""
+    return min(round(scale['repos'] * duplicate_ratio), scale['repos'] - 1)
+
+
+def measure(func: Callable, repeat: int) -> Dict:
+    """重复执行并统计耗时（秒）"""
+    runs = []
+    result = None
+    for _ in range(repeat):
+        telemetry.reset()
+        with contextlib.redirect_stdout(io.StringIO()):
+            t0 = time.perf_counter()
+            result = func()
+            runs.append(time.perf_counter() - t0)
+    return {
+        'median': statistics.median(runs),
+        'min': min(runs),
+        'max': max(runs),
+        'runs': runs,
+        'size': len(result) if hasattr(result, '__len__') else None,
+    }
+
+
+def run_scale(name: str, repeat: int, keep_dir: str = None, duplicate_ratio: float = 0.0) -> Dict:
+    """在指定规模下运行全部基准"""
+    scale = SCALES[name]
+    tmp = keep_dir or tempfile.mkdtemp(prefix=f'bench_git_{name}_')
+    try:
+        t0 = time.perf_counter()
+        root = build_forest(os.path.join(tmp, name), scale, duplicate_ratio)
+        build_time = time.perf_counter() - t0
+
+        git_service = GitService()
+        # pygit2 未安装时回退到 subprocess，两项结果相近
+        pygit2_service = GitService(backend='pygit2')
+        report_service = ReportService()
+        repos = git_service.discover_git_repos(root)
+        commits = git_service.get_all_commits_by_date(repos, datetime.now())
+        benches = {
+            'discover_git_repos': measure(lambda: git_service.discover_git_repos(root), repeat),
+            'discover_git_repos_multi': measure(lambda: git_service.discover_git_repos_multi([root]), repeat),
+            'get_all_commits_by_date': measure(
+                lambda: git_service.get_all_commits_by_date(repos, datetime.now()), repeat),
+            'get_all_commits_by_date[pygit2]': measure(
+                lambda: pygit2_service.get_all_commits_by_date(repos, datetime.now()), repeat),
+            'generate_commit_list': measure(lambda: report_service.generate_commit_list(commits), repeat),
+            '_format_commits_for_prompt': measure(
+                lambda: report_service._format_commits_for_prompt(commits), repeat),
+        }
+        return {
+            'scale': scale,
+            'build_time': build_time,
+            'repos': len(repos),
+            'duplicate_repos': duplicate_repos(scale, duplicate_ratio),
+            'commits': len(commits),
+            'benchmarks': benches,
+        }
+    finally:
+        if keep_dir is None:
+            shutil.rmtree(tmp, ignore_errors=True)
+
+
+def compare(base_path: str, new_path: str, threshold: float) -> int:
+    """
+    对比两次结果，新结果中位数比基准慢超过 threshold 比例时标记为回归
+
+    Returns:
+        存在回归时返回 1，否则返回 0
+    """
+    with open(base_path, 'r', encoding='utf-8') as f:
+        base = json.load(f)
+    with open(new_path, 'r', encoding='utf-8') as f:
+        new = json.load(f)
+
+    regressions = 0
+    print("=" * 78)
+    print(f"基准对比: {base_path} -> {new_path} (阈值 {threshold:.0%})")
+    print("=" * 78)
+    print(f"  {'规模/基准':<42}{'基准(ms)':>10}{'当前(ms)':>10}{'变化':>10}")
+    for scale, result in new['results'].items():
+        base_result = base['results'].get(scale)
+        if not base_result:
+            continue
+        for bench, stats in result['benchmarks'].items():
+            base_stats = base_result['benchmarks'].get(bench)
+            if not base_stats:
+                continue
+            old, cur = base_stats['median'], stats['median']
+            change = (cur - old) / old if old else 0.0
+            flag = ''
+            if change > threshold:
+                flag = '  ✗ 回归'
+                regressions += 1
+            elif change < -threshold:
+                flag = '  ✓ 提升'
+            print(f"  {scale + '/' + bench:<42}{old * 1000:>10.1f}{cur * 1000:>10.1f}{change:>+10.0%}{flag}")
+    print("=" * 78)
+    print(f"共 {regressions} 项回归" if regressions else "未发现回归")
+    return 1 if regressions else 0
+
+
+def main(argv: List[str] = None) -> int:
+    parser = argparse.ArgumentParser(description="Git 收集与日报渲染基准测试（合成仓库森林）")
+    parser.add_argument('--scales', default='small,medium', help=f"规模列表，可选 {','.join(SCALES)}")
+    parser.add_argument('--repeat', type=int, default=5, help="每项基准重复次数")
+    parser.add_argument('--json', dest='json_path', help="将结果写入 JSON 文件")
+    parser.add_argument('--duplicate-ratio', type=float, default=0.0,
+                        help="与第一个仓库历史相同的仓库比例（测量跨仓库去重），默认 0 即各仓库提交互不相同")
+    parser.add_argument('--keep', help="在指定目录生成并保留合成仓库（便于复查）")
+    parser.add_argument('--compare', nargs=2, metavar=('BASE', 'NEW'), help="对比两个结果文件")
+    parser.add_argument('--threshold', type=float, default=0.2, help="回归阈值（比例），默认 0.2")
+    args = parser.parse_args(argv)
+
+    if args.compare:
+        return compare(args.compare[0], args.compare[1], args.threshold)
+
+    git_version = subprocess.run(
+        [shutil.which('git') or 'git', '--version'], capture_output=True, text=True
+    ).stdout.strip()
+    output = {
+        'meta': {
+            'timestamp': datetime.now().isoformat(timespec='seconds'),
+            'python': platform.python_version(),
+            'platform': platform.platform(),
+            'git': git_version,
+            'repeat': args.repeat,
+            'duplicate_ratio': args.duplicate_ratio,
+        },
+        'results': {},
+    }
+    for name in [s.strip() for s in args.scales.split(',') if s.strip()]:
+        if name not in SCALES:
+            parser.error(f"未知规模: {name}")
+        print(f"正在运行规模 {name} ...")
+        keep_dir = os.path.abspath(args.keep) if args.keep else None
+        result = run_scale(name, args.repeat, keep_dir, args.duplicate_ratio)
+        output['results'][name] = result
+        print(f"  仓库 {result['repos']} 个（其中 {result['duplicate_repos']} 个与首个仓库历史相同），"
+              f"去重后提交 {result['commits']} 条（生成耗时 {result['build_time']:.1f}s）")
+        for bench, stats in result['benchmarks'].items():
+            print(f"  {bench:<34} 中位数 {stats['median'] * 1000:>9.1f} ms  最小 {stats['min'] * 1000:>9.1f} ms")
+
+    if args.json_path:
+        with open(args.json_path, 'w', encoding='utf-8') as f:
+            json.dump(output, f, ensure_ascii=False, indent=2)
+        print(f"结果已保存到: {args.json_path}")
+    return 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
@@ -0,0 +1,103 @@
+"""
+CLI 启动耗时基准测试 - 在新的 Python 进程中重复执行 import main、main.py --help 以及各子命令的 --help，
+测量启动耗时，并检查 import main 之后没有加载 openai / playwright / requests / pygit2 / pyarrow 等重量级依赖
+
+用法:
+    python bench_startup.py --repeat 10 --json bench_startup.json
+    python bench_startup.py --max-ms 300        # 超过阈值时退出码为 1，可用于 CI
+"""
+import argparse
+import json
+import os
+import platform
+import statistics
+import subprocess
+import sys
+import time
+from datetime import datetime
+from typing import Dict, List
+
+ROOT = os.path.dirname(os.path.abspath(__file__))
+
+# import main 时不应加载的模块（只在对应阶段真正执行时导入）
+HEAVY_MODULES = ['openai', 'playwright', 'requests', 'pygit2', 'pyarrow', 'watchdog']
+
+# 测量项：名称 -> python 参数
+TARGETS = {
+    'import main': ['-c', 'import main'],
+    'main.py --help': ['main.py', '--help'],
+    'collect --help': ['main.py', 'collect', '--help'],
+    'report --help': ['main.py', 'report', '--help'],
+    'brief --help': ['main.py', 'brief', '--help'],
+    'publish --help': ['main.py', 'publish', '--help'],
+}
+
+
+def measure(args: List[str], repeat: int) -> Dict:
+    """在新进程中重复执行并统计耗时（秒），包含解释器自身的启动时间"""
+    runs = []
+    for _ in range(repeat):
+        t0 = time.perf_counter()
+        subprocess.run([sys.executable, *args], cwd=ROOT, check=True,
+                       stdout=subprocess.DEVNULL, stderr=subprocess.DEVNULL)
+        runs.append(time.perf_counter() - t0)
+    return {'median': statistics.median(runs), 'min': min(runs), 'max': max(runs), 'runs': runs}
+
+
+def loaded_heavy_modules() -> List[str]:
+    """import main 之后已加载的重量级模块"""
+    code = (
+        "import json, sys, main\n"
+        f"print(json.dumps([m for m in {HEAVY_MODULES!r} if m in sys.modules]))"
+    )
+    result = subprocess.run([sys.executable, '-c', code], cwd=ROOT, check=True, capture_output=True, text=True)
+    return json.loads(result.stdout.strip().splitlines()[-1])
+
+
+def main(argv: List[str] = None) -> int:
+    parser = argparse.ArgumentParser(description="CLI 启动耗时基准测试")
+    parser.add_argument('--repeat', type=int, default=10, help="每项重复次数")
+    parser.add_argument('--json', dest='json_path', help="将结果写入 JSON 文件")
+    parser.add_argument('--max-ms', type=float, help="任一项中位数超过该毫秒数时退出码为 1")
+    args = parser.parse_args(argv)
+
+    baseline = measure(['-c', 'pass'], args.repeat)
+    print(f"{'python -c pass（解释器基线）':<30} 中位数 {baseline['median'] * 1000:>7.1f} ms")
+    output = {
+        'meta': {
+            'timestamp': datetime.now().isoformat(timespec='seconds'),
+            'python': platform.python_version(),
+            'platform': platform.platform(),
+            'repeat': args.repeat,
+        },
+        'baseline': baseline,
+        'results': {},
+    }
+    for name, target_args in TARGETS.items():
+        stats = measure(target_args, args.repeat)
+        output['results'][name] = stats
+        print(f"{name:<30} 中位数 {stats['median'] * 1000:>7.1f} ms  最小 {stats['min'] * 1000:>7.1f} ms")
+
+    heavy = loaded_heavy_modules()
+    output['heavy_modules'] = heavy
+    exit_code = 0
+    if heavy:
+        print(f"✗ import main 加载了重量级依赖: {', '.join(heavy)}")
+        exit_code = 1
+    else:
+        print("✓ import main 未加载重量级依赖")
+    if args.max_ms is not None:
+        slow = [name for name, stats in output['results'].items() if stats['median'] * 1000 > args.max_ms]
+        if slow:
+            print(f"✗ 启动耗时超过 {args.max_ms:.0f} ms: {', '.join(slow)}")
+            exit_code = 1
+
+    if args.json_path:
+        with open(args.json_path, 'w', encoding='utf-8') as f:
+            json.dump(output, f, ensure_ascii=False, indent=2)
+        print(f"结果已保存到: {args.json_path}")
+    return exit_code
+
+
+if __name__ == '__main__':
+    sys.exit(main())
@@ -16,12 +16,102 @@ GIT_SEARCH_PATHS = [
 # 日报保存路径（项目根目录下的 reports）
 REPORT_SAVE_DIR = os.path.join(os.path.dirname(__file__), 'reports')
 
-# Git 搜索时需排除的目录（提高效率，git_service 使用）
+# Git 搜索时需排除的目录（提高效率，git_service 使用；支持 glob 通配符，如 'build*'、'*.egg-info'）
 EXCLUDE_DIRS = ['.git', 'node_modules', '.venv', 'venv', '__pycache__', '.idea', '.vscode', '.cursor']
 
+# Git 搜索最大深度（搜索根目录为 0，None 表示不限制）
+GIT_SEARCH_MAX_DEPTH = None
+# 找到仓库后是否继续在其工作区内搜索嵌套仓库（子模块、vendored 仓库）；默认在仓库根目录停止深入
+GIT_SEARCH_INCLUDE_SUBMODULES = False
+# 是否跟随目录符号链接（按 设备号+inode 防止循环）
+GIT_SEARCH_FOLLOW_SYMLINKS = False
+# 多个搜索路径并行发现仓库时的线程数
+GIT_DISCOVER_WORKERS = 8
+# 收集提交前的活跃度预筛选：仓库 refs/packed-refs/logs 的修改时间均早于目标日期时跳过 git log
+# （可用命令行参数 --no-prefilter 临时关闭，用于核对结果）
+GIT_ACTIVITY_PREFILTER = True
+# 提交读取后端：'subprocess' 每个仓库启动一个 git log 子进程；'pygit2' 进程内读取（需 pip install pygit2，
+# 未安装或仓库格式不受支持时自动回退到 subprocess）
+GIT_BACKEND = 'subprocess'
+# 是否读取提交 spool（python main.py hooks install 为仓库安装 post-commit 钩子后，本地提交会追加到 spool，
+# 收集时只读取 spool，仅对未安装钩子或引用有其他变动的仓库执行 git log；依赖活跃度预筛选，关闭预筛选时不使用）
+GIT_COMMIT_SPOOL = True
+# 跨仓库去重：同一提交出现在多个克隆/fork 中时按完整 hash 只保留一条；开启后作者和标题相同但 hash 不同的提交
+# 再按 git patch-id 比较，改动相同的 cherry-pick 也只保留一条（只对候选提交执行 git show | git patch-id）
+GIT_DEDUPE_PATCH_ID = True
+# git log 遍历的引用范围（引用上千的仓库仅枚举引用就要数秒，缩小范围可明显加快收集）：
+#   'all'      所有引用（git log --all，默认）
+#   'local'    只遍历本地分支和 HEAD
+#   'remotes'  本地分支、HEAD 和 GIT_REF_REMOTES 中远程的远程分支（列表为空时为全部远程）
+GIT_REF_SCOPE = 'all'
+GIT_REF_REMOTES = []
+# 排除的引用（以 refs/ 开头的 glob，* 可匹配多级），如 ['refs/tags/*', 'refs/pull/*']
+GIT_REF_EXCLUDE = []
+# 按仓库覆盖引用范围：键为仓库路径或目录名，值为范围名或 {'scope': ..., 'remotes': [...], 'exclude': [...]}
+# 例如 {'monorepo': {'scope': 'remotes', 'remotes': ['origin']}, '~/code/legacy': 'local'}
+GIT_REF_SCOPE_OVERRIDES = {}
+# 并行收集提交（每个对象库一次 git log）的线程数
+GIT_COLLECT_WORKERS = 4
+# 没有耗时历史时 git log 的超时秒数
+GIT_LOG_TIMEOUT = 30
+# 按仓库耗时历史（reports/cache/repo_history.json）调度收集：最慢的仓库最先开始；
+# 超时设为最近最大耗时的 GIT_LOG_TIMEOUT_FACTOR 倍（上次超时则加倍），并限制在 [MIN, MAX] 秒内
+GIT_REPO_HISTORY = True
+GIT_LOG_TIMEOUT_FACTOR = 4
+GIT_LOG_TIMEOUT_MIN = 10
+GIT_LOG_TIMEOUT_MAX = 300
+# 熔断：连续超时 GIT_BREAKER_THRESHOLD 次的仓库在 GIT_BREAKER_COOLDOWN_HOURS 小时内跳过并提示，冷却后重试一次
+GIT_BREAKER_THRESHOLD = 3
+GIT_BREAKER_COOLDOWN_HOURS = 24
+# commit-graph 维护（python main.py maintenance）：同时写入 commit-graph 的仓库数、单个仓库写入的超时秒数
+COMMIT_GRAPH_WORKERS = 2
+COMMIT_GRAPH_TIMEOUT = 600
+# 常驻监听（python main.py watch）：'auto' 安装了 watchdog 时使用文件系统事件，否则轮询；也可指定 'watchdog' 或 'poll'
+WATCH_BACKEND = 'auto'
+# 轮询引用修改时间的间隔（秒）；使用文件系统事件时为最长等待时间
+WATCH_POLL_INTERVAL = 5
+# 收到引用变动事件后等待的秒数（合并一次操作连续改写的多个文件）
+WATCH_DEBOUNCE = 1.0
+
+# 运行锁：同一时刻只允许一个日报流程（默认流程及 collect/report/brief/publish/publish-pending/push）运行。
+# 已有流程在运行时：RUN_LOCK_WAIT = True（或命令行 --wait）等待其结束后继续，未变化的阶段直接复用其缓存结果；
+# 否则立即退出，退出码为 RUN_LOCK_BUSY_EXIT（75，EX_TEMPFAIL，便于 cron 脚本区分）
+RUN_LOCK_DIR_NAME = 'locks'
+RUN_LOCK_WAIT = False
+# 等待运行锁的最长秒数
+RUN_LOCK_TIMEOUT = 3600
+RUN_LOCK_BUSY_EXIT = 75
+
 # 日报/简报文件格式（{date} 替换为 YYYYMMDD）
 REPORT_FILE_FORMAT = "日报_{date}.txt"
 BRIEF_FILE_FORMAT = "简报_{date}.txt"
+# 带元数据的结构化简报（JSON，与 txt 并存，供下游工具直接读取）
+BRIEF_JSON_FILE_FORMAT = "简报_{date}.json"
+# 团队汇总报告文件格式（{start}/{end} 替换为 YYYYMMDD）
+TEAM_REPORT_FILE_FORMAT = "团队报告_{start}_{end}.txt"
+# 周报/月报/季报文件格式（{name} 为 周报/月报/季报，{start}/{end} 替换为 YYYYMMDD）
+ROLLUP_FILE_FORMAT = "{name}_{start}_{end}.txt"
+# 报告原子写入：重复运行且内容变化时，被覆盖的旧版本保存到同目录的 history/ 下，每个文件最多保留的版本数（0 表示不保留）
+REPORT_KEEP_VERSIONS = 0
+REPORT_VERSIONS_DIR_NAME = 'history'
+
+# 运行耗时记录目录名（位于 REPORT_SAVE_DIR 下，每次运行导出一个 run_YYYYMMDD_HHMMSS.json）
+TELEMETRY_DIR_NAME = 'runs'
+# 控制台耗时摘要中显示最慢的仓库/阶段数量
+TELEMETRY_TOP_N = 5
+
+# 发布发件箱目录名（位于 REPORT_SAVE_DIR 下，记录每天简报的 CRM 发布状态）
+OUTBOX_DIR_NAME = 'outbox'
+
+# 提交缓存目录名（位于 REPORT_SAVE_DIR 下，每天收集的提交保存为 commits_YYYYMMDD.jsonl，供周报/月报汇总使用）
+COMMIT_CACHE_DIR_NAME = 'cache'
+# 提交 spool 目录名（位于 REPORT_SAVE_DIR 下，钩子按天写入 commits_YYYYMMDD.spool）及保留天数
+SPOOL_DIR_NAME = 'spool'
+SPOOL_KEEP_DAYS = 31
+# 流水线阶段缓存目录名（位于提交缓存目录下，每天每个阶段保存输出及输入指纹，输入未变化的阶段重新运行时直接复用）
+STAGE_CACHE_DIR_NAME = 'stages'
+# 批量导出目录名（位于 REPORT_SAVE_DIR 下，python main.py export 输出 Parquet/JSON Lines）
+EXPORT_DIR_NAME = 'export'
 
 # DeepSeek API（优先使用环境变量 DEEPSEEK_API_KEY，避免 key 进仓库）
 DEEPSEEK_API_KEY = os.environ.get('DEEPSEEK_API_KEY', 'sk-91ee266d045e47c28ae1cfeb461ea9d7')
@@ -33,6 +123,25 @@ CRM_URL = "https://crm.vankun.cn/crm/"
 CRM_USERNAME = "eddy.yang"
 CRM_PASSWORD = "xxx"
 
+# CRM 发布方式：'http' 直接提交表单（无需浏览器，提交前失败时回退到 Playwright）；'playwright' 仅使用浏览器自动化
+CRM_PUBLISH_BACKEND = 'http'
+# CRM HTTP 请求超时（秒）
+CRM_HTTP_TIMEOUT = 15
+
+# 多机提交汇总：各机器运行 python main.py push 把本机收集的提交推送到聚合服务（python main.py aggregator），
+# 生成日报时合并所有机器的提交。聚合服务地址为空时不启用（如 http://192.168.1.10:8766）
+AGGREGATOR_URL = os.environ.get('AGGREGATOR_URL', '')
+# 推送/读取使用的共享令牌（聚合服务未设置令牌时不校验，仅建议在本机或可信内网使用）
+AGGREGATOR_TOKEN = os.environ.get('AGGREGATOR_TOKEN', '')
+# 聚合服务监听地址
+AGGREGATOR_HOST = '127.0.0.1'
+AGGREGATOR_PORT = 8766
+# 每批推送的提交数、请求超时（秒）
+AGGREGATOR_BATCH_SIZE = 500
+AGGREGATOR_TIMEOUT = 15
+# 聚合服务保存合并提交的目录名（位于 REPORT_SAVE_DIR 下，每天 commits_YYYYMMDD.jsonl）
+AGGREGATOR_DIR_NAME = 'aggregate'
+
 # DeepSeek 简报生成修饰词配置
 # 工作描述风格：用于修饰生成的工作内容描述
 BRIEF_STYLE_MODIFIERS = {
@@ -0,0 +1,46 @@
+"""
+测试共用的 Git 辅助函数：不读取系统级配置、作者/提交者固定的 git 环境，执行 git 命令、初始化仓库和创建空提交
+"""
+import os
+import shutil
+import subprocess
+from datetime import datetime
+
+GIT = shutil.which('git') or 'git'
+ENV = dict(
+    os.environ,
+    GIT_CONFIG_NOSYSTEM='1',
+    GIT_AUTHOR_NAME='tester', GIT_AUTHOR_EMAIL='tester@example.com',
+    GIT_COMMITTER_NAME='tester', GIT_COMMITTER_EMAIL='tester@example.com',
+)
+
+
+def git(cwd: str, *args: str, author: str = None, when: datetime = None) -> str:
+    """
+    在 cwd 执行 git 命令（失败时抛出 CalledProcessError），返回去掉首尾空白的标准输出
+
+    Args:
+        author: 作者和提交者名，默认 tester
+        when: 作者和提交时间（+0800），默认当前时间
+    """
+    env = ENV
+    if author is not None:
+        env = dict(env, GIT_AUTHOR_NAME=author, GIT_COMMITTER_NAME=author)
+    if when is not None:
+        stamp = when.strftime('%Y-%m-%dT%H:%M:%S') + ' +0800'
+        env = dict(env, GIT_AUTHOR_DATE=stamp, GIT_COMMITTER_DATE=stamp)
+    return subprocess.run(
+        [GIT, *args], cwd=cwd, env=env, check=True, capture_output=True, text=True, encoding='utf-8',
+    ).stdout.strip()
+
+
+def init_repo(path: str) -> str:
+    """创建目录并初始化默认分支为 main 的仓库，返回仓库路径"""
+    os.makedirs(path, exist_ok=True)
+    git(path, 'init', '-q', '-b', 'main')
+    return path
+
+
+def commit(repo: str, message: str, author: str = None, when: datetime = None):
+    """创建一条空提交"""
+    git(repo, 'commit', '-q', '--allow-empty', '-m', message, author=author, when=when)
@@ -1,34 +1,204 @@
 """
 日报自动提交程序主入口（跨平台兼容）
+
+openai（DeepSeek）、playwright / requests（CRM 发布）等重量级依赖只在对应阶段真正执行时才导入，
+collect / report 等不调用模型、不发布的子命令启动时不会加载它们
 """
+import argparse
 import os
+import subprocess
 import sys
-from datetime import datetime
+from datetime import datetime, timedelta
+from typing import Optional
 from service.git_service import GitService
-from service.report_service import ReportService
-from service.deepseek_service import DeepSeekService
-from service.crm_service import CRMService
+from service.report_service import BRIEF_FORMAT_INSTRUCTION, ReportService
+from service.brief_parser import Brief, BriefFormatError
+from service.commit_cache import CommitCache
+from service.commit_spool import CommitSpool
+from service.commit_store import CommitStore
+from service.export_service import FORMAT_JSONL, FORMAT_PARQUET, ExportService
+from service.rollup_service import PERIOD_NAMES, PERIOD_WEEK, RollupService, period_range
+from service.telemetry_service import telemetry, CATEGORY_CRM, CATEGORY_STAGE
+from service.atomic_file import content_hash
+from service.run_lock import RunLock
+from service.stage_cache import (
+    StageCache,
+    STAGE_BRIEF,
+    STAGE_COLLECT,
+    STAGE_DISCOVER,
+    STAGE_PUBLISH,
+    STAGE_REPORT,
+    fingerprint,
+)
+from service.outbox_service import (
+    OutboxService,
+    STATE_FAILED,
+    STATE_PUBLISHED,
+    STATE_PUBLISHING,
+)
 from config import (
+    AGGREGATOR_URL,
+    BRIEF_STYLE_MODIFIERS,
+    BRIEF_SYSTEM_MODIFIER,
     CRM_URL,
     CRM_USERNAME,
     CRM_PASSWORD,
+    CRM_PUBLISH_BACKEND,
+    CRM_HTTP_TIMEOUT,
+    DEEPSEEK_MODEL,
+    EXCLUDE_DIRS,
     GIT_REPO_SEARCH_PATH,
     GIT_SEARCH_PATHS,
+    REPORT_FILE_FORMAT,
+    REPORT_SAVE_DIR,
+    RUN_LOCK_BUSY_EXIT,
+    RUN_LOCK_TIMEOUT,
+    RUN_LOCK_WAIT,
+    TEAM_REPORT_FILE_FORMAT,
+    TELEMETRY_DIR_NAME,
 )
 
 
-def main():
-    """主函数"""
-    print(f"开始生成日报 - {datetime.now().strftime('%Y-%m-%d %H:%M:%S')}")
-    print("-" * 60)
+def _publish_with(crm_service, brief: Brief) -> Optional[bool]:
+    """使用指定的 CRM 服务登录并发布简报，返回值同 CRMHttpService.publish_report（None 表示已提交、结果未知）"""
+    backend = type(crm_service).__name__
+    try:
+        with telemetry.span("crm.login", CATEGORY_CRM, backend=backend):
+            logged_in = crm_service.login()
+        if not logged_in:
+            print("\n" + "=" * 60)
+            print("✗ CRM 登录失败")
+            print("=" * 60)
+            return False
+        print("✓ CRM 登录成功")
+        print("\n正在发布日报...")
+        with telemetry.span("crm.publish_report", CATEGORY_CRM, backend=backend):
+            published = crm_service.publish_report(brief)
+        if published:
+            print("\n" + "=" * 60)
+            print("✓ 日报发布成功！")
+            print("=" * 60)
+            return True
+        if published is None:
+            print("\n" + "=" * 60)
+            print("⚠ 日报已提交，但发布结果未知，请到 CRM 确认")
+            print("=" * 60)
+            return None
+        print("\n" + "=" * 60)
+        print("✗ 日报发布失败")
+        print("=" * 60)
+        return False
+    except Exception as e:
+        print(f"\n✗ CRM 发布过程出错: {e}")
+        import traceback
+        traceback.print_exc()
+        return False
+    finally:
+        with telemetry.span("crm.close", CATEGORY_CRM, backend=backend):
+            crm_service.close()
+
+
+def publish_to_crm(brief: Brief) -> Optional[bool]:
+    """
+    发布简报到 CRM：优先使用 HTTP 直接提交，提交前失败（登录失败、未找到日志表单等）时回退到 Playwright 浏览器自动化；
+    表单已提交但结果未知时不回退，避免重复发布
     
-    # 初始化服务
-    git_service = GitService()
-    report_service = ReportService()
+    Args:
+        brief: 已通过校验的结构化简报
+        
+    Returns:
+        发布是否成功；None 表示已提交、结果未知
+    """
+    if CRM_PUBLISH_BACKEND == 'http':
+        from service.crm_http_service import CRMHttpService
+        print("\n正在登录 CRM 系统（HTTP）...")
+        published = _publish_with(CRMHttpService(CRM_URL, CRM_USERNAME, CRM_PASSWORD, timeout=CRM_HTTP_TIMEOUT), brief)
+        if published is not False:
+            return published
+        print("HTTP 发布未成功，回退到浏览器自动化发布...")
+    from service.crm_service import CRMService
+    print("\n正在登录 CRM 系统...")
+    return _publish_with(CRMService(CRM_URL, CRM_USERNAME, CRM_PASSWORD), brief)
+
+
+def publish_outbox_entry(outbox: OutboxService, entry: dict, force: bool = False) -> bool:
+    """
+    发布发件箱中的一条记录，并更新其发布状态（已发布的记录不会再次发布）
     
-    # 1. 自动发现Git仓库
-    print("正在搜索本地Git仓库...")
-    # 优先使用环境变量 GIT_REPO_SEARCH_PATH；否则使用 config.GIT_SEARCH_PATHS
+    Args:
+        outbox: 发件箱
+        entry: 发件箱记录
+        force: 是否重试停留在 publishing 状态（上次发布中断）的记录
+        
+    Returns:
+        发布是否成功
+    """
+    date = entry['date']
+    # 认领在发件箱锁内完成：其他进程已发布或正在发布时不会重复发布
+    claimed = outbox.claim(date, include_in_flight=force)
+    if claimed is None:
+        entry = outbox.get(date) or entry
+        if entry['state'] == STATE_PUBLISHED:
+            print(f"{date} 的简报已于 {entry['published_at']} 发布，跳过（幂等键 {entry['idempotency_key']}）")
+            return True
+        print(f"⚠ {date} 的简报正在由其他进程发布（或上次发布中断），跳过")
+        return False
+    ok = publish_to_crm(outbox.brief_of(claimed))
+    if ok is None:
+        # 结果未知：保持 publishing，确认未发布后需 --force 才会重试
+        print(f"⚠ {date} 的简报发布结果未知，请到 CRM 确认；确认未发布后使用 python main.py publish-pending --force 重试")
+        return False
+    entry = outbox.mark(date, STATE_PUBLISHED if ok else STATE_FAILED, error=None if ok else "CRM 发布失败")
+    # 记录发布阶段结果（输入为简报内容）
+    StageCache(datetime.strptime(date, '%Y%m%d')).save(
+        STAGE_PUBLISH, fingerprint(entry['brief']),
+        {'state': entry['state'], 'published_at': entry['published_at']},
+    )
+    return ok
+
+
+def publish_pending(date: str = None, force: bool = False, include_past: bool = False) -> bool:
+    """
+    仅执行 CRM 发布步骤：发布发件箱中未发布的简报（不重新扫描仓库、不调用 DeepSeek）。
+    CRM 日志表单没有日期字段，简报总是作为当天的日志发布，因此默认只发布今天的简报，
+    以前日期的简报提示后跳过
+    
+    Args:
+        date: 只发布指定日期（YYYYMMDD）
+        force: 同时重试停留在 publishing 状态的记录（上次发布中断，结果未知，可能重复发布）
+        include_past: 未指定 date 时也发布以前日期的简报（均作为今天的日志发布）
+        
+    Returns:
+        是否全部发布成功
+    """
+    outbox = OutboxService()
+    entries = outbox.pending(include_in_flight=force)
+    if date:
+        entries = [e for e in entries if e['date'] == date]
+    elif not include_past:
+        today = datetime.now().strftime('%Y%m%d')
+        for e in entries:
+            if e['date'] != today:
+                print(f"⚠ {e['date']} 的简报未发布，将作为今天的日志发布，已跳过；"
+                      f"确需发布时使用 --date {e['date']} 或 --include-past")
+        entries = [e for e in entries if e['date'] == today]
+    in_flight = [e for e in outbox.pending(include_in_flight=True) if e['state'] == STATE_PUBLISHING]
+    if in_flight and not force:
+        for e in in_flight:
+            print(f"⚠ {e['date']} 的简报上次发布中断，结果未知，请到 CRM 确认；确认未发布后使用 --force 重试")
+    if not entries:
+        print("发件箱中没有待发布的简报")
+        return True
+    
+    all_ok = True
+    for entry in entries:
+        print(f"\n正在发布 {entry['date']} 的简报（第 {entry['attempts'] + 1} 次尝试）...")
+        all_ok = publish_outbox_entry(outbox, entry, force) and all_ok
+    return all_ok
+
+
+def resolve_search_paths() -> list:
+    """搜索路径：优先使用环境变量 GIT_REPO_SEARCH_PATH；否则使用 config.GIT_SEARCH_PATHS 中存在的目录"""
     if "GIT_REPO_SEARCH_PATH" in os.environ:
         search_paths = [os.environ["GIT_REPO_SEARCH_PATH"]]
     else:
@@ -47,46 +217,484 @@ def main():
                 search_paths.append(expanded)
     if not search_paths:
         search_paths = [os.path.abspath(os.path.expanduser(GIT_REPO_SEARCH_PATH))]
+    return search_paths
+
+
+def discover_repos(git_service: GitService) -> list:
+    """在所有搜索路径中发现Git仓库"""
+    print("正在搜索本地Git仓库...")
+    search_paths = resolve_search_paths()
     
     # 显示所有搜索路径
     print(f"搜索路径 ({len(search_paths)} 个):")
     for path in search_paths:
         print(f"  - {path}")
     
-    # 在所有路径中搜索Git仓库
-    all_git_repos = []
-    for search_path in search_paths:
-        repos = git_service.discover_git_repos(search_path)
-        all_git_repos.extend(repos)
-        if repos:
-            print(f"  在 {search_path} 中发现 {len(repos)} 个Git仓库")
-    
-    # 去重（避免同一个仓库被重复添加）
-    git_repos = list(dict.fromkeys(all_git_repos))  # 保持顺序的去重方法
+    # 在所有路径中并行搜索Git仓库（合并重叠路径，按设备号+inode 去重）
+    git_repos = git_service.discover_git_repos_multi(search_paths)
     print(f"\n总共发现 {len(git_repos)} 个Git仓库")
+    return git_repos
+
+
+def run_team_report(start_date: datetime, end_date: datetime, prefilter: bool = None,
+                    author: str = None, no_merges: bool = False) -> bool:
+    """
+    生成团队汇总报告（按人员/仓库/日期/时段统计）
     
+    Args:
+        start_date: 统计开始日期
+        end_date: 统计结束日期（含）
+        prefilter: 是否启用仓库活跃度预筛选
+        author: 只统计该作者的提交（过滤交给 git log --author）
+        no_merges: 不统计合并提交
+    """
+    print(f"开始生成团队报告 {start_date.strftime('%Y-%m-%d')} ~ {end_date.strftime('%Y-%m-%d')}")
+    print("-" * 60)
+    git_service = GitService(prefilter=prefilter)
+    report_service = ReportService()
+    
+    git_repos = discover_repos(git_service)
     if not git_repos:
         print("警告: 未发现任何Git仓库")
+        return False
+    
+    print("正在获取统计期间的提交记录...")
+    with telemetry.span("get_all_commits_by_range", CATEGORY_STAGE, repos=len(git_repos)) as span:
+        store = CommitStore(git_service.get_all_commits_by_range(git_repos, start_date, end_date, author, no_merges))
+        span['skipped'] = git_service.last_skipped
+    git_service.save_history()
+    print(f"共有 {len(store)} 条提交记录")
+    
+    content = report_service.generate_team_report(store, start_date, end_date)
+    filename = TEAM_REPORT_FILE_FORMAT.format(
+        start=start_date.strftime("%Y%m%d"), end=end_date.strftime("%Y%m%d")
+    )
+    report_path = report_service.save_report_to_file(content, os.path.join(REPORT_SAVE_DIR, filename))
+    print("\n" + content)
+    print(f"团队报告已保存到: {report_path}")
+    return True
+
+
+def _parse_date(value: str) -> datetime:
+    try:
+        return datetime.strptime(value, "%Y%m%d")
+    except ValueError:
+        raise argparse.ArgumentTypeError(f"日期格式应为 YYYYMMDD: {value}")
+
+
+def _parse_time(value: str) -> str:
+    try:
+        return datetime.strptime(value, "%H:%M").strftime("%H:%M")
+    except ValueError:
+        raise argparse.ArgumentTypeError(f"时间格式应为 HH:MM: {value}")
+
+
+def run_rollup(start_date: datetime, end_date: datetime, period: str = PERIOD_WEEK, use_llm: bool = True) -> bool:
+    """
+    基于已保存的每日简报和提交缓存生成周报/月报/季报（不重新扫描仓库，整个周期只调用一次 DeepSeek）
+    
+    Args:
+        start_date: 周期开始日期
+        end_date: 周期结束日期（含）
+        period: 周期类型
+        use_llm: 是否调用 DeepSeek 生成工作总结
+    """
+    name = PERIOD_NAMES.get(period, '汇总')
+    print(f"开始生成{name} {start_date.strftime('%Y-%m-%d')} ~ {end_date.strftime('%Y-%m-%d')}")
+    print("-" * 60)
+    rollup_service = RollupService()
+    my_author = GitService().get_current_author()
+    deepseek_service = None
+    if use_llm:
+        from service.deepseek_service import DeepSeekService
+        deepseek_service = DeepSeekService()
+    content = rollup_service.generate_rollup(
+        start_date, end_date, period,
+        deepseek_service=deepseek_service,
+        my_author=my_author or None,
+    )
+    path = rollup_service.save_rollup(content, start_date, end_date, period)
+    print("\n" + content)
+    print(f"\n{name}已保存到: {path}")
+    return True
+
+
+def run_export(start_date: datetime, end_date: datetime, fmt: str = FORMAT_PARQUET) -> bool:
+    """将日期范围内缓存的提交和结构化简报导出为 Parquet/JSON Lines（不重新扫描仓库）"""
+    paths = ExportService().export(start_date, end_date, fmt)
+    for path in paths:
+        print(f"已导出: {path}")
+    return True
+
+
+def export_telemetry(summary: bool = True):
+    """输出耗时摘要、导出 JSON 运行记录并清空已记录的耗时；导出失败只提示，不掩盖流程本身的异常"""
+    if not telemetry.spans:
         return
+    try:
+        if summary:
+            print("\n" + telemetry.summary())
+        print(f"运行记录已保存到: {telemetry.export()}")
+    except Exception as e:
+        print(f"⚠ 运行记录导出失败: {e}")
+    telemetry.reset()
+
+
+def run_watch(prefilter: bool = None, backend: str = None, report_at: str = None) -> bool:
+    """
+    常驻监听：仓库引用有变动时只重新收集该仓库的今日提交，维护今日提交的内存索引，并写入提交缓存和收集阶段缓存，
+    之后运行 python main.py / report / brief 时直接复用；指定 report_at（HH:MM）时到点从索引生成当天日报
+    
+    Args:
+        prefilter: 是否启用仓库活跃度预筛选
+        backend: 监听方式 'auto'、'watchdog' 或 'poll'
+        report_at: 每天生成日报的时间
+    """
+    from service.watch_service import WatchService
+    
+    git_service = GitService(prefilter=prefilter)
+    watcher = None
+    reported_day = None
+    try:
+        while True:
+            today = datetime.now()
+            if watcher is None or watcher.index.day.date() != today.date():
+                # 启动或跨天：重新发现仓库并全量收集一次；跨天时导出前一天的运行记录，常驻进程的耗时记录不会无限增长
+                if watcher is not None:
+                    watcher.stop()
+                    export_telemetry(summary=False)
+                stages = StageCache(today)
+                git_repos = discover_stage(git_service, stages)
+                if not git_repos:
+                    print("警告: 未发现任何Git仓库")
+                    return False
+                watcher = WatchService(git_service, git_repos, backend)
+                print(f"开始监听 {len(watcher.groups)} 个仓库（{watcher.backend}），按 Ctrl+C 退出")
+                changed = set(watcher.groups)
+            else:
+                watcher.wait()
+                changed = watcher.changed()
+            
+            if changed:
+                fp = collect_fingerprint(git_service, git_repos, today)
+                watcher.refresh(changed)
+                commits = watcher.index.commits()
+                CommitCache().save(today, commits)
+                # 今日无提交或有仓库超时/熔断时不写收集阶段缓存，日终运行时照常收集
+                if commits and not watcher.incomplete:
+                    stages.save(STAGE_COLLECT, fp, {'today': fingerprint(commits), 'yesterday': None})
+                print(f"[{datetime.now().strftime('%H:%M:%S')}] {len(changed)} 个仓库有变动，今日共 {len(commits)} 条提交")
+            
+            if report_at and reported_day != today.date() and today.strftime('%H:%M') >= report_at:
+                reported_day = today.date()
+                report_stage(watcher.index.commits(), stages)
+                export_telemetry()
+    except KeyboardInterrupt:
+        print("\n已停止监听")
+        return True
+    finally:
+        if watcher is not None:
+            watcher.stop()
+
+
+def merge_remote_commits(today_commits: list) -> list:
+    """
+    配置了聚合服务（config.AGGREGATOR_URL）时，推送本机今日提交并读取所有机器合并后的今日提交；
+    聚合服务不可用时打印警告并只使用本机提交
+    """
+    if not AGGREGATOR_URL:
+        return today_commits
+    from service.aggregator_service import CollectorAgent
+    
+    agent = CollectorAgent()
+    try:
+        with telemetry.span("aggregator.sync", CATEGORY_STAGE) as span:
+            pushed = agent.push(today_commits)
+            merged = agent.fetch()
+            span['pushed'] = pushed['sent']
+            span['merged'] = len(merged)
+    except RuntimeError as e:
+        print(f"警告: {e}，只使用本机提交")
+        return today_commits
+    machines = sorted({c.get('machine', '') for c in merged})
+    print(f"已合并 {len(machines)} 台机器的提交，今日共 {len(merged)} 条（本机 {len(today_commits)} 条）")
+    return merged
+
+
+def run_push(prefilter: bool = None, refresh: bool = False, full: bool = False) -> bool:
+    """push 子命令：收集本机今日提交并推送到聚合服务"""
+    from service.aggregator_service import CollectorAgent
+    
+    if not AGGREGATOR_URL:
+        print("✗ 未配置聚合服务地址（config.AGGREGATOR_URL 或环境变量 AGGREGATOR_URL）")
+        return False
+    git_repos, today_commits, _ = collect_stage(prefilter, StageCache(refresh=refresh))
+    if not git_repos:
+        return False
+    agent = CollectorAgent()
+    try:
+        result = agent.push(today_commits, full=full)
+    except RuntimeError as e:
+        print(f"✗ {e}")
+        return False
+    print(
+        f"已推送 {result['sent']} 条提交（{result['batches']} 批，{agent.bytes_sent} 字节），"
+        f"新增 {result['accepted']} 条，重复 {result['duplicates']} 条，移除已失效的 {result['removed']} 条"
+    )
+    return True
+
+
+def run_aggregator(host: str = None, port: int = None) -> bool:
+    """aggregator 子命令：启动提交聚合服务（前台运行，Ctrl+C 退出）"""
+    from service.aggregator_service import AggregatorServer
+    
+    server = AggregatorServer(host, port)
+    print(f"提交聚合服务已启动: {server.url}（数据保存在 {server.store.cache.cache_dir}），按 Ctrl+C 退出")
+    if not server.token:
+        print("警告: 未设置 AGGREGATOR_TOKEN，不校验采集端身份，请只在本机或可信内网监听")
+    try:
+        server.serve_forever()
+    except KeyboardInterrupt:
+        print("\n已停止聚合服务")
+    finally:
+        server.server_close()
+    return True
+
+
+def run_hooks(action: str) -> bool:
+    """
+    为发现的仓库安装/卸载提交 spool 钩子，或查看安装情况（同一对象库的多个 worktree 共用钩子，只处理一次）
+    
+    Args:
+        action: 'install'、'uninstall' 或 'status'
+    """
+    git_service = GitService()
+    git_repos = discover_repos(git_service)
+    spool = CommitSpool()
+    installed = spool.installed()
+    ok = True
+    for common_dir, checkouts in git_service.group_by_object_store(git_repos).items():
+        repo_path = checkouts[0]['path']
+        if action == 'install':
+            result = spool.install(repo_path, common_dir)
+            ok = ok and not result.startswith("跳过")
+        elif action == 'uninstall':
+            result = "已卸载" if spool.uninstall(repo_path, common_dir) else "未安装"
+        else:
+            since = installed.get(common_dir)
+            result = f"已安装（{datetime.fromtimestamp(since).strftime('%Y-%m-%d %H:%M')} 起）" if since else "未安装"
+        print(f"  {repo_path}: {result}")
+    if action == 'install':
+        print(f"\n钩子将本地提交追加到 {spool.spool_dir}；安装当天仍执行 git log，次日起只读取 spool")
+    return ok
+
+
+def run_maintenance(force: bool = False, workers: int = None, repeat: int = 1,
+                    dry_run: bool = False, background: bool = False) -> bool:
+    """
+    commit-graph 维护：为缺少或 commit-graph 已过期的仓库写入 commit-graph（有限并发），
+    并输出写入前后按日期读取提交（git log --since/--until）的耗时
+    
+    Args:
+        force: 同时重写状态为最新的 commit-graph
+        workers: 同时写入的仓库数，默认 config.COMMIT_GRAPH_WORKERS
+        repeat: 每次测量 git log 耗时的重复次数（取最小值）
+        dry_run: 只列出各仓库的 commit-graph 状态，不写入
+        background: 在后台进程中执行，输出写入 reports/runs/maintenance_*.log
+    """
+    from service.commit_graph_service import GRAPH_FRESH, GRAPH_STATUS_NAMES, CommitGraphService
+    
+    if background:
+        log_path = os.path.join(
+            REPORT_SAVE_DIR, TELEMETRY_DIR_NAME, f"maintenance_{datetime.now().strftime('%Y%m%d_%H%M%S')}.log"
+        )
+        os.makedirs(os.path.dirname(log_path), exist_ok=True)
+        cmd = [sys.executable, os.path.abspath(__file__), 'maintenance', '--repeat', str(repeat)]
+        if force:
+            cmd.append('--force')
+        if workers:
+            cmd.extend(['--workers', str(workers)])
+        if sys.platform == 'win32':
+            detach = {'creationflags': subprocess.DETACHED_PROCESS | subprocess.CREATE_NEW_PROCESS_GROUP}
+        else:
+            detach = {'start_new_session': True}
+        with open(log_path, 'ab') as log:
+            process = subprocess.Popen(
+                cmd, stdin=subprocess.DEVNULL, stdout=log, stderr=subprocess.STDOUT,
+                cwd=os.path.dirname(os.path.abspath(__file__)), env=dict(os.environ, PYTHONIOENCODING='utf-8'),
+                **detach,
+            )
+        print(f"commit-graph 维护已在后台运行（进程 {process.pid}），输出: {log_path}")
+        return True
+    
+    git_service = GitService()
+    git_repos = discover_repos(git_service)
+    if not git_repos:
+        print("警告: 未发现任何Git仓库")
+        return False
+    graphs = CommitGraphService(git_service, workers)
+    
+    if dry_run:
+        scanned = graphs.scan(git_repos)
+        for item in scanned:
+            print(f"  {item['repo']}: {GRAPH_STATUS_NAMES[item['status']]}")
+        pending = sum(1 for item in scanned if item['status'] != GRAPH_FRESH)
+        print(f"\n{len(scanned)} 个仓库中 {pending} 个需要写入 commit-graph")
+        return True
+    
+    print(f"正在为缺少或已过期 commit-graph 的仓库写入 commit-graph（并发 {graphs.workers}）...")
+    with telemetry.span("commit_graph.maintain", CATEGORY_STAGE, repos=len(git_repos)) as span:
+        results = graphs.maintain(git_repos, force=force, repeat=repeat)
+        span['written'] = sum(1 for r in results if not r['error'])
+    if not results:
+        print("所有仓库的 commit-graph 都是最新的")
+        return True
+    
+    print(f"\n{'仓库':<40} {'状态':<6} {'写入前':>10} {'写入后':>10} {'写入耗时':>10}")
+    for r in sorted(results, key=lambda r: r['before'] or 0, reverse=True):
+        status = GRAPH_STATUS_NAMES[r['status']]
+        if r['error']:
+            print(f"{r['repo']:<40} {status:<6} ✗ {r['error']}")
+            continue
+        print(f"{r['repo']:<40} {status:<6} {r['before'] * 1000:>8.1f}ms {r['after'] * 1000:>8.1f}ms {r['write']:>9.2f}s")
+    done = [r for r in results if not r['error']]
+    if done:
+        before = sum(r['before'] for r in done)
+        after = sum(r['after'] for r in done)
+        print(f"\n已写入 {len(done)} 个仓库，按日期读取提交合计 {before * 1000:.1f} ms → {after * 1000:.1f} ms")
+    return len(done) == len(results)
+
+
+def discover_stage(git_service: GitService, stages: StageCache) -> list:
+    """
+    发现仓库阶段：搜索路径、排除规则和搜索选项未变化，且搜索路径本身没有增删子目录时，复用当天已发现的仓库列表
+    （更深层目录中新建的仓库需使用 --refresh 重新发现）
+    """
+    search_paths = resolve_search_paths()
+    fp = fingerprint(
+        search_paths,
+        [os.stat(path).st_mtime if os.path.isdir(path) else None for path in search_paths],
+        EXCLUDE_DIRS,
+        git_service.max_depth,
+        git_service.include_submodules,
+        git_service.follow_symlinks,
+    )
+    cached = stages.lookup(STAGE_DISCOVER, fp)
+    if cached is not None and all(os.path.isdir(path) for path in cached):
+        print(f"搜索路径与配置未变化，复用今日已发现的 {len(cached)} 个Git仓库")
+        return cached
+    git_repos = discover_repos(git_service)
+    stages.save(STAGE_DISCOVER, fp, git_repos)
+    return git_repos
+
+
+def collect_fingerprint(git_service: GitService, git_repos: list, date: datetime) -> str:
+    """
+    收集阶段的输入指纹：仓库列表、各对象库的引用签名、各仓库的引用范围、读取后端、去重方式、
+    是否预筛选、spool 是否启用及已安装钩子的仓库，以及日期（需在收集提交之前计算）
+    """
+    spool = git_service.spool if git_service.prefilter else None
+    return fingerprint(
+        git_repos,
+        git_service.ref_signature(git_repos),
+        [git_service.ref_scope_for(path).to_dict() for path in git_repos],
+        git_service.backend,
+        git_service.dedupe_patch_id,
+        git_service.prefilter,
+        sorted(spool.installed().items()) if spool else None,
+        date.strftime('%Y%m%d'),
+    )
+
+
+def collect_stage(prefilter: bool = None, stages: StageCache = None):
+    """
+    收集阶段：发现仓库并收集今日提交（今日无提交时同时收集昨天的提交），写入提交缓存；
+    仓库列表和各仓库引用签名都未变化时直接读取上次收集的提交缓存，不执行 git log
+    
+    Returns:
+        (git_repos, today_commits, yesterday_commits)；未发现仓库时 git_repos 为空列表
+    """
+    stages = stages or StageCache()
+    git_service = GitService(prefilter=prefilter)
+    
+    # 1. 自动发现Git仓库
+    git_repos = discover_stage(git_service, stages)
+    
+    if not git_repos:
+        print("警告: 未发现任何Git仓库")
+        return [], [], []
+    
+    today = stages.date
+    yesterday = today - timedelta(days=1)
+    commit_cache = CommitCache()
+    fp = collect_fingerprint(git_service, git_repos, today)
+    cached = stages.lookup(STAGE_COLLECT, fp)
+    if cached is not None:
+        today_commits = commit_cache.load(today)
+        yesterday_commits = commit_cache.load(yesterday) if cached['yesterday'] else []
+        if (fingerprint(today_commits) == cached['today']
+                and (not cached['yesterday'] or fingerprint(yesterday_commits) == cached['yesterday'])):
+            print(f"仓库引用未变化，复用今日已收集的 {len(today_commits)} 条提交记录")
+            return git_repos, today_commits, yesterday_commits
     
     # 2. 获取今日所有提交记录
     print("正在获取今日提交记录...")
-    today_commits = git_service.get_all_today_commits(git_repos)
+    with telemetry.span("get_all_today_commits", CATEGORY_STAGE, repos=len(git_repos)) as span:
+        today_commits = git_service.get_all_today_commits(git_repos)
+        span['skipped'] = git_service.last_skipped
+        span['timed_out'] = len(git_service.last_timed_out)
+        span['broken'] = len(git_service.last_broken)
+    # 有仓库超时或被熔断跳过时收集结果不完整，不写入阶段缓存，下次运行重新收集
+    incomplete = bool(git_service.last_timed_out or git_service.last_broken)
     print(f"今日共有 {len(today_commits)} 条提交记录")
+    if git_service.spool:
+        git_service.spool.prune()
+    # 缓存当天的提交，report/brief 子命令和周报/月报汇总时直接读取
+    commit_cache.save(today, today_commits)
     
     # 2.5 如果今日无提交，获取昨天的提交记录作为备用
     yesterday_commits = []
     if not today_commits:
         print("今日无提交记录，正在获取昨天的提交记录作为参考...")
-        yesterday_commits = git_service.get_all_yesterday_commits(git_repos)
+        with telemetry.span("get_all_yesterday_commits", CATEGORY_STAGE, repos=len(git_repos)) as span:
+            yesterday_commits = git_service.get_all_yesterday_commits(git_repos)
+            span['skipped'] = git_service.last_skipped
+        incomplete = incomplete or bool(git_service.last_timed_out or git_service.last_broken)
+        commit_cache.save(yesterday, yesterday_commits)
         print(f"昨天共有 {len(yesterday_commits)} 条提交记录")
+    git_service.save_history()
+    if incomplete:
+        print("警告: 部分仓库超时或被熔断跳过，本次收集结果不写入阶段缓存")
+    else:
+        stages.save(STAGE_COLLECT, fp, {
+            'today': fingerprint(today_commits),
+            'yesterday': fingerprint(yesterday_commits) if yesterday_commits else None,
+        })
+    return git_repos, today_commits, yesterday_commits
+
+
+def report_stage(today_commits: list, stages: StageCache = None) -> str:
+    """日报阶段：生成、保存并预览原始提交清单日报；提交未变化且日报文件未被改动时不重新渲染"""
+    stages = stages or StageCache()
+    report_service = ReportService()
+    fp = fingerprint(fingerprint(today_commits), REPORT_FILE_FORMAT, stages.date.strftime('%Y%m%d'))
+    report_content = None
+    cached = stages.lookup(STAGE_REPORT, fp)
+    if cached is not None and os.path.exists(cached['path']):
+        with open(cached['path'], 'r', encoding='utf-8') as f:
+            content = f.read()
+        if content_hash(content.encode('utf-8')) == cached['hash']:
+            print("提交记录未变化，复用已生成的日报")
+            report_path, report_content = cached['path'], content
     
-    # 3. 生成日报内容
-    print("正在生成日报内容...")
-    report_content = report_service.generate_daily_report(today_commits)
-    
-    # 4. 保存日报到文件
-    report_path = report_service.save_report_to_file(report_content)
+    if report_content is None:
+        # 3. 生成日报内容
+        print("正在生成日报内容...")
+        report_content = report_service.generate_daily_report(today_commits)
+        
+        # 4. 保存日报到文件
+        report_path = report_service.save_report_to_file(report_content)
+        stages.save(STAGE_REPORT, fp, {'path': report_path, 'hash': content_hash(report_content.encode('utf-8'))})
     print(f"日报已保存到: {report_path}")
     
     # 5. 打印日报内容到控制台
@@ -95,67 +703,394 @@ def main():
     print("=" * 60)
     print(report_content)
     print("=" * 60)
+    return report_path
+
+
+def brief_stage(today_commits: list, yesterday_commits: list, repo_path: str = None,
+                stages: StageCache = None) -> Brief:
+    """
+    简报阶段：调用 DeepSeek 生成本人简报，保存 txt 和结构化 JSON；
+    提交、本人作者名、简报风格配置和模型都未变化时复用上次生成的简报，不调用 DeepSeek
+    
+    Args:
+        today_commits: 今日提交
+        yesterday_commits: 昨日提交（今日无提交时参考）
+        repo_path: 读取本人 Git user.name 时优先使用的仓库
+        stages: 阶段缓存
+    """
+    stages = stages or StageCache()
+    report_service = ReportService()
     
     # 6. 生成本人简报（DeepSeek 润色）
-    print("\n正在生成本人简报（DeepSeek）...")
-    my_author = git_service.get_current_author(git_repos[0] if git_repos else None)
+    my_author = GitService().get_current_author(repo_path)
     if not my_author:
         print("警告: 未获取到 Git user.name，将无法区分本人/他人提交；简报按「无本人提交」处理。")
-    deepseek_service = DeepSeekService()
-    brief = report_service.generate_brief(
-        today_commits, 
-        my_author or "", 
-        deepseek_service,
-        yesterday_commits=yesterday_commits if yesterday_commits else None
+    fp = fingerprint(
+        fingerprint(today_commits),
+        fingerprint(yesterday_commits) if yesterday_commits else None,
+        my_author,
+        BRIEF_STYLE_MODIFIERS,
+        BRIEF_SYSTEM_MODIFIER,
+        BRIEF_FORMAT_INSTRUCTION,
+        DEEPSEEK_MODEL,
     )
+    cached = stages.lookup(STAGE_BRIEF, fp)
+    if cached is not None:
+        print("\n提交记录与简报配置未变化，复用已生成的简报（不调用 DeepSeek）")
+        brief = Brief.from_dict(cached['brief'])
+        model = cached['model']
+    else:
+        from service.deepseek_service import DeepSeekService
+        
+        print("\n正在生成本人简报（DeepSeek）...")
+        deepseek_service = DeepSeekService()
+        with telemetry.span("generate_brief", CATEGORY_STAGE):
+            brief = report_service.generate_brief(
+                today_commits, 
+                my_author or "", 
+                deepseek_service,
+                yesterday_commits=yesterday_commits if yesterday_commits else None
+            )
+        model = deepseek_service.model
+        # 生成失败/无提交时的说明文字不缓存，下次运行重新生成
+        if brief.is_valid:
+            stages.save(STAGE_BRIEF, fp, {'brief': brief.to_dict(), 'model': model})
     brief_path = report_service.save_brief_to_file(brief)
     print(f"简报已保存到: {brief_path}")
+    # 同时保存带元数据的结构化简报，供下游工具直接读取
+    source_commits = today_commits or yesterday_commits
+    ExportService().save_brief_json(
+        brief,
+        author=my_author,
+        source=report_service.brief_source(today_commits, my_author or "", yesterday_commits),
+        commit_count=len(source_commits),
+        my_commit_count=sum(1 for c in source_commits if c.get('author') == my_author),
+        repos=sorted({c.get('repo', '') for c in source_commits}),
+        model=model,
+    )
     print("\n" + "-" * 60)
     print("简报预览:")
     print("-" * 60)
     print(brief)
     print("-" * 60)
+    return brief
+
+
+def enqueue_brief(brief: Brief):
+    """
+    校验简报并记录到发件箱，发布失败或跳过后可通过 publish / publish-pending 单独发布
+    
+    Returns:
+        (outbox, entry)；简报格式不合法时返回 (None, None)
+    """
+    # 先校验简报格式，不合法时直接跳过，避免启动浏览器后才失败
+    try:
+        brief.validate()
+    except BriefFormatError as e:
+        print(f"\n✗ 简报格式校验未通过，跳过 CRM 发布: {e}")
+        return None, None
+    outbox = OutboxService()
+    return outbox, outbox.enqueue(brief)
+
+
+def run_collect(prefilter: bool = None, refresh: bool = False) -> bool:
+    """collect 子命令：只收集提交并写入缓存"""
+    git_repos, today_commits, _ = collect_stage(prefilter, StageCache(refresh=refresh))
+    if git_repos:
+        print(f"提交已缓存到: {CommitCache().path(datetime.now())}")
+    return bool(git_repos)
+
+
+def run_report(prefilter: bool = None, refresh: bool = False) -> bool:
+    """report 子命令：生成日报（不调用 DeepSeek），仓库引用未变化时直接使用今日提交缓存"""
+    stages = StageCache(refresh=refresh)
+    git_repos, today_commits, _ = collect_stage(prefilter, stages)
+    if not git_repos:
+        return False
+    report_stage(merge_remote_commits(today_commits), stages)
+    return True
+
+
+def run_brief(prefilter: bool = None, refresh: bool = False) -> bool:
+    """brief 子命令：生成简报并记录到发件箱（不发布），仓库引用未变化时直接使用今日提交缓存"""
+    stages = StageCache(refresh=refresh)
+    git_repos, today_commits, yesterday_commits = collect_stage(prefilter, stages)
+    if not git_repos:
+        return False
+    today_commits = merge_remote_commits(today_commits)
+    brief = brief_stage(today_commits, yesterday_commits, git_repos[0], stages)
+    outbox, entry = enqueue_brief(brief)
+    if entry is None:
+        return False
+    if entry['state'] == STATE_PUBLISHED:
+        print(f"\n今日简报已于 {entry['published_at']} 发布到 CRM，不再重复发布")
+    else:
+        print("\n简报已记录到发件箱，运行 python main.py publish 发布到 CRM")
+    return True
+
+
+def run_daily_report(prefilter: bool = None, refresh: bool = False, run_lock: RunLock = None):
+    """
+    生成日报和简报，并可选发布到 CRM（依次执行 collect、report、brief 阶段，最后询问是否发布）；
+    各阶段输入未变化时复用当天已保存的输出
+    
+    Args:
+        prefilter: 是否启用仓库活跃度预筛选，默认 config.GIT_ACTIVITY_PREFILTER
+        refresh: 忽略阶段缓存，所有阶段重新执行
+        run_lock: 运行锁，询问是否发布前释放（发布由发件箱认领防止重复）
+    """
+    print(f"开始生成日报 - {datetime.now().strftime('%Y-%m-%d %H:%M:%S')}")
+    print("-" * 60)
+    
+    stages = StageCache(refresh=refresh)
+    git_repos, today_commits, yesterday_commits = collect_stage(prefilter, stages)
+    if not git_repos:
+        return
+    today_commits = merge_remote_commits(today_commits)
+    report_stage(today_commits, stages)
+    brief = brief_stage(today_commits, yesterday_commits, git_repos[0], stages)
     
     print(f"\n日报生成完成 - {datetime.now().strftime('%Y-%m-%d %H:%M:%S')}")
     
     # 7. 自动发布到 CRM 系统（可选）
+    outbox, entry = enqueue_brief(brief)
+    if entry is None:
+        return
+    if entry['state'] == STATE_PUBLISHED:
+        print(f"\n今日简报已于 {entry['published_at']} 发布到 CRM，不再重复发布")
+        return
+    
+    # 等待输入期间不占用运行锁，避免手动运行停在提示处时定时任务等待或退出
+    if run_lock is not None:
+        run_lock.release()
     print("\n" + "=" * 60)
     print("是否要自动发布到 CRM 系统? (y/n): ", end="")
     choice = input().strip().lower()
     
     if choice == 'y':
-        print("\n正在登录 CRM 系统...")
-        crm_service = CRMService(CRM_URL, CRM_USERNAME, CRM_PASSWORD)
-        
-        try:
-            if crm_service.login():
-                print("✓ CRM 登录成功")
-                print("\n正在发布日报...")
-                if crm_service.publish_report(brief):
-                    print("\n" + "=" * 60)
-                    print("✓ 日报发布成功！")
-                    print("=" * 60)
-                else:
-                    print("\n" + "=" * 60)
-                    print("✗ 日报发布失败")
-                    print("=" * 60)
-            else:
-                print("\n" + "=" * 60)
-                print("✗ CRM 登录失败")
-                print("=" * 60)
-        except Exception as e:
-            print(f"\n✗ CRM 发布过程出错: {e}")
-            import traceback
-            traceback.print_exc()
-        finally:
-            crm_service.close()
+        if entry['state'] == STATE_PUBLISHING:
+            print("⚠ 今日简报上次发布中断，结果未知；请到 CRM 确认后使用 python main.py publish-pending --force 重试")
+        elif not publish_outbox_entry(outbox, entry):
+            print("可稍后运行 python main.py publish-pending 仅重试发布步骤")
     else:
-        print("跳过 CRM 自动发布")
+        print("跳过 CRM 自动发布（稍后可运行 python main.py publish-pending 发布）")
+
+
+# 需要持有运行锁的子命令（None 为默认的完整流程）：会扫描仓库、调用 DeepSeek 或发布到 CRM
+LOCKED_COMMANDS = {None, "collect", "report", "brief", "publish", "publish-pending", "push"}
+
+
+def acquire_run_lock(run_lock: RunLock, wait: bool = False, timeout: float = None) -> bool:
+    """
+    获取日报流程运行锁：已有流程在运行时，wait 为 True 则等待其结束（之后各阶段直接复用其缓存结果），
+    否则打印正在运行的流程并返回 False
+    
+    Args:
+        run_lock: 运行锁
+        wait: 是否等待
+        timeout: 最长等待秒数，默认 config.RUN_LOCK_TIMEOUT
+    """
+    if run_lock.acquire(wait=False):
+        return True
+    holder = run_lock.holder() or {}
+    running = f"进程 {holder.get('pid', '?')}，{holder.get('started_at', '?')} 启动: {holder.get('command', '?')}"
+    if not wait:
+        print(f"✗ 另一个日报流程正在运行（{running}）")
+        print("  可使用 --wait 等待其结束后复用其结果")
+        return False
+    timeout = RUN_LOCK_TIMEOUT if timeout is None else timeout
+    print(f"另一个日报流程正在运行（{running}），等待其结束...")
+    with telemetry.span("run_lock.wait", CATEGORY_STAGE) as span:
+        acquired = run_lock.acquire(wait=True, timeout=timeout)
+        span['acquired'] = acquired
+    if not acquired:
+        print(f"✗ 等待 {timeout:.0f} 秒后该流程仍未结束，退出")
+        return False
+    print("前一个流程已结束，继续运行（未变化的阶段直接复用其缓存结果）")
+    return True
+
+
+def _stage_options(defaults: bool = True) -> argparse.ArgumentParser:
+    """
+    收集相关的选项（--no-prefilter、--refresh），供主命令和 collect/report/brief/push 子命令共用（parents），
+    既可写在子命令前也可写在子命令后。子命令上不设默认值（SUPPRESS），避免覆盖写在子命令前的取值
+    """
+    parser = argparse.ArgumentParser(add_help=False)
+    parser.add_argument(
+        "--no-prefilter", dest="prefilter", action="store_false", default=None if defaults else argparse.SUPPRESS,
+        help="关闭仓库活跃度预筛选，对所有仓库执行 git log（用于核对结果）",
+    )
+    parser.add_argument(
+        "--refresh", action="store_true", default=False if defaults else argparse.SUPPRESS,
+        help="忽略当天的阶段缓存，重新发现仓库、收集提交并生成日报和简报",
+    )
+    return parser
+
+
+def _lock_options(defaults: bool = True) -> argparse.ArgumentParser:
+    """运行锁选项（--wait、--lock-timeout），供主命令和需要运行锁的子命令共用，用法同 _stage_options"""
+    parser = argparse.ArgumentParser(add_help=False)
+    parser.add_argument(
+        "--wait", action="store_true", default=None if defaults else argparse.SUPPRESS,
+        help="已有日报流程在运行时等待其结束后继续（复用其缓存结果），默认立即退出（退出码 75）",
+    )
+    parser.add_argument(
+        "--lock-timeout", type=float, default=None if defaults else argparse.SUPPRESS,
+        help="--wait 时最长等待秒数，默认 config.RUN_LOCK_TIMEOUT",
+    )
+    return parser
+
+
+def main(argv=None) -> int:
+    """主函数"""
+    parser = argparse.ArgumentParser(description="自动化日报提交程序", parents=[_stage_options(), _lock_options()])
+    # 收集并写入缓存的子命令同时接受收集选项和运行锁选项
+    stage_parents = [_stage_options(defaults=False), _lock_options(defaults=False)]
+    lock_parents = [_lock_options(defaults=False)]
+    subparsers = parser.add_subparsers(dest="command")
+    subparsers.add_parser(
+        "collect", parents=stage_parents, help="只收集今日提交并写入缓存（不加载 DeepSeek/CRM 依赖）"
+    )
+    subparsers.add_parser(
+        "report", parents=stage_parents, help="生成日报（不调用 DeepSeek），仓库未变化时使用今日提交缓存"
+    )
+    subparsers.add_parser(
+        "brief", parents=stage_parents, help="生成简报并记录到发件箱（不发布），输入未变化时复用已生成的简报"
+    )
+    publish_parser = subparsers.add_parser("publish", parents=lock_parents, help="发布今日发件箱中的简报到 CRM")
+    publish_parser.add_argument(
+        "--force", action="store_true",
+        help="上次发布中断（结果未知）时仍然重试，可能导致重复发布",
+    )
+    pending_parser = subparsers.add_parser(
+        "publish-pending", parents=lock_parents, help="仅执行 CRM 发布步骤，发布发件箱中未发布的简报"
+    )
+    pending_parser.add_argument("--date", help="只发布指定日期的简报（YYYYMMDD）")
+    pending_parser.add_argument(
+        "--include-past", action="store_true",
+        help="也发布以前日期未发布的简报（CRM 日志没有日期字段，均作为今天的日志发布）",
+    )
+    pending_parser.add_argument(
+        "--force", action="store_true",
+        help="同时重试上次发布中断（结果未知）的简报，可能导致重复发布",
+    )
+    team_parser = subparsers.add_parser("team", help="生成团队汇总报告（按人员/仓库/日期/时段统计）")
+    team_parser.add_argument("--days", type=int, default=7, help="统计最近 N 天（含今天），默认 7")
+    team_parser.add_argument("--since", type=_parse_date, help="开始日期（YYYYMMDD），优先于 --days")
+    team_parser.add_argument("--until", type=_parse_date, help="结束日期（YYYYMMDD），默认今天")
+    team_parser.add_argument("--author", help="只统计该作者（Git user.name）的提交")
+    team_parser.add_argument("--mine", action="store_true", help="只统计本人的提交（当前 Git user.name）")
+    team_parser.add_argument("--no-merges", action="store_true", help="不统计合并提交")
+    rollup_parser = subparsers.add_parser(
+        "rollup", help="基于已保存的每日简报和提交缓存生成周报/月报/季报"
+    )
+    rollup_parser.add_argument(
+        "--period", choices=sorted(PERIOD_NAMES), default=PERIOD_WEEK, help="汇总周期，默认 week"
+    )
+    rollup_parser.add_argument("--date", type=_parse_date, help="周期内任意一天（YYYYMMDD），默认今天")
+    rollup_parser.add_argument("--since", type=_parse_date, help="自定义开始日期（YYYYMMDD），优先于 --period/--date")
+    rollup_parser.add_argument("--until", type=_parse_date, help="自定义结束日期（YYYYMMDD），需同时指定 --since，默认今天")
+    rollup_parser.add_argument("--no-llm", action="store_true", help="不调用 DeepSeek，只输出每日摘要和统计")
+    export_parser = subparsers.add_parser(
+        "export", help="将缓存的提交和结构化简报导出为 Parquet/JSON Lines（供看板等分析使用）"
+    )
+    export_parser.add_argument("--days", type=int, default=30, help="导出最近 N 天（含今天），默认 30")
+    export_parser.add_argument("--since", type=_parse_date, help="开始日期（YYYYMMDD），优先于 --days")
+    export_parser.add_argument("--until", type=_parse_date, help="结束日期（YYYYMMDD），默认今天")
+    export_parser.add_argument(
+        "--format", choices=[FORMAT_PARQUET, FORMAT_JSONL], default=FORMAT_PARQUET,
+        help="导出格式，parquet 需要安装 pyarrow（未安装时改为导出 JSON Lines）",
+    )
+    hooks_parser = subparsers.add_parser(
+        "hooks", help="为发现的仓库安装/卸载 post-commit 钩子，本地提交写入 spool，收集时无需逐仓库执行 git log"
+    )
+    hooks_parser.add_argument("action", choices=["install", "uninstall", "status"])
+    watch_parser = subparsers.add_parser(
+        "watch", help="常驻监听仓库引用变动，增量维护今日提交索引（日终生成日报时无需逐仓库执行 git log）"
+    )
+    watch_parser.add_argument(
+        "--backend", choices=["auto", "watchdog", "poll"], help="监听方式，默认 config.WATCH_BACKEND",
+    )
+    watch_parser.add_argument("--report-at", type=_parse_time, help="每天到点从索引生成日报（HH:MM）")
+    push_parser = subparsers.add_parser(
+        "push", parents=stage_parents, help="收集本机今日提交并推送到聚合服务（多机汇总）"
+    )
+    push_parser.add_argument("--full", action="store_true", help="忽略本地推送记录，重新推送今日全部提交")
+    aggregator_parser = subparsers.add_parser("aggregator", help="启动提交聚合服务，接收各机器推送的提交")
+    aggregator_parser.add_argument("--host", help="监听地址，默认 config.AGGREGATOR_HOST")
+    aggregator_parser.add_argument("--port", type=int, help="监听端口，默认 config.AGGREGATOR_PORT")
+    maintenance_parser = subparsers.add_parser(
+        "maintenance", help="为缺少或已过期 commit-graph 的仓库写入 commit-graph，加快按日期读取提交"
+    )
+    maintenance_parser.add_argument("--dry-run", action="store_true", help="只列出各仓库的 commit-graph 状态")
+    maintenance_parser.add_argument("--force", action="store_true", help="同时重写状态为最新的 commit-graph")
+    maintenance_parser.add_argument("--workers", type=int, help="同时写入的仓库数，默认 config.COMMIT_GRAPH_WORKERS")
+    maintenance_parser.add_argument("--repeat", type=int, default=1, help="测量 git log 耗时的重复次数，默认 1")
+    maintenance_parser.add_argument(
+        "--background", action="store_true", help="在后台进程中执行，输出写入 reports/runs/maintenance_*.log"
+    )
+    args = parser.parse_args(argv)
+    
+    run_lock = None
+    if args.command in LOCKED_COMMANDS:
+        run_lock = RunLock()
+        wait = RUN_LOCK_WAIT if args.wait is None else args.wait
+        if not acquire_run_lock(run_lock, wait, args.lock_timeout):
+            return RUN_LOCK_BUSY_EXIT
+    
+    try:
+        if args.command == "collect":
+            return 0 if run_collect(args.prefilter, args.refresh) else 1
+        if args.command == "report":
+            return 0 if run_report(args.prefilter, args.refresh) else 1
+        if args.command == "brief":
+            return 0 if run_brief(args.prefilter, args.refresh) else 1
+        if args.command == "publish":
+            return 0 if publish_pending(datetime.now().strftime("%Y%m%d"), args.force) else 1
+        if args.command == "publish-pending":
+            return 0 if publish_pending(args.date, args.force, args.include_past) else 1
+        if args.command == "rollup":
+            if args.until and not args.since:
+                parser.error("rollup: --until 需要同时指定 --since")
+            if args.since:
+                start_date, end_date = args.since, args.until or datetime.now()
+            else:
+                start_date, end_date = period_range(args.period, args.date)
+            return 0 if run_rollup(start_date, end_date, args.period, not args.no_llm) else 1
+        if args.command == "push":
+            return 0 if run_push(args.prefilter, args.refresh, args.full) else 1
+        if args.command == "aggregator":
+            return 0 if run_aggregator(args.host, args.port) else 1
+        if args.command == "watch":
+            return 0 if run_watch(args.prefilter, args.backend, args.report_at) else 1
+        if args.command == "hooks":
+            return 0 if run_hooks(args.action) else 1
+        if args.command == "maintenance":
+            return 0 if run_maintenance(args.force, args.workers, args.repeat, args.dry_run, args.background) else 1
+        if args.command == "export":
+            end_date = args.until or datetime.now()
+            start_date = args.since or end_date - timedelta(days=max(args.days, 1) - 1)
+            return 0 if run_export(start_date, end_date, args.format) else 1
+        if args.command == "team":
+            end_date = args.until or datetime.now()
+            start_date = args.since or end_date - timedelta(days=max(args.days, 1) - 1)
+            author = GitService().get_current_author() if args.mine else args.author
+            if args.mine and not author:
+                print("✗ 未获取到 Git user.name，无法按本人过滤")
+                return 1
+            return 0 if run_team_report(start_date, end_date, args.prefilter, author, args.no_merges) else 1
+        run_daily_report(args.prefilter, args.refresh, run_lock)
+        return 0
+    finally:
+        if run_lock is not None:
+            run_lock.release()
+        # 输出本次运行的耗时摘要，并导出 JSON 运行记录
+        export_telemetry()
 
 
 if __name__ == "__main__":
     try:
-        main()
+        sys.exit(main())
     except KeyboardInterrupt:
         print("\n程序被用户中断")
         sys.exit(0)
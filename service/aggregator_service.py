@@ -0,0 +1,361 @@
+"""
+多机提交汇总服务层 - 各机器上的采集端（CollectorAgent）把本机收集的提交按批压缩后推送到聚合服务（AggregatorServer），
+聚合服务按提交 hash 去重并按天保存，生成日报时读取合并后的当天提交。
+采集端推送某天的全部提交时（首次推送、--full 或本机已推送的提交被 amend/rebase 掉），聚合服务先删除该机器当天的旧记录再写入。
+
+传输格式：JSON {'machine', 'date', 'replace', 'fields': [...], 'rows': [[...], ...]}（字段名只出现一次），整体 gzip 压缩
+"""
+import gzip
+import hmac
+import json
+import os
+import platform
+import threading
+import urllib.error
+import urllib.request
+import zlib
+from datetime import datetime
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from typing import Dict, List, Optional, Tuple
+from urllib.parse import parse_qs, urlparse
+
+from config import (
+    AGGREGATOR_BATCH_SIZE,
+    AGGREGATOR_DIR_NAME,
+    AGGREGATOR_HOST,
+    AGGREGATOR_PORT,
+    AGGREGATOR_TIMEOUT,
+    AGGREGATOR_TOKEN,
+    AGGREGATOR_URL,
+    COMMIT_CACHE_DIR_NAME,
+    REPORT_SAVE_DIR,
+)
+from service.atomic_file import write_atomic
+from service.commit_cache import CommitCache
+
+COMMITS_PATH = '/api/commits'
+HEALTH_PATH = '/api/health'
+TOKEN_HEADER = 'X-Collector-Token'
+
+# 每条提交都有的字段（排在 rows 的最前面，缺失时传空字符串）；其余字段（如 also_in）按出现顺序追加，缺失时不传
+FIELDS = ['hash', 'author', 'date', 'message', 'body', 'repo']
+
+# 单次请求体上限（解压前/解压后）
+MAX_BODY_BYTES = 16 * 1024 * 1024
+
+
+def _columns(commits: List[Dict], exclude: Tuple[str, ...] = ()) -> List[str]:
+    """提交字段的并集：FIELDS 在前，其余字段按首次出现的顺序追加"""
+    columns = list(FIELDS)
+    for commit in commits:
+        columns.extend(key for key in commit if key not in columns and key not in exclude)
+    return columns
+
+
+def _pack(commits: List[Dict], fields: List[str]) -> List[list]:
+    return [[commit.get(field, '' if field in FIELDS else None) for field in fields] for commit in commits]
+
+
+def _unpack(fields: List[str], rows: List[list]) -> List[Dict]:
+    return [{field: value for field, value in zip(fields, row) if value is not None} for row in rows]
+
+
+def encode_batch(commits: List[Dict], machine: str, date: str, replace: bool = False) -> bytes:
+    """
+    把一批提交编码为 gzip 压缩的紧凑 JSON
+
+    Args:
+        replace: 先删除该机器当天已有的提交（全量推送的第一批）
+    """
+    fields = _columns(commits, exclude=('machine',))
+    payload = {
+        'machine': machine,
+        'date': date,
+        'replace': replace,
+        'fields': fields,
+        'rows': _pack(commits, fields),
+    }
+    return gzip.compress(json.dumps(payload, ensure_ascii=False, separators=(',', ':')).encode('utf-8'))
+
+
+def _valid_date(date: str) -> bool:
+    try:
+        datetime.strptime(date, '%Y%m%d')
+        return True
+    except ValueError:
+        return False
+
+
+def decode_batch(data: bytes) -> Tuple[str, str, List[Dict], bool]:
+    """
+    解码一批提交
+
+    Returns:
+        (machine, date, commits, replace)
+
+    Raises:
+        ValueError: 格式不正确
+    """
+    try:
+        # 限制解压后的大小，避免压缩炸弹
+        raw = zlib.decompressobj(16 + zlib.MAX_WBITS).decompress(data, MAX_BODY_BYTES + 1)
+        if len(raw) > MAX_BODY_BYTES:
+            raise ValueError("解压后超过大小上限")
+        payload = json.loads(raw)
+        commits = _unpack(payload['fields'], payload['rows'])
+        return str(payload['machine']), str(payload['date']), commits, bool(payload.get('replace'))
+    except (zlib.error, KeyError, TypeError, ValueError) as e:
+        raise ValueError(f"提交批次格式不正确: {e}")
+
+
+class AggregateStore:
+    """
+    按天保存各机器上报的提交，持久化为 REPORT_SAVE_DIR/aggregate/commits_YYYYMMDD.jsonl；
+    每台机器的记录分开保存（便于全量推送时只替换该机器的记录），读取时按 hash 去重，保留首次上报的机器
+    """
+
+    def __init__(self, store_dir: str = None):
+        self.cache = CommitCache(store_dir or os.path.join(REPORT_SAVE_DIR, AGGREGATOR_DIR_NAME))
+        self.days: Dict[str, Dict[Tuple[str, str], Dict]] = {}
+        self.lock = threading.Lock()
+
+    def _day(self, date: str) -> Dict[Tuple[str, str], Dict]:
+        """当天的记录 {(machine, hash): commit}，按上报顺序排列"""
+        if date not in self.days:
+            commits = self.cache.load(datetime.strptime(date, '%Y%m%d')) or []
+            self.days[date] = {(c.get('machine', ''), c['hash']): c for c in commits}
+        return self.days[date]
+
+    def add(self, date: str, commits: List[Dict], machine: str, replace: bool = False) -> Tuple[int, int, int]:
+        """
+        加入一批提交
+
+        Args:
+            replace: 先删除该机器当天已有的记录（全量推送时，被 amend/rebase 掉的旧提交随之移除）
+
+        Returns:
+            (新加入数, 重复数, 移除数)，均按合并后的提交（hash）计数
+        """
+        with self.lock:
+            day = self._day(date)
+            before = {key[1] for key in day}
+            if replace:
+                for key in [key for key in day if key[0] == machine]:
+                    del day[key]
+            after = {key[1] for key in day}
+            accepted = 0
+            for commit in commits:
+                if not commit.get('hash'):
+                    continue
+                if commit['hash'] not in before and commit['hash'] not in after:
+                    accepted += 1
+                after.add(commit['hash'])
+                day[(machine, commit['hash'])] = dict(commit, machine=machine)
+            if replace or commits:
+                self.cache.save(datetime.strptime(date, '%Y%m%d'), list(day.values()))
+            return accepted, len(commits) - accepted, len(before - after)
+
+    def get(self, date: str) -> List[Dict]:
+        """当天合并后的提交（按 hash 去重，按时间倒序）"""
+        with self.lock:
+            merged = {}
+            for commit in self._day(date).values():
+                merged.setdefault(commit['hash'], commit)
+            return sorted(merged.values(), key=lambda c: c.get('date', ''), reverse=True)
+
+
+class AggregatorHandler(BaseHTTPRequestHandler):
+    """聚合服务请求处理：POST /api/commits 上报一批提交，GET /api/commits?date=YYYYMMDD 读取合并后的当天提交"""
+
+    server_version = 'CommitAggregator/1.0'
+
+    def log_message(self, format, *args):
+        pass
+
+    def _send_json(self, status: int, payload, compress: bool = False):
+        data = json.dumps(payload, ensure_ascii=False, separators=(',', ':')).encode('utf-8')
+        self.send_response(status)
+        self.send_header('Content-Type', 'application/json; charset=utf-8')
+        if compress:
+            data = gzip.compress(data)
+            self.send_header('Content-Encoding', 'gzip')
+        self.send_header('Content-Length', str(len(data)))
+        self.end_headers()
+        self.wfile.write(data)
+
+    def _authorized(self) -> bool:
+        token = self.server.token
+        return not token or hmac.compare_digest(self.headers.get(TOKEN_HEADER, ''), token)
+
+    def do_GET(self):
+        parsed = urlparse(self.path)
+        if parsed.path == HEALTH_PATH:
+            self._send_json(200, {'ok': True})
+            return
+        if parsed.path != COMMITS_PATH:
+            self._send_json(404, {'error': 'not found'})
+            return
+        if not self._authorized():
+            self._send_json(403, {'error': '令牌无效'})
+            return
+        date = parse_qs(parsed.query).get('date', [''])[0]
+        if not _valid_date(date):
+            self._send_json(400, {'error': '日期格式应为 YYYYMMDD'})
+            return
+        commits = self.server.store.get(date)
+        fields = _columns(commits)
+        self._send_json(200, {
+            'date': date,
+            'fields': fields,
+            'rows': _pack(commits, fields),
+        }, compress='gzip' in self.headers.get('Accept-Encoding', ''))
+
+    def do_POST(self):
+        if urlparse(self.path).path != COMMITS_PATH:
+            self._send_json(404, {'error': 'not found'})
+            return
+        if not self._authorized():
+            self._send_json(403, {'error': '令牌无效'})
+            return
+        length = int(self.headers.get('Content-Length') or 0)
+        if length > MAX_BODY_BYTES:
+            self._send_json(413, {'error': '请求体过大'})
+            return
+        try:
+            machine, date, commits, replace = decode_batch(self.rfile.read(length))
+        except ValueError as e:
+            self._send_json(400, {'error': str(e)})
+            return
+        if not _valid_date(date):
+            self._send_json(400, {'error': '日期格式应为 YYYYMMDD'})
+            return
+        accepted, duplicates, removed = self.server.store.add(date, commits, machine, replace)
+        self._send_json(200, {'accepted': accepted, 'duplicates': duplicates, 'removed': removed})
+
+
+class AggregatorServer(ThreadingHTTPServer):
+    """提交聚合服务"""
+
+    daemon_threads = True
+
+    def __init__(self, host: str = None, port: int = None, store: AggregateStore = None, token: str = None):
+        """
+        Args:
+            host/port: 监听地址，默认 config.AGGREGATOR_HOST / AGGREGATOR_PORT（port 为 0 时随机端口）
+            store: 合并提交存储，默认 REPORT_SAVE_DIR/aggregate
+            token: 共享令牌，默认 config.AGGREGATOR_TOKEN（为空时不校验）
+        """
+        super().__init__((host or AGGREGATOR_HOST, AGGREGATOR_PORT if port is None else port), AggregatorHandler)
+        self.store = store or AggregateStore()
+        self.token = AGGREGATOR_TOKEN if token is None else token
+
+    @property
+    def url(self) -> str:
+        host, port = self.server_address[:2]
+        return f'http://{host}:{port}'
+
+    def start(self) -> 'AggregatorServer':
+        """在后台线程中启动服务"""
+        threading.Thread(target=self.serve_forever, daemon=True).start()
+        return self
+
+    def stop(self):
+        self.shutdown()
+        self.server_close()
+
+
+class CollectorAgent:
+    """采集端：把本机收集的提交增量推送到聚合服务，并读取合并后的当天提交"""
+
+    def __init__(self, url: str = None, token: str = None, machine: str = None, state_dir: str = None,
+                 batch_size: int = None):
+        """
+        Args:
+            url: 聚合服务地址，默认 config.AGGREGATOR_URL
+            token: 共享令牌，默认 config.AGGREGATOR_TOKEN
+            machine: 本机名称，默认主机名
+            state_dir: 记录已推送提交的目录，默认 REPORT_SAVE_DIR/cache
+            batch_size: 每批推送的提交数，默认 config.AGGREGATOR_BATCH_SIZE
+        """
+        self.url = (url or AGGREGATOR_URL).rstrip('/')
+        self.token = AGGREGATOR_TOKEN if token is None else token
+        self.machine = machine or platform.node() or 'unknown'
+        self.state_dir = state_dir or os.path.join(REPORT_SAVE_DIR, COMMIT_CACHE_DIR_NAME)
+        self.batch_size = batch_size or AGGREGATOR_BATCH_SIZE
+        # 本次运行的网络流量（压缩后字节数），便于核对批量压缩的效果
+        self.bytes_sent = 0
+
+    def _state_path(self, date: str) -> str:
+        return os.path.join(self.state_dir, f"pushed_{date}.json")
+
+    def _load_pushed(self, date: str) -> Optional[set]:
+        """本机当天已推送的提交 hash，没有推送记录时返回 None"""
+        try:
+            with open(self._state_path(date), 'r', encoding='utf-8') as f:
+                return set(json.load(f))
+        except (OSError, ValueError):
+            return None
+
+    def _request(self, method: str, path: str, data: bytes = None) -> Dict:
+        headers = {'Accept-Encoding': 'gzip'}
+        if self.token:
+            headers[TOKEN_HEADER] = self.token
+        if data is not None:
+            headers['Content-Type'] = 'application/json'
+            headers['Content-Encoding'] = 'gzip'
+        request = urllib.request.Request(self.url + path, data=data, headers=headers, method=method)
+        try:
+            with urllib.request.urlopen(request, timeout=AGGREGATOR_TIMEOUT) as response:
+                body = response.read()
+                if response.headers.get('Content-Encoding') == 'gzip':
+                    body = gzip.decompress(body)
+        except urllib.error.HTTPError as e:
+            raise RuntimeError(f"聚合服务返回 {e.code}: {e.read().decode('utf-8', 'replace')}")
+        except (urllib.error.URLError, OSError) as e:
+            raise RuntimeError(f"无法连接聚合服务 {self.url}: {e}")
+        return json.loads(body)
+
+    def push(self, commits: List[Dict], date: datetime = None, full: bool = False) -> Dict[str, int]:
+        """
+        推送尚未推送过的提交（按 batch_size 分批，gzip 压缩），推送成功的提交记录到本地，下次不再发送。
+        当天首次推送、full 或已推送的提交不在本次收集结果中（被 amend/rebase 掉）时推送全部提交，
+        聚合服务用它替换本机当天的记录
+
+        Args:
+            commits: 本机收集的提交
+            date: 提交所属日期，默认今天
+            full: 忽略本地推送记录，重新推送全部提交（聚合服务数据丢失时使用）
+
+        Returns:
+            {'sent', 'accepted', 'duplicates', 'removed', 'batches'}
+
+        Raises:
+            RuntimeError: 聚合服务不可用或拒绝请求
+        """
+        date = (date or datetime.now()).strftime('%Y%m%d')
+        pushed = None if full else self._load_pushed(date)
+        commits = [c for c in commits if c.get('hash')]
+        replace = pushed is None or not pushed <= {c['hash'] for c in commits}
+        if replace:
+            pushed = set()
+        pending = [c for c in commits if c['hash'] not in pushed]
+        result = {'sent': len(pending), 'accepted': 0, 'duplicates': 0, 'removed': 0, 'batches': 0}
+        # 全量推送时即使没有提交也要发送一批，清除本机当天的旧记录
+        starts = range(0, len(pending) or int(replace), self.batch_size)
+        for start in starts:
+            batch = pending[start:start + self.batch_size]
+            data = encode_batch(batch, self.machine, date, replace=replace and start == 0)
+            self.bytes_sent += len(data)
+            response = self._request('POST', COMMITS_PATH, data)
+            for key in ('accepted', 'duplicates', 'removed'):
+                result[key] += response.get(key, 0)
+            result['batches'] += 1
+            pushed.update(c['hash'] for c in batch)
+            write_atomic(self._state_path(date), json.dumps(sorted(pushed)), keep_versions=0)
+        return result
+
+    def fetch(self, date: datetime = None) -> List[Dict]:
+        """读取聚合服务上合并后的当天提交（含 machine 字段）"""
+        date = (date or datetime.now()).strftime('%Y%m%d')
+        payload = self._request('GET', f"{COMMITS_PATH}?date={date}")
+        return _unpack(payload['fields'], payload['rows'])
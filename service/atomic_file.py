@@ -0,0 +1,137 @@
+"""
+原子文件写入 - 先写同目录临时文件并 fsync，再 os.replace 原子替换目标文件：
+进程崩溃时目标文件要么是旧内容要么是新内容，不会出现写了一半的报告；
+内容哈希未变化时跳过写入（不改动 mtime，避免触发文件同步）；可选保留被覆盖的历史版本
+"""
+import hashlib
+import os
+import shutil
+import sys
+from datetime import datetime
+from typing import Optional, Tuple, Union
+
+from config import REPORT_KEEP_VERSIONS, REPORT_VERSIONS_DIR_NAME
+
+
+def content_hash(data: bytes) -> str:
+    return hashlib.sha256(data).hexdigest()
+
+
+def _file_hash(path: str) -> Optional[str]:
+    """已有文件的内容哈希，文件不存在时返回 None"""
+    try:
+        with open(path, 'rb') as f:
+            return content_hash(f.read())
+    except OSError:
+        return None
+
+
+def _create_temp(path: str, dir_path: str) -> Tuple[int, str]:
+    """
+    在目标目录创建独占的临时文件，返回 (fd, 路径)；
+    以 0666 创建由内核套用当前 umask，与直接 open() 新建的文件权限一致（不读写进程 umask，线程安全）
+    """
+    flags = os.O_WRONLY | os.O_CREAT | os.O_EXCL | getattr(os, 'O_BINARY', 0)
+    while True:
+        tmp_path = os.path.join(dir_path, f".{os.path.basename(path)}.{os.urandom(4).hex()}.tmp")
+        try:
+            return os.open(tmp_path, flags, 0o666), tmp_path
+        except FileExistsError:
+            continue
+
+
+def _fsync_dir(dir_path: str):
+    """重命名后同步目录项（POSIX），保证断电后新文件名可见；Windows 不支持打开目录，跳过"""
+    if sys.platform == 'win32':
+        return
+    try:
+        fd = os.open(dir_path, os.O_RDONLY)
+    except OSError:
+        return
+    try:
+        os.fsync(fd)
+    except OSError:
+        pass
+    finally:
+        os.close(fd)
+
+
+def _save_version(path: str, keep: int, versions_dir: str = None):
+    """
+    把即将被覆盖的文件保存为历史版本：<目录>/history/<文件名>.<YYYYMMDD_HHMMSS>，
+    每个文件最多保留 keep 个版本（按时间淘汰最旧的）
+    """
+    dir_path, name = os.path.split(path)
+    versions_dir = versions_dir or os.path.join(dir_path, REPORT_VERSIONS_DIR_NAME)
+    os.makedirs(versions_dir, exist_ok=True)
+    stamp = datetime.fromtimestamp(os.stat(path).st_mtime).strftime('%Y%m%d_%H%M%S')
+    version_path = os.path.join(versions_dir, f"{name}.{stamp}")
+    if not os.path.exists(version_path):
+        try:
+            # 硬链接不复制数据；随后 os.replace 只替换目标文件名，历史版本保持旧内容
+            os.link(path, version_path)
+        except OSError:
+            shutil.copy2(path, version_path)
+
+    prefix = name + '.'
+    versions = sorted(v for v in os.listdir(versions_dir) if v.startswith(prefix))
+    for old in versions[:-keep]:
+        try:
+            os.remove(os.path.join(versions_dir, old))
+        except OSError:
+            pass
+
+
+def write_atomic(
+    path: str,
+    content: Union[str, bytes],
+    encoding: str = 'utf-8',
+    keep_versions: int = None,
+    versions_dir: str = None,
+) -> bool:
+    """
+    原子写入文件
+
+    Args:
+        path: 目标文件路径
+        content: 文本或字节内容
+        encoding: 文本编码
+        keep_versions: 覆盖已有文件时保留的历史版本数，默认 config.REPORT_KEEP_VERSIONS（0 表示不保留）
+        versions_dir: 历史版本目录，默认目标文件所在目录下的 history/
+
+    Returns:
+        是否实际写入（内容未变化时返回 False）
+    """
+    data = content.encode(encoding) if isinstance(content, str) else content
+    keep_versions = REPORT_KEEP_VERSIONS if keep_versions is None else keep_versions
+    dir_path = os.path.dirname(os.path.abspath(path))
+    os.makedirs(dir_path, exist_ok=True)
+
+    old_hash = _file_hash(path)
+    if old_hash == content_hash(data):
+        return False
+    try:
+        # 覆盖已有文件时沿用其权限
+        mode = os.stat(path).st_mode & 0o777
+    except OSError:
+        mode = None
+
+    fd, tmp_path = _create_temp(path, dir_path)
+    try:
+        with os.fdopen(fd, 'wb') as f:
+            f.write(data)
+            f.flush()
+            os.fsync(f.fileno())
+        if mode is not None:
+            os.chmod(tmp_path, mode)
+        if old_hash is not None and keep_versions > 0:
+            _save_version(path, keep_versions, versions_dir)
+        os.replace(tmp_path, path)
+    except BaseException:
+        try:
+            os.remove(tmp_path)
+        except OSError:
+            pass
+        raise
+    _fsync_dir(dir_path)
+    return True
@@ -0,0 +1,195 @@
+"""
+简报解析 - 结构化简报 Brief（上午/下午/学习三个字段），ReportService 生成、CRMService 与 CRMHttpService 共用
+
+简报只解析一次：优先按 JSON 解析（DeepSeek JSON 输出模式），否则按严格的三段式文本语法解析；
+发布前调用 validate() 校验，格式不合法时在启动浏览器之前就失败。
+"""
+import json
+import re
+from typing import Dict, Optional
+
+# 字段 key -> 简报中的章节标题（与 CRM 日志表单标签一致）
+SECTION_TITLES = {
+    'morning': '*上午时间安排与工作内容',
+    'afternoon': '*下午时间安排与工作内容',
+    'learning': '*今日计划的学习内容与进度',
+}
+
+# 章节标题行：可选的 * 前缀、标题、可选的【时间:内容】说明、可选的冒号及同行内容
+_HEADING_RE = re.compile(
+    r'^\*?\s*(上午时间安排与工作内容|下午时间安排与工作内容|今日计划的学习内容与进度)'
+    r'\s*(?:【[^】]*】)?\s*(?:[:：]\s*(.*))?$'
+)
+_HEADING_KEYS = {title.lstrip('*'): key for key, title in SECTION_TITLES.items()}
+
+# 模型有时会把 JSON 包在 ```json ... ``` 代码块中
+_JSON_FENCE_RE = re.compile(r'^```(?:json)?\s*(.*?)\s*```$', re.S)
+
+
+class BriefFormatError(ValueError):
+    """简报格式不合法"""
+
+
+def _normalize_section(value) -> str:
+    """JSON 中的字段可能是字符串或条目列表，统一为多行文本"""
+    if value is None:
+        return ''
+    if isinstance(value, (list, tuple)):
+        lines = [str(item).strip() for item in value if str(item).strip()]
+        if lines and not all(re.match(r'^\d+[.、]', line) for line in lines):
+            lines = [f"{i}. {line}" for i, line in enumerate(lines, 1)]
+        return '\n'.join(lines)
+    return str(value).strip()
+
+
+class Brief:
+    """结构化简报"""
+
+    def __init__(self, morning: str = '', afternoon: str = '', learning: str = '', raw: str = ''):
+        """
+        Args:
+            morning: 上午工作内容
+            afternoon: 下午工作内容
+            learning: 今日计划的学习内容与进度
+            raw: 原始文本（解析失败或生成失败时保存说明文字）
+        """
+        self.morning = morning
+        self.afternoon = afternoon
+        self.learning = learning
+        self.raw = raw
+
+    @classmethod
+    def from_json(cls, text: str) -> 'Brief':
+        """
+        按 JSON 解析简报：{"morning": ..., "afternoon": ..., "learning": ...}
+
+        Raises:
+            BriefFormatError: 不是合法的 JSON 对象
+        """
+        stripped = text.strip()
+        fenced = _JSON_FENCE_RE.match(stripped)
+        if fenced:
+            stripped = fenced.group(1)
+        try:
+            data = json.loads(stripped)
+        except ValueError as e:
+            raise BriefFormatError(f"简报不是合法的 JSON: {e}") from e
+        if not isinstance(data, dict):
+            raise BriefFormatError("简报 JSON 必须是对象")
+        unknown = set(data) - set(SECTION_TITLES)
+        if unknown:
+            raise BriefFormatError(f"简报 JSON 包含未知字段: {', '.join(sorted(unknown))}")
+        return cls(
+            morning=_normalize_section(data.get('morning')),
+            afternoon=_normalize_section(data.get('afternoon')),
+            learning=_normalize_section(data.get('learning')),
+            raw=text,
+        )
+
+    @classmethod
+    def from_text(cls, text: str) -> 'Brief':
+        """
+        按三段式文本语法解析简报：每段以章节标题行开头，标题行之前不允许有内容，标题不可重复
+
+        Raises:
+            BriefFormatError: 文本不符合语法
+        """
+        sections: Dict[str, list] = {}
+        current: Optional[str] = None
+        for lineno, line in enumerate(text.strip().split('\n'), 1):
+            line = line.strip()
+            if not line:
+                continue
+            heading = _HEADING_RE.match(line)
+            if heading:
+                current = _HEADING_KEYS[heading.group(1)]
+                if current in sections:
+                    raise BriefFormatError(f"第 {lineno} 行: 章节重复「{heading.group(1)}」")
+                sections[current] = []
+                if heading.group(2):
+                    sections[current].append(heading.group(2).strip())
+                continue
+            if line.startswith('*'):
+                raise BriefFormatError(f"第 {lineno} 行: 未知章节「{line}」")
+            if current is None:
+                raise BriefFormatError(f"第 {lineno} 行: 内容出现在章节标题之前")
+            sections[current].append(line)
+        if not sections:
+            raise BriefFormatError("简报中未找到任何章节标题")
+        return cls(
+            morning='\n'.join(sections.get('morning', [])),
+            afternoon='\n'.join(sections.get('afternoon', [])),
+            learning='\n'.join(sections.get('learning', [])),
+            raw=text,
+        )
+
+    @classmethod
+    def parse(cls, text: str) -> 'Brief':
+        """
+        解析简报：JSON 优先，其次三段式文本；都失败时返回仅包含原文的 Brief（validate 不通过）
+        """
+        stripped = (text or '').strip()
+        if stripped.startswith('{') or stripped.startswith('```'):
+            try:
+                return cls.from_json(stripped)
+            except BriefFormatError:
+                pass
+        try:
+            return cls.from_text(stripped)
+        except BriefFormatError:
+            return cls(raw=text or '')
+
+    @classmethod
+    def from_dict(cls, data: Dict) -> 'Brief':
+        return cls(
+            morning=data.get('morning', ''),
+            afternoon=data.get('afternoon', ''),
+            learning=data.get('learning', ''),
+            raw=data.get('raw', ''),
+        )
+
+    def to_dict(self) -> Dict[str, str]:
+        return {
+            'morning': self.morning,
+            'afternoon': self.afternoon,
+            'learning': self.learning,
+            'raw': self.raw,
+        }
+
+    def validate(self):
+        """
+        校验简报可以发布：上午、下午内容必须非空（学习内容可为空，发布时填写"无"）
+
+        Raises:
+            BriefFormatError: 缺少必填字段
+        """
+        missing = [SECTION_TITLES[key] for key in ('morning', 'afternoon') if not getattr(self, key).strip()]
+        if missing:
+            detail = f"（原文: {self.raw.strip()[:80]}）" if self.raw.strip() else ''
+            raise BriefFormatError(f"简报缺少内容: {', '.join(missing)}{detail}")
+
+    @property
+    def is_valid(self) -> bool:
+        try:
+            self.validate()
+        except BriefFormatError:
+            return False
+        return True
+
+    def to_text(self) -> str:
+        """渲染为三段式文本；无任何字段时返回原文"""
+        if not (self.morning or self.afternoon or self.learning):
+            return self.raw
+        parts = []
+        for key, title in SECTION_TITLES.items():
+            parts.append(title)
+            parts.append(getattr(self, key) or '无')
+            parts.append('')
+        return '\n'.join(parts).rstrip('\n') + '\n'
+
+    def __str__(self) -> str:
+        return self.to_text()
+
+    def __repr__(self) -> str:
+        return (f"Brief(morning={self.morning!r}, afternoon={self.afternoon!r}, "
+                f"learning={self.learning!r})")
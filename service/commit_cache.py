@@ -0,0 +1,63 @@
+"""
+提交缓存服务层 - 按日期保存收集到的提交记录（JSON Lines），周报/月报等汇总直接读取缓存，无需重新执行 git log
+"""
+import json
+import os
+from datetime import datetime, timedelta
+from typing import Dict, List, Optional
+
+from config import COMMIT_CACHE_DIR_NAME, REPORT_SAVE_DIR
+from service.atomic_file import write_atomic
+
+
+class CommitCache:
+    """每天一个文件：REPORT_SAVE_DIR/cache/commits_YYYYMMDD.jsonl，每行一条提交记录"""
+
+    def __init__(self, cache_dir: str = None):
+        """
+        Args:
+            cache_dir: 缓存目录，默认 REPORT_SAVE_DIR/cache
+        """
+        self.cache_dir = cache_dir or os.path.join(REPORT_SAVE_DIR, COMMIT_CACHE_DIR_NAME)
+
+    def path(self, date: datetime) -> str:
+        return os.path.join(self.cache_dir, f"commits_{date.strftime('%Y%m%d')}.jsonl")
+
+    def save(self, date: datetime, commits: List[Dict]) -> str:
+        """
+        保存指定日期的提交记录（原子覆盖当天已有缓存，内容未变化时不重写）
+
+        Returns:
+            缓存文件路径
+        """
+        path = self.path(date)
+        content = ''.join(json.dumps(commit, ensure_ascii=False) + '\n' for commit in commits)
+        write_atomic(path, content, keep_versions=0)
+        return path
+
+    def load(self, date: datetime) -> Optional[List[Dict]]:
+        """读取指定日期的提交记录，未缓存时返回 None（与「当天无提交」的空列表区分）"""
+        path = self.path(date)
+        if not os.path.exists(path):
+            return None
+        commits = []
+        with open(path, 'r', encoding='utf-8') as f:
+            for line in f:
+                line = line.strip()
+                if line:
+                    commits.append(json.loads(line))
+        return commits
+
+    def load_range(self, start_date: datetime, end_date: datetime) -> Dict[str, Optional[List[Dict]]]:
+        """
+        读取日期范围内（含两端）每天的缓存
+
+        Returns:
+            {YYYYMMDD: 提交列表或 None（未缓存）}，按日期顺序
+        """
+        result = {}
+        day = start_date
+        while day.date() <= end_date.date():
+            result[day.strftime('%Y%m%d')] = self.load(day)
+            day += timedelta(days=1)
+        return result
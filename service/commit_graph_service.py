@@ -0,0 +1,167 @@
+"""
+commit-graph 维护服务层 - 找出发现的仓库中缺少 commit-graph 或 commit-graph 已过期的对象库，
+以有限并发执行 git commit-graph write，并对比写入前后按日期读取提交（git log --since/--until）的耗时。
+commit-graph 带有提交的代数和提交时间，git log 按日期截止时无需逐个解析提交对象
+"""
+import json
+import os
+import subprocess
+import time
+from concurrent.futures import ThreadPoolExecutor
+from datetime import datetime
+from typing import Dict, List
+
+from config import COMMIT_CACHE_DIR_NAME, COMMIT_GRAPH_TIMEOUT, COMMIT_GRAPH_WORKERS, REPORT_SAVE_DIR
+from service.atomic_file import write_atomic
+from service.commit_spool import CLOCK_SLACK
+from service.git_service import GitService, git_executable
+from service.run_lock import FileLock
+from service.telemetry_service import telemetry, CATEGORY_REPO
+
+# commit-graph 状态
+GRAPH_MISSING = 'missing'
+GRAPH_STALE = 'stale'
+GRAPH_FRESH = 'fresh'
+
+GRAPH_STATUS_NAMES = {GRAPH_MISSING: '缺少', GRAPH_STALE: '已过期', GRAPH_FRESH: '最新'}
+
+
+class CommitGraphService:
+    """commit-graph 检查与写入（同一对象库的多个 worktree 只处理一次）"""
+
+    def __init__(self, git_service: GitService, workers: int = None, state_path: str = None):
+        """
+        Args:
+            git_service: 用于分组对象库、读取引用修改时间和测量 git log 耗时的 GitService
+            workers: 同时写入 commit-graph 的仓库数，默认 config.COMMIT_GRAPH_WORKERS
+            state_path: 记录各对象库最近一次写入时间的文件，默认 reports/cache/commit_graph.json
+        """
+        self.git_service = git_service
+        self.workers = max(1, COMMIT_GRAPH_WORKERS if workers is None else workers)
+        self.state_path = state_path or os.path.join(REPORT_SAVE_DIR, COMMIT_CACHE_DIR_NAME, 'commit_graph.json')
+
+    def written(self) -> Dict[str, float]:
+        """{公共 git 目录: 最近一次执行 commit-graph write 的时间戳}"""
+        try:
+            with open(self.state_path, 'r', encoding='utf-8') as f:
+                return json.load(f)
+        except (OSError, ValueError):
+            return {}
+
+    @staticmethod
+    def graph_mtime(common_dir: str) -> float:
+        """commit-graph（单文件或分层链）的修改时间，不存在时返回 0"""
+        info = os.path.join(common_dir, 'objects', 'info')
+        mtime = 0.0
+        for path in (os.path.join(info, 'commit-graph'), os.path.join(info, 'commit-graphs', 'commit-graph-chain')):
+            try:
+                mtime = max(mtime, os.stat(path).st_mtime)
+            except OSError:
+                continue
+        return mtime
+
+    def status(self, common_dir: str, checkouts: List[Dict], written: float = 0) -> str:
+        """
+        写入 commit-graph 之后引用又有变动（新提交、fetch 等）时视为过期；
+        没有新提交时 git 不会改写 commit-graph 文件，因此同时参考本服务记录的写入时间 written
+        """
+        mtime = self.graph_mtime(common_dir)
+        if not mtime:
+            return GRAPH_MISSING
+        activity = self.git_service.last_ref_activity(common_dir, [c['git_dir'] for c in checkouts])
+        return GRAPH_STALE if activity > max(mtime, written) + CLOCK_SLACK else GRAPH_FRESH
+
+    def scan(self, repo_paths: List[str]) -> List[Dict]:
+        """
+        检查各对象库的 commit-graph 状态
+
+        Returns:
+            [{'repo': 主检出路径, 'common_dir', 'checkouts', 'status'}, ...]
+        """
+        written = self.written()
+        return [
+            {'repo': checkouts[0]['path'], 'common_dir': common_dir, 'checkouts': checkouts,
+             'status': self.status(common_dir, checkouts, written.get(common_dir, 0))}
+            for common_dir, checkouts in self.git_service.group_by_object_store(repo_paths).items()
+        ]
+
+    def measure(self, repo_path: str, target_date: datetime = None, repeat: int = 1, warmup: bool = False) -> float:
+        """
+        按日期读取提交（与收集提交相同的 git log）的耗时，取 repeat 次中的最小值（秒）
+
+        Args:
+            warmup: 测量前先不计时执行一次，使对象库进入文件系统缓存
+        """
+        if warmup:
+            self.git_service._run_log(repo_path, target_date)
+        best = None
+        for _ in range(max(1, repeat)):
+            start = time.perf_counter()
+            self.git_service._run_log(repo_path, target_date)
+            elapsed = time.perf_counter() - start
+            best = elapsed if best is None else min(best, elapsed)
+        return best
+
+    @staticmethod
+    def write(repo_path: str):
+        """
+        写入 commit-graph（--split 增量追加一层，已有分层时只写入新提交）
+
+        Raises:
+            RuntimeError: git commit-graph write 失败
+            subprocess.TimeoutExpired: 超时
+        """
+        result = subprocess.run(
+            [git_executable(), 'commit-graph', 'write', '--reachable', '--split', '--no-progress'],
+            cwd=os.path.abspath(repo_path), capture_output=True, text=True,
+            encoding='utf-8', errors='replace', timeout=COMMIT_GRAPH_TIMEOUT,
+        )
+        if result.returncode != 0:
+            raise RuntimeError(result.stderr.strip() or f"退出码 {result.returncode}")
+
+    def _maintain_one(self, item: Dict, target_date: datetime, repeat: int) -> Dict:
+        repo = item['repo']
+        result = dict(item, before=None, after=None, write=None, error=None, written_at=None)
+        with telemetry.span('commit_graph.write', CATEGORY_REPO, repo=repo, status=item['status']) as span:
+            try:
+                # 写入时会读取所有提交，之后的测量处于热缓存；写入前先预热一次，前后对比才公平
+                result['before'] = self.measure(repo, target_date, repeat, warmup=True)
+                # 写入开始的时间：写入期间的引用变动仍会被视为过期
+                result['written_at'] = time.time()
+                start = time.perf_counter()
+                self.write(repo)
+                result['write'] = time.perf_counter() - start
+                result['after'] = self.measure(repo, target_date, repeat)
+                span['before'] = round(result['before'], 6)
+                span['after'] = round(result['after'], 6)
+            except subprocess.TimeoutExpired:
+                result['error'] = f"超时（{COMMIT_GRAPH_TIMEOUT} 秒）"
+            except (RuntimeError, OSError) as e:
+                result['error'] = str(e)
+            if result['error']:
+                span['error'] = result['error']
+        return result
+
+    def maintain(self, repo_paths: List[str], force: bool = False, target_date: datetime = None,
+                 repeat: int = 1) -> List[Dict]:
+        """
+        为缺少或已过期 commit-graph 的对象库写入 commit-graph，同时最多 workers 个仓库并发写入
+
+        Args:
+            repo_paths: 仓库路径
+            force: 是否也重写状态为最新的 commit-graph
+            target_date: 测量 git log 耗时使用的日期，默认今天
+            repeat: 每次测量重复次数（取最小值）
+
+        Returns:
+            处理过的对象库，在 scan 的结果上增加 before/after（写入前后 git log 耗时，秒）、write（写入耗时）、error
+        """
+        pending = [item for item in self.scan(repo_paths) if force or item['status'] != GRAPH_FRESH]
+        with ThreadPoolExecutor(max_workers=self.workers) as pool:
+            results = list(pool.map(lambda item: self._maintain_one(item, target_date, repeat), pending))
+        if results:
+            with FileLock(self.state_path + '.lock'):
+                written = self.written()
+                written.update({r['common_dir']: r['written_at'] for r in results if not r['error']})
+                write_atomic(self.state_path, json.dumps(written, ensure_ascii=False, indent=2), keep_versions=0)
+        return results
@@ -0,0 +1,249 @@
+"""
+提交 spool 服务层 - 可选地为仓库安装轻量的 post-commit / post-rewrite 钩子，每次本地提交时把提交元数据追加到
+REPORT_SAVE_DIR/spool/commits_YYYYMMDD.spool；收集提交时一次顺序读取当天的 spool，
+只对没有安装钩子、或引用有钩子之外的变动（pull/fetch/merge/reset 等）的仓库执行 git log 核对
+"""
+import json
+import os
+import stat
+import subprocess
+import time
+from datetime import datetime, timedelta
+from typing import Dict, List, Optional
+
+from config import REPORT_SAVE_DIR, SPOOL_DIR_NAME, SPOOL_KEEP_DAYS
+from service.atomic_file import write_atomic
+
+HOOK_BEGIN = '# >>> daily-report commit spool >>>'
+HOOK_END = '# <<< daily-report commit spool <<<'
+
+# 记录类型：C 提交，R 改写（amend/rebase，spool 中可能有已不可达的提交，需要 git log 核对）
+RECORD_COMMIT = 'C'
+RECORD_REWRITE = 'R'
+
+FIELD_SEP = '\x1f'
+RECORD_SEP = '\x1e'
+
+# 钩子在引用更新之后运行，记录的时间戳为整秒（向下取整），比较引用变动时间时允许 1 秒误差
+CLOCK_SLACK = 1.0
+
+# 已有钩子使用这些解释器时才插入记录片段，其他钩子（Python、Node 等）不修改
+SHELL_SHEBANGS = ('sh', 'bash', 'dash', 'zsh', 'ksh')
+
+POST_COMMIT_SNIPPET = """_dr_rec="$(git log -1 --date='format:%Y-%m-%d %H:%M:%S' --format='%H%x1f%an%x1f%ad%x1f%ct%x1f%s%x1f%b' 2>/dev/null)" && \\
+printf 'C\\037%s\\037%s\\037%s\\037%s\\036\\n' "$(date +%s)" "$_dr_store" "$(git rev-parse --show-toplevel 2>/dev/null)" "$_dr_rec" \\
+    >> "$_dr_spool/commits_$(date +%Y%m%d).spool" 2>/dev/null"""
+
+POST_REWRITE_SNIPPET = """printf 'R\\037%s\\037%s\\036\\n' "$(date +%s)" "$_dr_store" \\
+    >> "$_dr_spool/commits_$(date +%Y%m%d).spool" 2>/dev/null"""
+
+HOOK_SNIPPETS = {'post-commit': POST_COMMIT_SNIPPET, 'post-rewrite': POST_REWRITE_SNIPPET}
+
+
+def _sh_quote(value: str) -> str:
+    return "'" + value.replace("'", "'\\''") + "'"
+
+
+def _norm(path: str) -> str:
+    return os.path.normcase(os.path.realpath(path))
+
+
+class CommitSpool:
+    """提交 spool：钩子安装/卸载，以及按日期范围读取 spool 记录"""
+
+    def __init__(self, spool_dir: str = None):
+        """
+        Args:
+            spool_dir: spool 目录，默认 REPORT_SAVE_DIR/spool
+        """
+        self.spool_dir = os.path.abspath(spool_dir or os.path.join(REPORT_SAVE_DIR, SPOOL_DIR_NAME))
+        # 各对象库安装钩子的时间：安装之前的提交不在 spool 中，窗口开始早于安装时间时不能只读 spool
+        self.registry_path = os.path.join(self.spool_dir, 'hooks.json')
+
+    def path(self, date: datetime) -> str:
+        return os.path.join(self.spool_dir, f"commits_{date.strftime('%Y%m%d')}.spool")
+
+    def installed(self) -> Dict[str, float]:
+        """{公共 git 目录: 安装钩子的时间戳}"""
+        try:
+            with open(self.registry_path, 'r', encoding='utf-8') as f:
+                return json.load(f)
+        except (OSError, ValueError):
+            return {}
+
+    def _save_registry(self, registry: Dict[str, float]):
+        write_atomic(self.registry_path, json.dumps(registry, ensure_ascii=False, indent=2), keep_versions=0)
+
+    @staticmethod
+    def hooks_dir(repo_path: str, common_dir: str) -> Optional[str]:
+        """
+        仓库实际使用的钩子目录（考虑 core.hooksPath）；指向对象库之外的共享目录（如全局 hooksPath、
+        husky 等纳入版本管理的目录）时返回 None，不修改
+        """
+        from service.git_service import git_executable
+        result = subprocess.run(
+            [git_executable(), 'rev-parse', '--git-path', 'hooks'],
+            cwd=repo_path, capture_output=True, text=True, encoding='utf-8', errors='replace', timeout=10,
+        )
+        if result.returncode != 0 or not result.stdout.strip():
+            return None
+        hooks_dir = os.path.join(repo_path, result.stdout.strip())
+        if not _norm(hooks_dir).startswith(_norm(common_dir) + os.sep):
+            return None
+        return hooks_dir
+
+    def _hook_block(self, hook: str, common_dir: str) -> str:
+        return '\n'.join([
+            HOOK_BEGIN,
+            "# 由日报程序安装（python main.py hooks install），记录本次提交到日报 spool；卸载: python main.py hooks uninstall",
+            f"_dr_spool={_sh_quote(self.spool_dir)}",
+            f"_dr_store={_sh_quote(common_dir)}",
+            'mkdir -p "$_dr_spool" 2>/dev/null',
+            HOOK_SNIPPETS[hook],
+            HOOK_END,
+        ]) + '\n'
+
+    @staticmethod
+    def _strip_block(content: str) -> str:
+        """移除已有的 spool 片段"""
+        begin = content.find(HOOK_BEGIN)
+        if begin < 0:
+            return content
+        end = content.find(HOOK_END, begin)
+        end = len(content) if end < 0 else end + len(HOOK_END)
+        if content[end:end + 1] == '\n':
+            end += 1
+        return content[:begin] + content[end:]
+
+    def install(self, repo_path: str, common_dir: str) -> str:
+        """
+        为仓库安装（或更新）钩子片段，已有钩子时插入到 shebang 之后，不影响原有逻辑
+
+        Returns:
+            安装结果说明；跳过时以「跳过」开头
+        """
+        hooks_dir = self.hooks_dir(repo_path, common_dir)
+        if hooks_dir is None:
+            return "跳过: core.hooksPath 指向仓库之外的共享钩子目录"
+        # 先检查所有钩子，任一无法安装时都不修改，避免只装上一半
+        contents = {}
+        for hook in HOOK_SNIPPETS:
+            path = os.path.join(hooks_dir, hook)
+            block = self._hook_block(hook, common_dir)
+            if os.path.exists(path):
+                with open(path, 'r', encoding='utf-8', errors='replace') as f:
+                    content = self._strip_block(f.read())
+                first_line, _, rest = content.partition('\n')
+                interpreter = first_line[2:].strip().split()[-1:] if first_line.startswith('#!') else []
+                if not interpreter or os.path.basename(interpreter[0]) not in SHELL_SHEBANGS:
+                    return f"跳过: 已有非 shell 的 {hook} 钩子"
+                contents[path] = first_line + '\n' + block + rest
+            else:
+                contents[path] = '#!/bin/sh\n' + block
+        os.makedirs(hooks_dir, exist_ok=True)
+        for path, content in contents.items():
+            write_atomic(path, content, keep_versions=0)
+            os.chmod(path, os.stat(path).st_mode | stat.S_IXUSR | stat.S_IXGRP | stat.S_IXOTH)
+
+        registry = self.installed()
+        if common_dir not in registry:
+            registry[common_dir] = time.time()
+            self._save_registry(registry)
+        return "已安装"
+
+    def uninstall(self, repo_path: str, common_dir: str) -> bool:
+        """移除钩子片段；钩子只剩 shebang 时删除文件。返回是否移除了片段"""
+        removed = False
+        hooks_dir = self.hooks_dir(repo_path, common_dir)
+        for hook in HOOK_SNIPPETS if hooks_dir else ():
+            path = os.path.join(hooks_dir, hook)
+            if not os.path.exists(path):
+                continue
+            with open(path, 'r', encoding='utf-8', errors='replace') as f:
+                content = f.read()
+            stripped = self._strip_block(content)
+            if stripped == content:
+                continue
+            removed = True
+            if stripped.strip() in ('', '#!/bin/sh'):
+                os.remove(path)
+            else:
+                write_atomic(path, stripped, keep_versions=0)
+
+        registry = self.installed()
+        if registry.pop(common_dir, None) is not None:
+            self._save_registry(registry)
+        return removed
+
+    def prune(self, keep_days: int = None):
+        """删除早于 keep_days 天的 spool 文件"""
+        keep_days = SPOOL_KEEP_DAYS if keep_days is None else keep_days
+        cutoff = (datetime.now() - timedelta(days=keep_days)).strftime('%Y%m%d')
+        if not os.path.isdir(self.spool_dir):
+            return
+        for name in os.listdir(self.spool_dir):
+            if name.startswith('commits_') and name.endswith('.spool') and name[len('commits_'):-len('.spool')] < cutoff:
+                try:
+                    os.remove(os.path.join(self.spool_dir, name))
+                except OSError:
+                    pass
+
+    def read(self, start_date: datetime, end_date: datetime = None) -> Dict[str, Dict]:
+        """
+        顺序读取 start_date ~ end_date（默认今天）每天的 spool 文件
+
+        Returns:
+            {common_dir: {'last': 最近一条记录的时间戳, 'rewritten': 是否有改写记录,
+                          'records': [{'hash', 'checkout', 'author', 'date', 'committed', 'message', 'body'}, ...]}}
+        """
+        stores = {}
+        day = start_date
+        end_date = end_date or datetime.now()
+        while day.date() <= end_date.date():
+            try:
+                with open(self.path(day), 'r', encoding='utf-8', errors='replace') as f:
+                    content = f.read()
+            except OSError:
+                content = ''
+            for raw in content.split(RECORD_SEP):
+                parts = raw.lstrip('\n').split(FIELD_SEP, 9)
+                if len(parts) < 3 or not parts[1].isdigit():
+                    continue
+                store = stores.setdefault(parts[2], {'last': 0.0, 'rewritten': False, 'records': []})
+                store['last'] = max(store['last'], float(parts[1]))
+                if parts[0] == RECORD_REWRITE:
+                    store['rewritten'] = True
+                elif parts[0] == RECORD_COMMIT and len(parts) == 10 and parts[7].isdigit():
+                    store['records'].append({
+                        'hash': parts[4],
+                        'checkout': parts[3],
+                        'author': parts[5],
+                        'date': parts[6],
+                        'committed': int(parts[7]),
+                        'message': parts[8],
+                        'body': parts[9].strip(),
+                    })
+            day += timedelta(days=1)
+        return stores
+
+    @staticmethod
+    def select(store: Dict, checkouts: List[Dict], start_time: datetime, end_time: datetime) -> List[Dict]:
+        """
+        从一个对象库的 spool 记录中选出提交时间（committer date，与 git log --since/--until 一致）在窗口内的提交，
+        按提交所在的检出目录归属，同一提交只保留一条
+
+        Returns:
+            (检出目录, 记录) 列表，记录字段与 git log 解析结果相同
+        """
+        owners = {_norm(c['path']): c['path'] for c in checkouts}
+        primary = checkouts[0]['path']
+        since, until = start_time.timestamp(), end_time.timestamp()
+        seen = set()
+        selected = []
+        for record in store['records']:
+            if record['hash'] in seen or not since <= record['committed'] <= until:
+                continue
+            seen.add(record['hash'])
+            owner = owners.get(_norm(record['checkout']), primary) if record['checkout'] else primary
+            selected.append((owner, record))
+        return selected
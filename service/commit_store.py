@@ -0,0 +1,189 @@
+"""
+提交索引服务层 - 将提交记录建立按作者/仓库/日期/时段的索引，供日报与团队报告的多种视图直接查询，
+避免每个视图重新遍历整个提交列表
+"""
+from collections import defaultdict
+from typing import Dict, Iterable, List, Optional
+
+# 展示用的短 hash 长度（提交记录本身保存完整 hash）
+SHORT_HASH_LENGTH = 7
+
+
+class CommitStore:
+    """
+    带索引的提交集合
+
+    提交记录格式与 GitService 返回一致（author, date, message, body, hash, repo），
+    date 形如 'YYYY-MM-DD HH:MM:SS'。同一仓库的同一提交（repo + hash）只保存一次。
+
+    用法:
+        store = CommitStore(commits)
+        store.query(author='张三', day='2026-01-26')
+        store.query(repo='crm', hours=range(18, 24))
+    """
+
+    def __init__(self, commits: Iterable[Dict] = None):
+        self.commits: List[Dict] = []
+        self._keys = set()
+        self.by_author: Dict[str, List[int]] = defaultdict(list)
+        self.by_repo: Dict[str, List[int]] = defaultdict(list)
+        self.by_day: Dict[str, List[int]] = defaultdict(list)
+        self.by_hour: Dict[int, List[int]] = defaultdict(list)
+        if commits:
+            self.add(commits)
+
+    def __len__(self) -> int:
+        return len(self.commits)
+
+    @staticmethod
+    def day_of(commit: Dict) -> str:
+        """提交日期 YYYY-MM-DD"""
+        return commit.get('date', '')[:10]
+
+    @staticmethod
+    def short_hash(commit: Dict) -> str:
+        """展示用的短 hash"""
+        return commit.get('hash', '')[:SHORT_HASH_LENGTH]
+
+    @staticmethod
+    def hour_of(commit: Dict) -> Optional[int]:
+        """提交时刻的小时（0-23），日期格式不符时返回 None"""
+        try:
+            return int(commit.get('date', '')[11:13])
+        except ValueError:
+            return None
+
+    def add(self, commits: Iterable[Dict]) -> int:
+        """
+        加入提交并更新索引
+
+        Returns:
+            新加入的提交数（已存在的提交被忽略）
+        """
+        added = 0
+        for commit in commits:
+            key = (commit.get('repo', ''), commit.get('hash', ''))
+            if key[1] and key in self._keys:
+                continue
+            self._keys.add(key)
+            index = len(self.commits)
+            self.commits.append(commit)
+            self.by_author[commit.get('author', '未知')].append(index)
+            self.by_repo[commit.get('repo', '未知仓库')].append(index)
+            self.by_day[self.day_of(commit)].append(index)
+            hour = self.hour_of(commit)
+            if hour is not None:
+                self.by_hour[hour].append(index)
+            added += 1
+        return added
+
+    def authors(self) -> List[str]:
+        return sorted(self.by_author)
+
+    def repos(self) -> List[str]:
+        return sorted(self.by_repo)
+
+    def days(self) -> List[str]:
+        return sorted(d for d in self.by_day if d)
+
+    def query(
+        self,
+        author: str = None,
+        repo: str = None,
+        day: str = None,
+        since: str = None,
+        until: str = None,
+        hours: Iterable[int] = None,
+    ) -> List[Dict]:
+        """
+        按条件查询提交（条件之间为「且」），结果按时间倒序
+
+        Args:
+            author: 作者
+            repo: 仓库名
+            day: 日期 YYYY-MM-DD
+            since/until: 日期范围 YYYY-MM-DD（含两端）
+            hours: 小时集合，如 range(18, 24) 表示晚间提交
+        """
+        candidates = []
+        if author is not None:
+            candidates.append(self.by_author.get(author, []))
+        if repo is not None:
+            candidates.append(self.by_repo.get(repo, []))
+        if day is not None:
+            candidates.append(self.by_day.get(day, []))
+        if since is not None or until is not None:
+            candidates.append([
+                i for d in self.days()
+                if (since is None or d >= since) and (until is None or d <= until)
+                for i in self.by_day[d]
+            ])
+        if hours is not None:
+            candidates.append([i for h in set(hours) for i in self.by_hour.get(h, [])])
+
+        if candidates:
+            # 从最小的候选集开始求交集
+            candidates.sort(key=len)
+            selected = set(candidates[0])
+            for other in candidates[1:]:
+                selected.intersection_update(other)
+            result = [self.commits[i] for i in selected]
+        else:
+            result = list(self.commits)
+        result.sort(key=lambda c: c.get('date', ''), reverse=True)
+        return result
+
+    def count(self, **conditions) -> int:
+        """按条件计数（无条件时直接读索引长度）"""
+        if not conditions:
+            return len(self.commits)
+        if len(conditions) == 1:
+            (name, value), = conditions.items()
+            index = {'author': self.by_author, 'repo': self.by_repo, 'day': self.by_day}.get(name)
+            if index is not None:
+                return len(index.get(value, []))
+        return len(self.query(**conditions))
+
+    def group(self, field: str, within: List[Dict] = None) -> Dict[str, List[Dict]]:
+        """
+        按 author / repo / day 分组（键排序），组内按时间倒序
+
+        Args:
+            field: 分组字段
+            within: 只在这部分提交中分组（默认全部）
+        """
+        if within is None:
+            index = {'author': self.by_author, 'repo': self.by_repo, 'day': self.by_day}[field]
+            groups = {key: [self.commits[i] for i in index[key]] for key in sorted(index)}
+        else:
+            key_of = {
+                'author': lambda c: c.get('author', '未知'),
+                'repo': lambda c: c.get('repo', '未知仓库'),
+                'day': self.day_of,
+            }[field]
+            groups = defaultdict(list)
+            for commit in within:
+                groups[key_of(commit)].append(commit)
+            groups = {key: groups[key] for key in sorted(groups)}
+        for commits in groups.values():
+            commits.sort(key=lambda c: c.get('date', ''), reverse=True)
+        return groups
+
+    def stats(self, commits: List[Dict] = None) -> Dict:
+        """提交数、参与人数、涉及仓库数、活跃天数、首末提交时间"""
+        if commits is None:
+            commits = self.commits
+            authors, repos, days = len(self.by_author), len(self.by_repo), len(self.days())
+        else:
+            authors = len({c.get('author', '未知') for c in commits})
+            repos = len({c.get('repo', '未知仓库') for c in commits})
+            days = len({self.day_of(c) for c in commits})
+        dates = [c.get('date', '') for c in commits if c.get('date')]
+        return {
+            'commits': len(commits),
+            'authors': authors,
+            'repos': repos,
+            'days': days,
+            'first': min(dates) if dates else '',
+            'last': max(dates) if dates else '',
+        }
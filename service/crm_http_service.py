@@ -0,0 +1,321 @@
+"""
+CRM HTTP 发布服务层 - 不启动浏览器，直接通过 HTTP 会话登录并提交日报表单
+（与 CRMService 接口一致：login / publish_report / close，提交前失败时由调用方回退到 Playwright）
+"""
+from html.parser import HTMLParser
+from typing import Dict, List, Optional, Union
+from urllib.parse import urljoin, urlparse
+
+import requests
+from requests.adapters import HTTPAdapter
+from urllib3.exceptions import NewConnectionError
+
+from service.brief_parser import Brief, BriefFormatError
+
+# 工作汇报页面的相对路径（与 CRMService 保持一致）
+WORK_REPORT_PATH = "index.php?pageto_module=CooperativeWork&pageto_action=index"
+
+# 日志表单中与简报三个字段对应的 textarea name，其余日志字段（KEEP_FIELDS 除外）统一填写"无"
+LOG_FIELD_SECTIONS = {
+    'worksummary': 'morning',
+    'workfld_21': 'afternoon',
+    'workexperience': 'learning',
+}
+
+# 保留页面原值、不填写"无"的日志字段（明日工作计划，与 CRMService 跳过的字段一致）
+KEEP_FIELDS = ('workplan',)
+
+# 发布成功的页面提示
+PUBLISH_SUCCESS_MARKERS = ('发布成功', '提交成功', '保存成功')
+
+
+class _FormParser(HTMLParser):
+    """
+    收集页面中所有 form 及其 input/textarea/select 字段；
+    checkbox/radio 记录是否 checked，select 的值为选中的 option（无选中项时为第一个，与浏览器一致）
+    """
+
+    def __init__(self):
+        super().__init__(convert_charrefs=True)
+        self.forms: List[Dict] = []
+        self._form: Optional[Dict] = None
+        self._textarea: Optional[Dict] = None
+        self._select: Optional[Dict] = None
+        self._option: Optional[Dict] = None
+
+    def handle_starttag(self, tag, attrs):
+        attrs = dict(attrs)
+        if tag == 'form':
+            self._form = {
+                'id': attrs.get('id') or '',
+                'action': attrs.get('action') or '',
+                'method': (attrs.get('method') or 'get').lower(),
+                'fields': [],
+            }
+            self.forms.append(self._form)
+        elif self._form is None:
+            return
+        elif tag == 'input':
+            self._form['fields'].append({
+                'tag': 'input',
+                'type': (attrs.get('type') or 'text').lower(),
+                'name': attrs.get('name') or '',
+                'id': attrs.get('id') or '',
+                'value': attrs.get('value') or '',
+                'checked': 'checked' in attrs,
+            })
+        elif tag == 'textarea':
+            self._textarea = {
+                'tag': 'textarea',
+                'type': 'textarea',
+                'name': attrs.get('name') or '',
+                'id': attrs.get('id') or '',
+                'value': '',
+            }
+            self._form['fields'].append(self._textarea)
+        elif tag == 'select':
+            self._select = {
+                'tag': 'select',
+                'type': 'select',
+                'name': attrs.get('name') or '',
+                'id': attrs.get('id') or '',
+                'value': '',
+                'options': [],
+            }
+            self._form['fields'].append(self._select)
+        elif tag == 'option' and self._select is not None:
+            # 没有 value 属性的 option 以其文本作为值
+            self._option = {
+                'value': attrs.get('value'),
+                'text': '',
+                'selected': 'selected' in attrs,
+            }
+            self._select['options'].append(self._option)
+
+    def handle_endtag(self, tag):
+        if tag == 'form':
+            self._form = None
+        elif tag == 'textarea':
+            self._textarea = None
+        elif tag == 'option':
+            self._option = None
+        elif tag == 'select' and self._select is not None:
+            options = self._select['options']
+            chosen = next((o for o in options if o['selected']), options[0] if options else None)
+            if chosen is not None:
+                self._select['value'] = chosen['text'].strip() if chosen['value'] is None else chosen['value']
+            self._select = None
+            self._option = None
+
+    def handle_data(self, data):
+        if self._textarea is not None:
+            self._textarea['value'] += data
+        elif self._option is not None:
+            self._option['text'] += data
+
+
+def parse_forms(html: str) -> List[Dict]:
+    """解析 HTML 中的表单"""
+    parser = _FormParser()
+    parser.feed(html)
+    parser.close()
+    return parser.forms
+
+
+def _connect_failed(error: requests.RequestException) -> bool:
+    """请求是否在建立连接阶段就失败（连接超时、拒绝连接、域名解析失败），此时请求尚未发出"""
+    if isinstance(error, requests.ConnectTimeout):
+        return True
+    if not isinstance(error, requests.ConnectionError):
+        return False
+    reason = error.args[0] if error.args else None
+    return isinstance(getattr(reason, 'reason', reason), NewConnectionError)
+
+
+class CRMHttpService:
+    """CRM HTTP 发布服务类（复用连接池的 requests.Session）"""
+
+    def __init__(self, crm_url: str, username: str, password: str, timeout: float = 15):
+        """
+        初始化 CRM HTTP 服务
+
+        Args:
+            crm_url: CRM 登录页面地址
+            username: 用户名
+            password: 密码
+            timeout: 单次 HTTP 请求超时（秒）
+        """
+        self.crm_url = crm_url
+        self.username = username
+        self.password = password
+        self.timeout = timeout
+        self.session: Optional[requests.Session] = None
+        self.work_report_url: Optional[str] = None
+        self._work_report_html = ''
+
+    def _session_or_new(self) -> requests.Session:
+        if self.session is None:
+            session = requests.Session()
+            adapter = HTTPAdapter(pool_connections=1, pool_maxsize=4, max_retries=1)
+            session.mount('http://', adapter)
+            session.mount('https://', adapter)
+            self.session = session
+        return self.session
+
+    def _base_url(self, url: str) -> str:
+        parsed = urlparse(url)
+        path = parsed.path if parsed.path.endswith('/') else parsed.path.rsplit('/', 1)[0] + '/'
+        return f"{parsed.scheme}://{parsed.netloc}{path}"
+
+    def login(self) -> bool:
+        """
+        登录 CRM 系统，并预先加载工作汇报页面
+
+        Returns:
+            登录是否成功
+        """
+        try:
+            session = self._session_or_new()
+            print(f"正在访问 CRM 登录页面 (HTTP): {self.crm_url}")
+            resp = session.get(self.crm_url, timeout=self.timeout)
+            resp.raise_for_status()
+
+            # 找到包含密码框的登录表单
+            login_form = None
+            for form in parse_forms(resp.text):
+                if any(f['type'] == 'password' for f in form['fields']):
+                    login_form = form
+                    break
+            if login_form is None:
+                print("  ✗ 未找到登录表单")
+                return False
+
+            payload = {}
+            username_field = None
+            for field in login_form['fields']:
+                if not field['name']:
+                    continue
+                if field['type'] == 'password':
+                    payload[field['name']] = self.password
+                elif field['name'] == 'login_user_name' or (
+                    username_field is None and field['type'] == 'text'
+                ):
+                    username_field = field['name']
+                elif field['type'] not in ('submit', 'button'):
+                    payload[field['name']] = field['value']
+            if username_field is None:
+                print("  ✗ 未找到用户名输入框")
+                return False
+            payload[username_field] = self.username
+
+            action_url = urljoin(resp.url, login_form['action'] or resp.url)
+            resp = session.post(action_url, data=payload, timeout=self.timeout)
+            resp.raise_for_status()
+
+            # 登录后页面仍有密码框，视为登录失败
+            if any(
+                f['type'] == 'password'
+                for form in parse_forms(resp.text)
+                for f in form['fields']
+            ):
+                print("  ✗ 登录失败（返回页面仍为登录表单）")
+                return False
+            print(f"  ✓ 登录成功，当前页面 URL: {resp.url}")
+
+            # 直接访问工作汇报页面
+            self.work_report_url = urljoin(self._base_url(resp.url), WORK_REPORT_PATH)
+            resp = session.get(self.work_report_url, timeout=self.timeout)
+            resp.raise_for_status()
+            if 'CooperativeWork' not in resp.url:
+                print(f"  ✗ 未能进入工作汇报页面: {resp.url}")
+                return False
+            self._work_report_html = resp.text
+            print(f"  ✓ 已加载工作汇报页面: {resp.url}")
+            return True
+        except requests.RequestException as e:
+            print(f"  ✗ CRM HTTP 登录出错: {e}")
+            return False
+
+    def publish_report(self, brief: Union[Brief, str]) -> Optional[bool]:
+        """
+        发布日报到 CRM 系统（直接提交日志表单）
+
+        Args:
+            brief: 结构化简报 Brief（或简报文本），与 CRMService.publish_report 相同
+
+        Returns:
+            True 发布成功；False 表单未提交或被拒绝（可回退到浏览器发布）；
+            None 表单已提交但未检测到成功提示（可能已发布，不能回退重发）
+        """
+        try:
+            if isinstance(brief, str):
+                brief = Brief.parse(brief)
+            brief.validate()
+        except BriefFormatError as e:
+            print(f"错误: 简报格式不合法，取消发布: {e}")
+            return False
+        if not self._work_report_html:
+            print("错误: 请先登录")
+            return False
+
+        print(f"  上午内容: {brief.morning}")
+        print(f"  下午内容: {brief.afternoon}")
+        print(f"  学习内容: {brief.learning or '无'}")
+
+        # 日志表单：包含 worksummary 的那个 form
+        log_form = None
+        for form in parse_forms(self._work_report_html):
+            if any(f['name'] == 'worksummary' for f in form['fields']):
+                log_form = form
+                break
+        if log_form is None:
+            print("  ✗ 未在工作汇报页面找到日志表单")
+            return False
+
+        payload = {}
+        for field in log_form['fields']:
+            name = field['name']
+            if not name or field['type'] in ('submit', 'button', 'file'):
+                continue
+            # 与浏览器一致：未勾选的 checkbox/radio 不提交
+            if field['type'] in ('checkbox', 'radio') and not field['checked']:
+                continue
+            if name in LOG_FIELD_SECTIONS:
+                payload[name] = getattr(brief, LOG_FIELD_SECTIONS[name]) or '无'
+            elif field['tag'] == 'textarea' and name not in KEEP_FIELDS:
+                payload[name] = '无'
+            else:
+                payload[name] = field['value']
+
+        try:
+            action_url = urljoin(self.work_report_url, log_form['action'] or self.work_report_url)
+            print(f"正在提交日志表单 (HTTP): {action_url}")
+            resp = self._session_or_new().post(action_url, data=payload, timeout=self.timeout)
+        except requests.RequestException as e:
+            if _connect_failed(e):
+                # 未能建立连接：请求未发出，日志未保存
+                print(f"  ✗ 连接 CRM 失败，日志表单未提交: {e}")
+                return False
+            # 其余网络错误（读取超时、连接中途断开等）无法确定请求是否已到达，服务端可能已保存
+            print(f"  ⚠ 提交日志表单后未收到完整响应，发布结果未知: {e}")
+            return None
+        if resp.status_code >= 500:
+            # 服务端出错（含网关超时）时日志可能已保存，不能回退重发
+            print(f"  ⚠ 提交日志表单后服务端返回 {resp.status_code}，发布结果未知")
+            return None
+        if resp.status_code >= 400:
+            # 服务端拒绝（未登录、令牌无效等）：日志未保存
+            print(f"  ✗ 提交日志表单被拒绝: HTTP {resp.status_code}")
+            return False
+
+        if any(marker in resp.text for marker in PUBLISH_SUCCESS_MARKERS):
+            print("  ✓ 发布成功！")
+            return True
+        print("  ⚠ 表单已提交，但未检测到发布成功提示，发布结果未知")
+        return None
+
+    def close(self):
+        """关闭 HTTP 会话"""
+        if self.session is not None:
+            self.session.close()
+            self.session = None
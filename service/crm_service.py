@@ -3,13 +3,15 @@ CRM 自动化发布服务层 - 使用 Playwright 实现登录和日报发布
 """
 from playwright.sync_api import sync_playwright, Page, Browser
 import time
-from typing import Optional
+from typing import Optional, Union
+
+from service.brief_parser import Brief, BriefFormatError
 
 
 class CRMService:
     """CRM 自动化发布服务类"""
     
-    def __init__(self, crm_url: str, username: str, password: str):
+    def __init__(self, crm_url: str, username: str, password: str, headless: bool = False):
         """
         初始化 CRM 服务
         
@@ -17,10 +19,13 @@ class CRMService:
             crm_url: CRM 登录页面地址
             username: 用户名
             password: 密码
+            headless: 是否无头模式运行浏览器（默认 False 方便调试）
         """
         self.crm_url = crm_url
         self.username = username
         self.password = password
+        self.headless = headless
+        self.playwright = None
         self.browser: Optional[Browser] = None
         self.page: Optional[Page] = None
     
@@ -35,8 +40,8 @@ class CRMService:
             print(f"正在访问 CRM 登录页面: {self.crm_url}")
             
             # 启动浏览器
-            playwright = sync_playwright().start()
-            self.browser = playwright.chromium.launch(headless=False)  # headless=False 方便调试
+            self.playwright = sync_playwright().start()
+            self.browser = self.playwright.chromium.launch(headless=self.headless)
             self.page = self.browser.new_page()
             
             # 访问登录页面
@@ -394,12 +399,12 @@ class CRMService:
             traceback.print_exc()
             return False
     
-    def publish_report(self, brief_content: str) -> bool:
+    def publish_report(self, brief: Union[Brief, str]) -> bool:
         """
         发布日报到 CRM 系统
         
         Args:
-            brief_content: 简报内容，格式应该包含三个部分：
+            brief: 结构化简报 Brief（或简报文本，将按 Brief.parse 解析），包含三个部分：
                 - 上午时间安排与工作内容
                 - 下午时间安排与工作内容
                 - 今日计划的学习内容与进度
@@ -407,55 +412,28 @@ class CRMService:
         Returns:
             发布是否成功
         """
+        try:
+            if isinstance(brief, str):
+                brief = Brief.parse(brief)
+            # 先校验简报，格式不合法时不再操作页面
+            brief.validate()
+        except BriefFormatError as e:
+            print(f"错误: 简报格式不合法，取消发布: {e}")
+            return False
+        
         try:
             if not self.page:
                 print("错误: 请先登录")
                 return False
             
-            print("\n正在解析简报内容...")
-            # 解析简报内容，提取三个字段
-            lines = brief_content.strip().split('\n')
-            morning_content = ""
-            afternoon_content = ""
-            learning_content = ""
-            
-            current_section = None
-            for line in lines:
-                original_line = line
-                line = line.strip()
-                if not line:
-                    continue
-                # 检查是否是新的章节标题
-                if '*上午时间安排与工作内容' in line or '上午时间安排' in line:
-                    current_section = 'morning'
-                    continue
-                elif '*下午时间安排与工作内容' in line or '下午时间安排' in line:
-                    current_section = 'afternoon'
-                    continue
-                elif '*今日计划的学习内容与进度' in line or '*今日计划' in line or ('学习内容' in line and '计划' in line):
-                    current_section = 'learning'
-                    continue
-                # 如果不是章节标题，根据当前章节添加到对应内容
-                if current_section == 'morning' and not line.startswith('*'):
-                    morning_content += line + '\n'
-                elif current_section == 'afternoon' and not line.startswith('*'):
-                    afternoon_content += line + '\n'
-                elif current_section == 'learning' and not line.startswith('*'):
-                    learning_content += line + '\n'
-            
-            morning_content = morning_content.strip()
-            afternoon_content = afternoon_content.strip()
-            learning_content = learning_content.strip()
+            morning_content = brief.morning
+            afternoon_content = brief.afternoon
+            learning_content = brief.learning or '无'
             
             print(f"  上午内容: {morning_content}")
             print(f"  下午内容: {afternoon_content}")
             print(f"  学习内容: {learning_content}")
             
-            # 调试：如果学习内容为空，打印原始内容
-            if not learning_content:
-                print("  ⚠ 警告: 学习内容解析为空，原始简报内容:")
-                print("  " + "\n  ".join(brief_content.split('\n')))
-            
             # 现在应该在"工作汇报"页面，先点击"日志"标签
             print("\n正在查找并点击'日志'标签...")
             time.sleep(2)  # 等待页面稳定
@@ -865,6 +843,10 @@ class CRMService:
         try:
             if self.browser:
                 self.browser.close()
+                self.browser = None
                 print("浏览器已关闭")
+            if self.playwright:
+                self.playwright.stop()
+                self.playwright = None
         except Exception as e:
             print(f"关闭浏览器出错: {str(e)}")
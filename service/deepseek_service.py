@@ -4,6 +4,7 @@ DeepSeek 服务层 - 调用 DeepSeek API 生成简报（业务逻辑在 report_s
 from openai import OpenAI
 
 from config import DEEPSEEK_API_KEY, DEEPSEEK_BASE_URL, DEEPSEEK_MODEL
+from service.telemetry_service import telemetry, CATEGORY_LLM
 
 
 class DeepSeekService:
@@ -20,7 +21,7 @@ class DeepSeekService:
             self._client = OpenAI(api_key=self.api_key, base_url=self.base_url)
         return self._client
 
-    def chat(self, system: str, user: str, max_tokens: int = 1024) -> str:
+    def chat(self, system: str, user: str, max_tokens: int = 1024, json_mode: bool = False) -> str:
         """
         单轮对话，返回助手回复文本。
         
@@ -28,19 +29,29 @@ class DeepSeekService:
             system: 系统提示
             user: 用户消息
             max_tokens: 最大生成 token 数
+            json_mode: 是否要求以 JSON 对象输出（提示词中需包含 json 字样）
             
         Returns:
             助手回复内容；失败时返回空字符串或抛出异常
         """
         client = self._client_or_new()
-        resp = client.chat.completions.create(
-            model=self.model,
-            messages=[
-                {"role": "system", "content": system},
-                {"role": "user", "content": user},
-            ],
-            max_tokens=max_tokens,
-            stream=False,
-        )
+        kwargs = {}
+        if json_mode:
+            kwargs["response_format"] = {"type": "json_object"}
+        with telemetry.span("DeepSeekService.chat", CATEGORY_LLM, model=self.model) as span:
+            resp = client.chat.completions.create(
+                model=self.model,
+                messages=[
+                    {"role": "system", "content": system},
+                    {"role": "user", "content": user},
+                ],
+                max_tokens=max_tokens,
+                stream=False,
+                **kwargs,
+            )
+            usage = getattr(resp, "usage", None)
+            if usage is not None:
+                span["prompt_tokens"] = usage.prompt_tokens
+                span["completion_tokens"] = usage.completion_tokens
         text = (resp.choices[0].message.content or "").strip()
         return text
@@ -0,0 +1,160 @@
+"""
+结构化导出服务层 - 简报以带元数据的 JSON 保存（与 txt 并存），提交记录使用提交缓存的 JSON Lines；
+可将一段时间的提交和简报合并导出为 Parquet（需 pip install pyarrow）或 JSON Lines，供看板等下游工具直接加载
+"""
+import json
+import os
+from datetime import datetime, timedelta
+from typing import Dict, List, Optional
+
+from config import BRIEF_JSON_FILE_FORMAT, COMMIT_CACHE_DIR_NAME, EXPORT_DIR_NAME, REPORT_SAVE_DIR
+from service.atomic_file import write_atomic
+from service.brief_parser import Brief
+from service.commit_cache import CommitCache
+from service.telemetry_service import telemetry, CATEGORY_IO
+
+# 导出格式
+FORMAT_PARQUET = 'parquet'
+FORMAT_JSONL = 'jsonl'
+
+# 简报 JSON 的结构版本，字段变更时递增
+BRIEF_SCHEMA_VERSION = 1
+
+
+def load_pyarrow():
+    """按需导入可选依赖 pyarrow（列式导出 Parquet），未安装时返回 None；只在导出 Parquet 时导入"""
+    try:
+        import pyarrow
+        import pyarrow.parquet
+    except ImportError:
+        return None
+    return pyarrow
+
+
+class ExportService:
+    """结构化简报保存与批量导出"""
+
+    def __init__(self, reports_dir: str = None, cache: CommitCache = None):
+        """
+        Args:
+            reports_dir: 报告目录，默认 REPORT_SAVE_DIR
+            cache: 提交缓存（JSON Lines），默认 REPORT_SAVE_DIR/cache
+        """
+        self.reports_dir = reports_dir or REPORT_SAVE_DIR
+        self.cache = cache or CommitCache(os.path.join(self.reports_dir, COMMIT_CACHE_DIR_NAME))
+
+    def brief_json_path(self, date: datetime) -> str:
+        return os.path.join(self.reports_dir, BRIEF_JSON_FILE_FORMAT.format(date=date.strftime('%Y%m%d')))
+
+    def save_brief_json(self, brief: Brief, date: datetime = None, **metadata) -> str:
+        """
+        保存带元数据的简报 JSON（REPORT_SAVE_DIR/简报_YYYYMMDD.json）
+
+        Args:
+            brief: 结构化简报
+            date: 简报日期，默认今天
+            metadata: 元数据，如 author、source、commit_count、repos、model
+
+        Returns:
+            保存的文件路径
+        """
+        date = date or datetime.now()
+        record = {
+            'schema_version': BRIEF_SCHEMA_VERSION,
+            'date': date.strftime('%Y-%m-%d'),
+            'generated_at': datetime.now().isoformat(timespec='seconds'),
+            'valid': brief.is_valid,
+            'brief': brief.to_dict(),
+            'raw': None if brief.is_valid else brief.raw,
+            'metadata': metadata,
+        }
+        path = self.brief_json_path(date)
+        # 简报和元数据都未变化时沿用原生成时间，使内容哈希一致、跳过重写
+        existing = self.load_brief_json(date)
+        if existing is not None and {**existing, 'generated_at': None} == {**record, 'generated_at': None}:
+            record['generated_at'] = existing['generated_at']
+        with telemetry.span('save_brief_json', CATEGORY_IO, path=path) as span:
+            span['written'] = write_atomic(path, json.dumps(record, ensure_ascii=False, indent=2))
+        return path
+
+    def load_brief_json(self, date: datetime) -> Optional[Dict]:
+        """读取简报 JSON，不存在时返回 None"""
+        path = self.brief_json_path(date)
+        if not os.path.exists(path):
+            return None
+        with open(path, 'r', encoding='utf-8') as f:
+            return json.load(f)
+
+    def collect_rows(self, start_date: datetime, end_date: datetime):
+        """
+        汇总日期范围内的提交行和简报行（只读缓存和简报 JSON）
+
+        Returns:
+            (commit_rows, brief_rows)
+        """
+        commit_rows = []
+        for day, commits in self.cache.load_range(start_date, end_date).items():
+            for commit in commits or []:
+                commit_rows.append(dict(commit, day=f"{day[:4]}-{day[4:6]}-{day[6:]}"))
+
+        brief_rows = []
+        day = start_date
+        while day.date() <= end_date.date():
+            record = self.load_brief_json(day)
+            if record is not None:
+                row = {'date': record['date'], 'generated_at': record['generated_at'], 'valid': record['valid']}
+                row.update(record['brief'])
+                for key, value in record.get('metadata', {}).items():
+                    # 列表等嵌套值序列化为字符串，保证各行列类型一致
+                    row[key] = value if isinstance(value, (str, int, float, bool)) or value is None \
+                        else json.dumps(value, ensure_ascii=False)
+                brief_rows.append(row)
+            day += timedelta(days=1)
+        return commit_rows, brief_rows
+
+    @staticmethod
+    def _schema(pyarrow, rows: List[Dict]):
+        """
+        所有行字段的并集（按首次出现的顺序）构成的 schema，各列类型由该列全部值推断；
+        不传 schema 时 pyarrow 只取第一行的字段，只在后续行出现的字段（如 also_in、machine）会被丢弃
+        """
+        keys = list(dict.fromkeys(key for row in rows for key in row))
+        return pyarrow.schema([(key, pyarrow.array([row.get(key) for row in rows]).type) for key in keys])
+
+    def export(self, start_date: datetime, end_date: datetime, fmt: str = FORMAT_PARQUET,
+               output_dir: str = None) -> List[str]:
+        """
+        将日期范围内的提交和简报导出为两个文件：commits_开始_结束.<ext>、briefs_开始_结束.<ext>
+
+        Args:
+            fmt: 'parquet' 或 'jsonl'；选择 parquet 但未安装 pyarrow 时改为导出 JSON Lines
+            output_dir: 导出目录，默认 REPORT_SAVE_DIR/export
+
+        Returns:
+            导出的文件路径列表
+        """
+        if fmt not in (FORMAT_PARQUET, FORMAT_JSONL):
+            raise ValueError(f"未知导出格式: {fmt}")
+        pyarrow = load_pyarrow() if fmt == FORMAT_PARQUET else None
+        if fmt == FORMAT_PARQUET and pyarrow is None:
+            print("未安装 pyarrow（pip install pyarrow），改为导出 JSON Lines")
+            fmt = FORMAT_JSONL
+
+        output_dir = output_dir or os.path.join(self.reports_dir, EXPORT_DIR_NAME)
+        os.makedirs(output_dir, exist_ok=True)
+        suffix = f"{start_date.strftime('%Y%m%d')}_{end_date.strftime('%Y%m%d')}.{fmt}"
+        commit_rows, brief_rows = self.collect_rows(start_date, end_date)
+
+        paths = []
+        for name, rows in (('commits', commit_rows), ('briefs', brief_rows)):
+            path = os.path.join(output_dir, f"{name}_{suffix}")
+            with telemetry.span('export', CATEGORY_IO, path=path, rows=len(rows)):
+                if fmt == FORMAT_PARQUET:
+                    sink = pyarrow.BufferOutputStream()
+                    pyarrow.parquet.write_table(pyarrow.Table.from_pylist(rows, schema=self._schema(pyarrow, rows)), sink)
+                    write_atomic(path, sink.getvalue().to_pybytes(), keep_versions=0)
+                else:
+                    content = ''.join(json.dumps(row, ensure_ascii=False) + '\n' for row in rows)
+                    write_atomic(path, content, keep_versions=0)
+            paths.append(path)
+        return paths
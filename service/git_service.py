@@ -1,22 +1,317 @@
 """
 Git服务层 - 处理Git仓库相关的业务逻辑（跨平台兼容）
 """
+import contextlib
+import fnmatch
+import heapq
 import os
+import re
 import sys
 import subprocess
 import shutil
-from datetime import datetime, timedelta
-from typing import List, Dict
+import threading
+import time
+from collections import defaultdict
+from concurrent.futures import ThreadPoolExecutor
+from datetime import datetime, timedelta, timezone
+from functools import lru_cache
+from typing import List, Dict, Optional, Union
 from pathlib import Path
 
-from config import EXCLUDE_DIRS
+from config import (
+    EXCLUDE_DIRS,
+    GIT_ACTIVITY_PREFILTER,
+    GIT_BACKEND,
+    GIT_COLLECT_WORKERS,
+    GIT_COMMIT_SPOOL,
+    GIT_DEDUPE_PATCH_ID,
+    GIT_DISCOVER_WORKERS,
+    GIT_LOG_TIMEOUT,
+    GIT_REF_EXCLUDE,
+    GIT_REF_REMOTES,
+    GIT_REF_SCOPE,
+    GIT_REF_SCOPE_OVERRIDES,
+    GIT_REPO_HISTORY,
+    GIT_SEARCH_FOLLOW_SYMLINKS,
+    GIT_SEARCH_INCLUDE_SUBMODULES,
+    GIT_SEARCH_MAX_DEPTH,
+)
+from service.commit_spool import CLOCK_SLACK, CommitSpool
+from service.repo_history import RepoHistory
+from service.telemetry_service import telemetry, CATEGORY_REPO, CATEGORY_STAGE
+
+# Windows 平台额外排除的目录
+WIN32_EXCLUDE_DIRS = ["AppData", "Application Data", "Local Settings"]
+
+# 提交读取后端
+BACKEND_SUBPROCESS = 'subprocess'
+BACKEND_PYGIT2 = 'pygit2'
+
+# git log 遍历的引用范围
+REF_SCOPE_ALL = 'all'
+REF_SCOPE_LOCAL = 'local'
+REF_SCOPE_REMOTES = 'remotes'
+
+
+@lru_cache(maxsize=None)
+def load_pygit2():
+    """
+    按需导入可选依赖 pygit2（进程内读取提交，GIT_BACKEND = 'pygit2'），未安装时返回 None；
+    只有选择 pygit2 后端时才导入，避免拖慢不读取提交的命令启动
+    """
+    try:
+        import pygit2
+    except ImportError:
+        return None
+    return pygit2
+
+
+@lru_cache(maxsize=None)
+def git_executable() -> str:
+    """git 命令路径（进程内只查找一次），找不到时使用 'git'"""
+    return shutil.which('git') or 'git'
+
+
+class ExcludeMatcher:
+    """目录排除规则：精确名称用集合匹配，含通配符（* ? [）的规则预编译为一个正则"""
+    
+    def __init__(self, patterns: List[str]):
+        self.names = set()
+        globs = []
+        for pattern in patterns:
+            if any(ch in pattern for ch in '*?['):
+                globs.append(fnmatch.translate(pattern))
+            else:
+                self.names.add(pattern)
+        self.regex = re.compile('|'.join(globs)) if globs else None
+    
+    def __call__(self, name: str) -> bool:
+        if name in self.names:
+            return True
+        return self.regex is not None and self.regex.match(name) is not None
+
+
+class RefScope:
+    """
+    git log 遍历的引用范围：
+        'all'      所有引用（--all，含 HEAD 和各 worktree 的 HEAD）
+        'local'    本地分支和 HEAD
+        'remotes'  本地分支、HEAD 和指定远程（remotes 为空时为全部远程）的远程分支
+    exclude 为排除的引用（以 refs/ 开头的 glob，* 可匹配多级，如 'refs/tags/*'、'refs/pull/*'）
+    """
+    
+    def __init__(self, scope: str = REF_SCOPE_ALL, remotes: List[str] = (), exclude: List[str] = ()):
+        if scope not in (REF_SCOPE_ALL, REF_SCOPE_LOCAL, REF_SCOPE_REMOTES):
+            raise ValueError(f"未知的引用范围: {scope}")
+        self.scope = scope
+        self.remotes = list(remotes)
+        self.exclude = list(exclude)
+        self.globs = []
+        if scope != REF_SCOPE_ALL:
+            self.globs.append('refs/heads/*')
+        if scope == REF_SCOPE_REMOTES:
+            self.globs.extend([f"refs/remotes/{r}/*" for r in self.remotes] or ['refs/remotes/*'])
+    
+    @classmethod
+    def from_config(cls, value: Union[str, Dict, 'RefScope'] = None, default: 'RefScope' = None) -> 'RefScope':
+        """由配置值（范围名，或 {'scope', 'remotes', 'exclude'}，缺省项沿用 default）构造"""
+        if isinstance(value, RefScope):
+            return value
+        base = default or cls(GIT_REF_SCOPE, GIT_REF_REMOTES, GIT_REF_EXCLUDE)
+        if value is None:
+            return base
+        if isinstance(value, str):
+            value = {'scope': value}
+        return cls(
+            value.get('scope', base.scope),
+            value.get('remotes', base.remotes),
+            value.get('exclude', base.exclude),
+        )
+    
+    def to_dict(self) -> Dict:
+        return {'scope': self.scope, 'remotes': self.remotes, 'exclude': self.exclude}
+    
+    def log_args(self) -> List[str]:
+        """git log 的引用参数（--exclude 只作用于其后的第一个 --all/--glob，因此每个 glob 前重复一次）"""
+        excludes = [f"--exclude={pattern}" for pattern in self.exclude]
+        if self.scope == REF_SCOPE_ALL:
+            return [*excludes, '--all']
+        args = []
+        for glob in self.globs:
+            args.extend([*excludes, f"--glob={glob}"])
+        return [*args, 'HEAD']
+    
+    def includes(self, refname: str) -> bool:
+        """引用是否在范围内（pygit2 后端按此筛选起点，HEAD 另行处理）"""
+        if any(fnmatch.fnmatchcase(refname, pattern) for pattern in self.exclude):
+            return False
+        return self.scope == REF_SCOPE_ALL or any(fnmatch.fnmatchcase(refname, glob) for glob in self.globs)
 
 
 class GitService:
     """Git仓库服务类"""
     
-    def __init__(self):
+    def __init__(
+        self,
+        exclude_dirs: List[str] = None,
+        max_depth: Optional[int] = None,
+        include_submodules: bool = None,
+        follow_symlinks: bool = None,
+        prefilter: bool = None,
+        backend: str = None,
+        spool: bool = None,
+        dedupe_patch_id: bool = None,
+        ref_scope: Union[str, Dict, RefScope] = None,
+        ref_scope_overrides: Dict[str, Union[str, Dict]] = None,
+        history: Union[bool, RepoHistory] = None,
+        workers: int = None,
+    ):
+        """
+        Args:
+            exclude_dirs: 搜索时排除的目录名（支持 glob 通配符），默认 config.EXCLUDE_DIRS
+            max_depth: 最大搜索深度（搜索根目录为 0），默认 config.GIT_SEARCH_MAX_DEPTH
+            include_submodules: 找到仓库后是否继续在其工作区内搜索嵌套仓库，默认 config.GIT_SEARCH_INCLUDE_SUBMODULES
+            follow_symlinks: 是否跟随目录符号链接（带循环保护），默认 config.GIT_SEARCH_FOLLOW_SYMLINKS
+            prefilter: 收集提交前是否按引用修改时间跳过不活跃的仓库，默认 config.GIT_ACTIVITY_PREFILTER
+            backend: 提交读取后端 'subprocess' 或 'pygit2'，默认 config.GIT_BACKEND；pygit2 未安装时回退到 subprocess
+            spool: 是否从提交 spool 读取已安装钩子的仓库的提交，默认 config.GIT_COMMIT_SPOOL（需开启预筛选）
+            dedupe_patch_id: 跨仓库去重时是否按 patch-id 合并 cherry-pick 的提交，默认 config.GIT_DEDUPE_PATCH_ID
+            ref_scope: git log 遍历的引用范围（范围名或 {'scope', 'remotes', 'exclude'}），
+                       默认 config.GIT_REF_SCOPE / GIT_REF_REMOTES / GIT_REF_EXCLUDE
+            ref_scope_overrides: 按仓库覆盖引用范围 {仓库路径或目录名: 范围}，默认 config.GIT_REF_SCOPE_OVERRIDES
+            history: 是否按各仓库的历史耗时调度收集、设定超时和熔断（也可直接传入 RepoHistory），
+                     默认 config.GIT_REPO_HISTORY；新记录需调用 save_history 写回
+            workers: 并行收集提交的线程数，默认 config.GIT_COLLECT_WORKERS
+        """
         self.git_repos = []
+        # 最近一次收集提交时被预筛选跳过的仓库数、从 spool 读取的仓库数、去重合并的提交数、
+        # 超时的仓库、被熔断跳过的仓库
+        self.last_skipped = 0
+        self.last_spooled = 0
+        self.last_duplicates = 0
+        self.last_timed_out: List[str] = []
+        self.last_broken: List[str] = []
+        # 完整 hash -> 读取到该提交的仓库路径（计算 patch-id 时使用）；完整 hash -> patch-id（无改动的提交为空串）
+        self.commit_paths: Dict[str, str] = {}
+        self.patch_ids: Dict[str, str] = {}
+        patterns = list(EXCLUDE_DIRS if exclude_dirs is None else exclude_dirs)
+        if sys.platform == "win32":
+            patterns.extend(WIN32_EXCLUDE_DIRS)
+        # 排除规则只编译一次，遍历时逐个目录名匹配
+        self.is_excluded = ExcludeMatcher(patterns)
+        self.max_depth = GIT_SEARCH_MAX_DEPTH if max_depth is None else max_depth
+        self.include_submodules = (
+            GIT_SEARCH_INCLUDE_SUBMODULES if include_submodules is None else include_submodules
+        )
+        self.follow_symlinks = GIT_SEARCH_FOLLOW_SYMLINKS if follow_symlinks is None else follow_symlinks
+        self.prefilter = GIT_ACTIVITY_PREFILTER if prefilter is None else prefilter
+        self.backend = GIT_BACKEND if backend is None else backend
+        if self.backend == BACKEND_PYGIT2 and load_pygit2() is None:
+            print("警告: 未安装 pygit2，提交读取回退到 git 子进程")
+            self.backend = BACKEND_SUBPROCESS
+        self.spool = CommitSpool() if (GIT_COMMIT_SPOOL if spool is None else spool) else None
+        self.dedupe_patch_id = GIT_DEDUPE_PATCH_ID if dedupe_patch_id is None else dedupe_patch_id
+        self.ref_scope = RefScope.from_config(ref_scope)
+        # 覆盖项的键为路径时统一为绝对路径，其余按目录名匹配
+        self.ref_scope_overrides = {}
+        for key, value in (GIT_REF_SCOPE_OVERRIDES if ref_scope_overrides is None else ref_scope_overrides).items():
+            if os.sep in key or '/' in key or key.startswith('~'):
+                key = os.path.normcase(os.path.abspath(os.path.expanduser(key)))
+            self.ref_scope_overrides[key] = RefScope.from_config(value, self.ref_scope)
+        if history is None:
+            history = GIT_REPO_HISTORY
+        self.history = (RepoHistory() if history else None) if isinstance(history, bool) else history
+        self.workers = max(1, GIT_COLLECT_WORKERS if workers is None else workers)
+    
+    def _scan_dir(self, path: str):
+        """
+        扫描单个目录（os.scandir 利用 d_type 判断目录，无需额外 stat）
+        
+        Returns:
+            (是否为仓库根目录, 需要继续遍历的子目录 DirEntry 列表，按名称排序)；无法访问时返回 (False, [])
+        """
+        try:
+            with os.scandir(path) as it:
+                entries = list(it)
+        except OSError:
+            # 无权限或目录已消失（Windows常见），跳过继续搜索
+            return False, []
+        
+        subdirs = []
+        is_repo = False
+        for entry in entries:
+            name = entry.name
+            if name == '.git':
+                # .git 为目录（普通仓库）或文件（worktree/子模块的 gitdir 指针）
+                try:
+                    is_repo = entry.is_dir() or entry.is_file()
+                except OSError:
+                    pass
+                continue
+            if self.is_excluded(name):
+                continue
+            try:
+                if entry.is_dir(follow_symlinks=False):
+                    subdirs.append(entry)
+                elif self.follow_symlinks and entry.is_symlink() and entry.is_dir():
+                    subdirs.append(entry)
+            except OSError:
+                continue
+        subdirs.sort(key=lambda e: e.name)
+        return is_repo, subdirs
+    
+    def _should_descend(self, is_repo: bool, depth: int) -> bool:
+        """找到 .git 后默认不再深入该仓库工作区；超过最大深度时停止"""
+        if is_repo and not self.include_submodules:
+            return False
+        return self.max_depth is None or depth < self.max_depth
+    
+    def _first_visit(self, entry, visited: set, lock: threading.Lock = None) -> bool:
+        """跟随符号链接时按 (st_dev, st_ino) 防止循环，返回该目录是否首次访问"""
+        if not self.follow_symlinks:
+            return True
+        try:
+            st = entry.stat()
+        except OSError:
+            return False
+        key = (st.st_dev, st.st_ino)
+        with lock or contextlib.nullcontext():
+            if key in visited:
+                return False
+            visited.add(key)
+        return True
+    
+    def _walk_repos(self, root_path: str, start_depth: int = 0, visited: set = None,
+                    lock: threading.Lock = None) -> List[str]:
+        """
+        基于 os.scandir 的仓库遍历（深度优先，按目录名顺序）
+        
+        Args:
+            root_path: 遍历起点
+            start_depth: 起点相对搜索根目录的深度
+            visited: 已访问目录的 (st_dev, st_ino) 集合（跟随符号链接时使用，可在线程间共享）
+            lock: 共享 visited 时使用的锁
+        """
+        git_repos = []
+        if visited is None:
+            visited = set()
+            if self.follow_symlinks:
+                st = os.stat(root_path)
+                visited.add((st.st_dev, st.st_ino))
+        stack = [(root_path, start_depth)]
+        while stack:
+            path, depth = stack.pop()
+            is_repo, subdirs = self._scan_dir(path)
+            if is_repo:
+                # 使用os.path.normpath确保路径格式正确（Windows兼容）
+                git_repos.append(os.path.normpath(path))
+            if not self._should_descend(is_repo, depth):
+                continue
+            # 逆序入栈，保证按目录名顺序遍历
+            for entry in reversed(subdirs):
+                if self._first_visit(entry, visited, lock):
+                    stack.append((entry.path, depth + 1))
+        return git_repos
     
     def discover_git_repos(self, root_path: str = None) -> List[str]:
         """
@@ -44,139 +339,443 @@ class GitService:
         
         git_repos = []
         
-        # 递归搜索.git目录，添加异常处理以处理权限问题（Windows常见）
-        try:
-            for root, dirs, files in os.walk(root_path):
-                # 先检查当前目录是否有.git目录（在过滤之前检查）
-                if '.git' in dirs:
-                    # 使用os.path.normpath确保路径格式正确（Windows兼容）
-                    repo_path = os.path.normpath(root)
-                    git_repos.append(repo_path)
-                    # 找到.git后不再深入搜索该目录，从dirs中移除
-                    dirs.remove('.git')
-                
-                # 使用 config.EXCLUDE_DIRS 排除非项目目录；Windows 追加平台特定目录
-                exclude_dirs = list(EXCLUDE_DIRS)
-                if sys.platform == "win32":
-                    exclude_dirs.extend(["AppData", "Application Data", "Local Settings"])
-                dirs[:] = [d for d in dirs if d not in exclude_dirs]
-        except PermissionError as e:
-            print(f"警告: 访问目录时权限不足: {str(e)}")
-        except Exception as e:
-            print(f"警告: 搜索Git仓库时出错: {str(e)}")
+        with telemetry.span('discover_git_repos', CATEGORY_STAGE, root=root_path) as span:
+            try:
+                git_repos = self._walk_repos(root_path)
+            except Exception as e:
+                print(f"警告: 搜索Git仓库时出错: {str(e)}")
+            span['repos'] = len(git_repos)
         
         self.git_repos = git_repos
         return git_repos
     
-    def get_commits_by_date(self, repo_path: str, target_date: datetime = None) -> List[Dict]:
+    def _merge_roots(self, root_paths: List[str]) -> List[str]:
+        """按 realpath 合并搜索路径：去掉不存在的路径、重复路径和被其他路径包含的路径"""
+        real_roots = []
+        for path in root_paths:
+            path = os.path.abspath(os.path.expanduser(path))
+            if not os.path.isdir(path):
+                print(f"警告: 搜索路径不存在或不是目录: {path}")
+                continue
+            real_roots.append(os.path.realpath(path))
+        merged = []
+        for real in sorted(set(real_roots), key=os.path.normcase):
+            key = os.path.normcase(real)
+            parent = next(
+                (m for m in merged if key.startswith(os.path.normcase(m).rstrip(os.sep) + os.sep)), None
+            )
+            if parent:
+                print(f"  搜索路径 {real} 已包含在 {parent} 中，合并搜索")
+                continue
+            merged.append(real)
+        return merged
+    
+    def discover_git_repos_multi(self, root_paths: List[str], workers: int = None) -> List[str]:
         """
-        获取指定仓库指定日期的所有提交记录
+        并行发现多个搜索路径下的Git仓库：先按 realpath 合并重叠的搜索路径，
+        再将各搜索路径的一级子目录作为任务交给线程池（空闲线程领取下一个子目录），
+        最后按仓库目录的 (st_dev, st_ino) 去重（符号链接/重叠路径指向同一仓库时只保留一个）
         
         Args:
-            repo_path: Git仓库路径
-            target_date: 目标日期，默认为今天
+            root_paths: 搜索路径列表
+            workers: 并行线程数，默认 config.GIT_DISCOVER_WORKERS
             
         Returns:
-            提交记录列表，每个记录包含：author, date, message, hash
+            Git仓库路径列表（按路径排序）
         """
-        if not os.path.exists(os.path.join(repo_path, '.git')):
-            return []
+        roots = self._merge_roots(root_paths)
+        workers = workers or GIT_DISCOVER_WORKERS
+        found = []
+        visited = set()
+        lock = threading.Lock()
+        
+        with telemetry.span('discover_git_repos', CATEGORY_STAGE, roots=len(roots), workers=workers) as span:
+            with ThreadPoolExecutor(max_workers=workers, thread_name_prefix='discover') as pool:
+                futures = []
+                for root in roots:
+                    if self.follow_symlinks:
+                        st = os.stat(root)
+                        visited.add((st.st_dev, st.st_ino))
+                    is_repo, subdirs = self._scan_dir(root)
+                    if is_repo:
+                        found.append(os.path.normpath(root))
+                    if not self._should_descend(is_repo, 0):
+                        continue
+                    for entry in subdirs:
+                        if self._first_visit(entry, visited, lock):
+                            futures.append(pool.submit(self._walk_repos, entry.path, 1, visited, lock))
+                for future in futures:
+                    try:
+                        found.extend(future.result())
+                    except Exception as e:
+                        print(f"警告: 搜索Git仓库时出错: {str(e)}")
+            
+            # 按设备号+inode 去重
+            git_repos = []
+            seen = set()
+            for repo in sorted(found):
+                try:
+                    st = os.stat(repo)
+                except OSError:
+                    continue
+                key = (st.st_dev, st.st_ino)
+                if key in seen:
+                    continue
+                seen.add(key)
+                git_repos.append(repo)
+            span['repos'] = len(git_repos)
+        
+        self.git_repos = git_repos
+        return git_repos
+    
+    @staticmethod
+    def resolve_git_dirs(repo_path: str):
+        """
+        解析检出目录的 git 目录和公共 git 目录（对象库所在目录）
+        
+        - 普通仓库: .git 为目录，两者相同
+        - worktree: .git 文件指向 <主仓库>/.git/worktrees/<名称>，其中的 commondir 指向主仓库的 .git
+        - 子模块: .git 文件指向 <父仓库>/.git/modules/<名称>，拥有独立的对象库
+        
+        Returns:
+            (git_dir, common_dir)，无法解析时返回 (None, None)
+        """
+        dot_git = os.path.join(repo_path, '.git')
+        if os.path.isdir(dot_git):
+            git_dir = dot_git
+        elif os.path.isfile(dot_git):
+            try:
+                with open(dot_git, 'r', encoding='utf-8') as f:
+                    content = f.read().strip()
+            except OSError:
+                return None, None
+            if not content.startswith('gitdir:'):
+                return None, None
+            # gitdir 可以是相对检出目录的路径
+            git_dir = os.path.join(repo_path, content[len('gitdir:'):].strip())
+        else:
+            return None, None
+        
+        git_dir = os.path.realpath(git_dir)
+        common_dir = git_dir
+        try:
+            with open(os.path.join(git_dir, 'commondir'), 'r', encoding='utf-8') as f:
+                common_dir = os.path.realpath(os.path.join(git_dir, f.read().strip()))
+        except OSError:
+            pass
+        return git_dir, common_dir
+    
+    @staticmethod
+    def _read_head_ref(git_dir: str) -> Optional[str]:
+        """读取检出 HEAD 指向的分支引用（如 refs/heads/main），分离 HEAD 时返回 None"""
+        try:
+            with open(os.path.join(git_dir, 'HEAD'), 'r', encoding='utf-8') as f:
+                head = f.read().strip()
+        except OSError:
+            return None
+        return head[len('ref:'):].strip() if head.startswith('ref:') else None
+    
+    def group_by_object_store(self, repo_paths: List[str]) -> Dict[str, List[Dict]]:
+        """
+        按对象库（公共 git 目录）对检出目录分组，同一仓库的多个 worktree 归为一组
+        
+        Returns:
+            {common_dir: [{'path', 'git_dir', 'sources'}, ...]}，主检出（git_dir == common_dir）排在首位；
+            sources 为 git log --source 中可归属到该检出的引用名（其 HEAD 所在分支，或分离 HEAD 的伪引用）
+        """
+        groups = {}
+        for repo_path in repo_paths:
+            git_dir, common_dir = self.resolve_git_dirs(repo_path)
+            if common_dir is None:
+                continue
+            groups.setdefault(common_dir, []).append({'path': repo_path, 'git_dir': git_dir})
         
-        # 如果未指定日期，使用今天
+        for common_dir, checkouts in groups.items():
+            checkouts.sort(key=lambda c: (c['git_dir'] != common_dir, c['path']))
+            for checkout in checkouts:
+                if checkout['git_dir'] == common_dir:
+                    sources = ['HEAD']
+                else:
+                    sources = [f"worktrees/{os.path.basename(checkout['git_dir'])}/HEAD"]
+                head_ref = self._read_head_ref(checkout['git_dir'])
+                if head_ref:
+                    sources.append(head_ref)
+                checkout['sources'] = sources
+        return groups
+    
+    @staticmethod
+    def _date_window(target_date: datetime = None, end_date: datetime = None):
+        """目标日期（默认今天）开始到结束日期（默认同一天）结束的时间范围"""
         if target_date is None:
             target_date = datetime.now()
+        if end_date is None:
+            end_date = target_date
+        return (
+            datetime.combine(target_date.date(), datetime.min.time()),
+            datetime.combine(end_date.date(), datetime.max.time()),
+        )
+    
+    @staticmethod
+    def _latest_mtime(path: str, recursive: bool = False) -> float:
+        """文件/目录的修改时间；recursive 时取目录树下所有目录和文件的最大修改时间，不存在时返回 0"""
+        try:
+            latest = os.stat(path).st_mtime
+        except OSError:
+            return 0.0
+        if not recursive:
+            return latest
+        stack = [path]
+        while stack:
+            try:
+                with os.scandir(stack.pop()) as it:
+                    for entry in it:
+                        try:
+                            latest = max(latest, entry.stat(follow_symlinks=False).st_mtime)
+                            if entry.is_dir(follow_symlinks=False):
+                                stack.append(entry.path)
+                        except OSError:
+                            continue
+            except OSError:
+                continue
+        return latest
+    
+    def last_ref_activity(self, common_dir: str, git_dirs: List[str] = ()) -> float:
+        """
+        对象库最近一次引用变动的时间戳：refs/ 目录树（新增/更新松散引用会改写所在目录）、packed-refs、
+        logs/ 下的 reflog，以及各检出 git 目录的 HEAD 和 logs/HEAD 的最大修改时间
+        
+        Args:
+            common_dir: 公共 git 目录
+            git_dirs: 共享该对象库的各检出 git 目录（worktree 的 HEAD 和 reflog 在各自目录下）
+        """
+        latest = max(
+            self._latest_mtime(os.path.join(common_dir, 'refs'), recursive=True),
+            self._latest_mtime(os.path.join(common_dir, 'packed-refs')),
+            self._latest_mtime(os.path.join(common_dir, 'logs'), recursive=True),
+        )
+        for git_dir in git_dirs:
+            if git_dir != common_dir:
+                latest = max(
+                    latest,
+                    self._latest_mtime(os.path.join(git_dir, 'HEAD')),
+                    self._latest_mtime(os.path.join(git_dir, 'logs'), recursive=True),
+                )
+        return latest
+    
+    def ref_signature(self, repo_paths: List[str]) -> Dict[str, float]:
+        """
+        各对象库的引用变动签名（最近一次引用变动时间），签名不变说明没有新的提交或分支移动，
+        可直接复用上次收集的结果
+        
+        Returns:
+            {common_dir: 最近一次引用变动的时间戳}
+        """
+        return {
+            common_dir: self.last_ref_activity(common_dir, [c['git_dir'] for c in checkouts])
+            for common_dir, checkouts in self.group_by_object_store(repo_paths).items()
+        }
+    
+    def ref_scope_for(self, repo_path: str) -> RefScope:
+        """仓库的引用范围：按路径、再按目录名查找覆盖项，没有时使用全局范围"""
+        path = os.path.normcase(os.path.abspath(repo_path))
+        scope = self.ref_scope_overrides.get(path) or self.ref_scope_overrides.get(os.path.basename(path))
+        return scope or self.ref_scope
+    
+    def _run_log(self, cwd: str, target_date: datetime = None, end_date: datetime = None,
+                 author: str = None, no_merges: bool = False, timeout: float = None) -> List[Dict]:
+        """
+        获取 cwd 所在仓库引用范围内可达的、指定日期（或 target_date ~ end_date 日期范围）的提交
+        （默认等价于 git log --all --source --since --until）
         
-        # 获取目标日期的开始和结束时间
-        target_day = target_date.date()
-        start_time = datetime.combine(target_day, datetime.min.time())
-        end_time = datetime.combine(target_day, datetime.max.time())
+        Args:
+            author: 只返回该作者（user.name，完全一致）的提交
+            no_merges: 不返回合并提交
+            timeout: git log 子进程的超时秒数，默认 config.GIT_LOG_TIMEOUT（pygit2 后端在进程内读取，不限时）
+        
+        Returns:
+            提交记录列表，每个记录包含：hash, source（到达该提交的引用名）, author, date, message, body
+        
+        Raises:
+            subprocess.TimeoutExpired: git log 超时
+        """
+        if self.backend == BACKEND_PYGIT2:
+            pygit2 = load_pygit2()
+            try:
+                return self._run_log_pygit2(cwd, target_date, end_date, author, no_merges)
+            except (pygit2.GitError, KeyError, ValueError) as e:
+                # libgit2 不支持的仓库格式（如新的仓库扩展）等情况，对该仓库回退到 git 子进程
+                print(f"警告: pygit2 读取仓库 {cwd} 失败，回退到 git 子进程: {e}")
+        return self._run_log_subprocess(cwd, target_date, end_date, author, no_merges, timeout)
+    
+    def _run_log_pygit2(self, cwd: str, target_date: datetime = None, end_date: datetime = None,
+                        author: str = None, no_merges: bool = False) -> List[Dict]:
+        """
+        进程内（pygit2）读取指定日期的提交，返回与 _run_log_subprocess 相同的记录
+        
+        与 git log --all --source 一致：先按引用名顺序为范围内各引用指向的提交记录来源，再加入 HEAD
+        （范围为 all 时还有各 worktree 的 HEAD），然后按提交时间从新到旧遍历，父提交沿用子提交的来源；
+        提交时间早于目标日期的提交不再向上遍历
+        """
+        pygit2 = load_pygit2()
+        start_time, end_time = self._date_window(target_date, end_date)
+        since, until = start_time.timestamp(), end_time.timestamp()
+        repo = pygit2.Repository(os.path.abspath(cwd))
+        scope = self.ref_scope_for(cwd)
         
-        # 格式化时间用于git log查询
+        tips = []
+        for name in sorted(repo.references):
+            if not scope.includes(name):
+                continue
+            try:
+                tips.append((name, repo.references[name].peel(pygit2.Commit).id))
+            except (pygit2.GitError, ValueError, KeyError):
+                # 指向非提交对象的引用（如指向 blob 的标签）
+                continue
+        if not repo.head_is_unborn:
+            tips.append(('HEAD', repo.head.peel(pygit2.Commit).id))
+        for name in (repo.list_worktrees() if scope.scope == REF_SCOPE_ALL else []):
+            try:
+                with open(os.path.join(repo.path, 'worktrees', name, 'HEAD'), 'r', encoding='utf-8') as f:
+                    head = f.read().strip()
+                if not head.startswith('ref:'):
+                    tips.append((f"worktrees/{name}/HEAD", pygit2.Oid(hex=head)))
+            except (OSError, ValueError):
+                continue
+        
+        sources = {}
+        heap = []
+        for name, oid in tips:
+            if oid in sources:
+                continue
+            sources[oid] = name
+            commit = repo[oid]
+            heapq.heappush(heap, (-commit.commit_time, len(sources), oid))
+        
+        records = []
+        while heap:
+            _, _, oid = heapq.heappop(heap)
+            commit = repo[oid]
+            if commit.commit_time < since:
+                continue
+            name = commit.author.raw_name.decode('utf-8', errors='replace')
+            if (commit.commit_time <= until and (author is None or name == author)
+                    and not (no_merges and len(commit.parent_ids) > 1)):
+                author_tz = timezone(timedelta(minutes=commit.author.offset))
+                message = commit.raw_message.decode('utf-8', errors='replace').strip('\n')
+                subject, _, body = message.partition('\n\n')
+                records.append({
+                    'hash': str(oid),
+                    'source': sources[oid],
+                    'author': name,
+                    'date': datetime.fromtimestamp(commit.author.time, author_tz).strftime('%Y-%m-%d %H:%M:%S'),
+                    'message': ' '.join(line.strip() for line in subject.splitlines()),  # 提交标题
+                    'body': body.strip(),  # 提交体(完整描述)
+                })
+            for parent_id in commit.parent_ids:
+                if parent_id not in sources:
+                    sources[parent_id] = sources[oid]
+                    heapq.heappush(heap, (-repo[parent_id].commit_time, len(sources), parent_id))
+        return records
+    
+    def _run_log_subprocess(self, cwd: str, target_date: datetime = None, end_date: datetime = None,
+                            author: str = None, no_merges: bool = False, timeout: float = None) -> List[Dict]:
+        """
+        在 cwd 下执行 git log --source（引用范围默认 --all），获取指定日期的提交；
+        作者和合并提交的过滤交给 git（--author 按子串匹配，返回前再按作者名完全一致过滤）
+        
+        Returns:
+            提交记录列表，每个记录包含：hash, source（到达该提交的引用名）, author, date, message, body
+        
+        Raises:
+            subprocess.TimeoutExpired: git log 超时
+        """
+        start_time, end_time = self._date_window(target_date, end_date)
         start_str = start_time.strftime('%Y-%m-%d 00:00:00')
         end_str = end_time.strftime('%Y-%m-%d 23:59:59')
         
-        commits = []
+        # 跨平台检测git命令位置（只查找一次）
+        git_cmd = git_executable()
         
-        try:
-            # 切换到仓库目录（使用绝对路径，跨平台兼容）
-            original_dir = os.getcwd()
-            repo_path_abs = os.path.abspath(repo_path)
-            os.chdir(repo_path_abs)
-            
-            # 执行git log命令，获取指定日期所有提交
-            # 使用--all获取所有分支的提交
-            # 跨平台检测git命令位置
-            git_cmd = shutil.which('git') or 'git'  # 优先使用which找到的git路径，找不到则使用'git'
-            
-            # 旧的格式(只有标题): '--pretty=format:%H|%an|%ad|%s',
-            # 新的格式(标题+完整提交体): 使用 %s 获取标题, %b 获取提交体
-            # 使用特殊分隔符 ||BODY|| 来区分标题和提交体
-            cmd = [git_cmd, 'log']
-            cmd.extend([
-                '--all',
-                '--since', start_str,
-                '--until', end_str,
-                '--pretty=format:%H|%an|%ad|%s||BODY||%b||END||',
-                '--date=format:%Y-%m-%d %H:%M:%S'
-            ])
-            
-            # Windows上设置shell=False，但需要处理可能的编码问题
-            result = subprocess.run(
-                cmd,
-                capture_output=True,
-                text=True,
-                timeout=30,
-                shell=False,  # 跨平台兼容，不使用shell
-                encoding='utf-8',  # 明确指定编码
-                errors='replace'  # 编码错误时替换而不是抛出异常
-            )
-            
-            # 旧的解析逻辑(只有标题):
-            # if result.returncode == 0 and result.stdout.strip():
-            #     for line in result.stdout.strip().split('\n'):
-            #         if '|' in line:
-            #             parts = line.split('|', 3)
-            #             if len(parts) >= 4:
-            #                 commits.append({
-            #                     'hash': parts[0][:7],  # 短hash
-            #                     'author': parts[1],
-            #                     'date': parts[2],
-            #                     'message': parts[3],
-            #                     'repo': os.path.basename(repo_path)
-            #                 })
-            
-            # 新的解析逻辑(标题+提交体):
-            if result.returncode == 0 and result.stdout.strip():
-                # 按 ||END|| 分隔每个提交
-                commit_blocks = result.stdout.strip().split('||END||')
-                for block in commit_blocks:
-                    block = block.strip()
-                    if not block or '||BODY||' not in block:
-                        continue
-                    
-                    # 分离基本信息和提交体
-                    if '||BODY||' in block:
-                        basic_info, body = block.split('||BODY||', 1)
-                        body = body.strip()
-                    else:
-                        basic_info = block
-                        body = ''
-                    
-                    # 解析基本信息: hash|author|date|subject
-                    if '|' in basic_info:
-                        parts = basic_info.split('|', 3)
-                        if len(parts) >= 4:
-                            commits.append({
-                                'hash': parts[0][:7],  # 短hash
-                                'author': parts[1],
-                                'date': parts[2],
-                                'message': parts[3],  # 提交标题
-                                'body': body,  # 提交体(完整描述)
-                                'repo': os.path.basename(repo_path)
-                            })
-            
-            os.chdir(original_dir)
+        # 按引用范围获取分支的提交（默认 --all），--source 记录到达每个提交的引用（用于归属到 worktree）
+        # 格式: %s 获取标题, %b 获取提交体，使用特殊分隔符 ||BODY|| 来区分标题和提交体
+        cmd = [
+            git_cmd, 'log',
+            *self.ref_scope_for(cwd).log_args(),
+            '--source',
+            '--since', start_str,
+            '--until', end_str,
+            '--pretty=format:%H|%S|%an|%ad|%s||BODY||%b||END||',
+            '--date=format:%Y-%m-%d %H:%M:%S'
+        ]
+        if author:
+            cmd.extend(['--fixed-strings', f'--author={author}'])
+        if no_merges:
+            cmd.append('--no-merges')
+        # 工作区中恰好有名为 HEAD 的文件时避免歧义
+        cmd.append('--')
+        
+        # 通过 cwd 指定仓库目录，不切换进程工作目录（多线程安全）
+        result = subprocess.run(
+            cmd,
+            capture_output=True,
+            text=True,
+            timeout=GIT_LOG_TIMEOUT if timeout is None else timeout,
+            shell=False,  # 跨平台兼容，不使用shell
+            encoding='utf-8',  # 明确指定编码
+            errors='replace',  # 编码错误时替换而不是抛出异常
+            cwd=os.path.abspath(cwd),
+        )
+        
+        records = []
+        if result.returncode == 0 and result.stdout.strip():
+            # 按 ||END|| 分隔每个提交
+            for block in result.stdout.strip().split('||END||'):
+                block = block.strip()
+                if not block or '||BODY||' not in block:
+                    continue
+                
+                # 分离基本信息和提交体，解析基本信息: hash|source|author|date|subject
+                basic_info, body = block.split('||BODY||', 1)
+                parts = basic_info.split('|', 4)
+                if len(parts) >= 5 and (author is None or parts[2] == author):
+                    records.append({
+                        'hash': parts[0],
+                        'source': parts[1],
+                        'author': parts[2],
+                        'date': parts[3],
+                        'message': parts[4],  # 提交标题
+                        'body': body.strip(),  # 提交体(完整描述)
+                    })
+        return records
+    
+    @staticmethod
+    def _to_commit(record: Dict, repo_path: str) -> Dict:
+        return {
+            'hash': record['hash'],  # 完整hash（展示时截短）
+            'author': record['author'],
+            'date': record['date'],
+            'message': record['message'],
+            'body': record['body'],
+            'repo': os.path.basename(repo_path)
+        }
+    
+    def get_commits_by_date(self, repo_path: str, target_date: datetime = None) -> List[Dict]:
+        """
+        获取指定仓库指定日期的所有提交记录
+        
+        Args:
+            repo_path: Git仓库路径
+            target_date: 目标日期，默认为今天
             
+        Returns:
+            提交记录列表，每个记录包含：author, date, message, hash
+        """
+        if not os.path.exists(os.path.join(repo_path, '.git')):
+            return []
+        
+        commits = []
+        try:
+            commits = [self._to_commit(r, repo_path) for r in self._run_log(repo_path, target_date)]
         except subprocess.TimeoutExpired:
             print(f"警告: 获取仓库 {repo_path} 的提交记录超时")
         except Exception as e:
@@ -184,6 +783,32 @@ class GitService:
         
         return commits
     
+    def _get_store_commits(self, checkouts: List[Dict], target_date: datetime = None,
+                           end_date: datetime = None, author: str = None, no_merges: bool = False,
+                           timeout: float = None) -> List[Dict]:
+        """
+        对一个对象库只执行一次 git log，按 --source 引用把提交归属到对应检出目录：
+        引用是某个 worktree 的 HEAD（或其所在分支）时归属该 worktree，否则归属主检出
+        
+        Raises:
+            subprocess.TimeoutExpired: git log 超时（由调用方记录到耗时历史）
+        """
+        primary = checkouts[0]['path']
+        owners = {}
+        for checkout in checkouts:
+            for source in checkout['sources']:
+                owners.setdefault(source, checkout['path'])
+        
+        commits = []
+        try:
+            for record in self._run_log(primary, target_date, end_date, author, no_merges, timeout):
+                commits.append(self._to_commit(record, owners.get(record['source'], primary)))
+        except subprocess.TimeoutExpired:
+            raise
+        except Exception as e:
+            print(f"错误: 获取仓库 {primary} 的提交记录失败: {str(e)}")
+        return commits
+    
     def get_today_commits(self, repo_path: str) -> List[Dict]:
         """
         获取指定仓库今日的所有提交记录
@@ -196,30 +821,229 @@ class GitService:
         """
         return self.get_commits_by_date(repo_path, datetime.now())
     
-    def get_all_commits_by_date(self, repo_paths: List[str] = None, target_date: datetime = None) -> List[Dict]:
+    def get_all_commits_by_date(self, repo_paths: List[str] = None, target_date: datetime = None,
+                                author: str = None, no_merges: bool = False) -> List[Dict]:
         """
-        获取所有指定仓库指定日期的提交记录
+        获取所有指定仓库指定日期的提交记录（共享对象库的 worktree 只执行一次 git log）
         
         Args:
             repo_paths: Git仓库路径列表，如果为None则使用discover_git_repos的结果
             target_date: 目标日期，默认为今天
+            author: 只获取该作者的提交
+            no_merges: 不获取合并提交
             
         Returns:
             所有仓库指定日期的提交记录列表
         """
+        return self.get_all_commits_by_range(repo_paths, target_date, target_date, author, no_merges)
+    
+    def get_all_commits_by_range(self, repo_paths: List[str] = None, start_date: datetime = None,
+                                 end_date: datetime = None, author: str = None,
+                                 no_merges: bool = False) -> List[Dict]:
+        """
+        获取所有指定仓库在日期范围内（含两端）的提交记录，每个对象库只执行一次 git log
+        
+        Args:
+            repo_paths: Git仓库路径列表，如果为None则使用discover_git_repos的结果
+            start_date: 开始日期，默认为今天
+            end_date: 结束日期，默认与开始日期相同
+            author: 只获取该作者（user.name）的提交，过滤交给 git log --author
+            no_merges: 不获取合并提交（git log --no-merges；spool 不记录父提交，此时不读取 spool）
+            
+        Returns:
+            所有仓库日期范围内的提交记录列表（按时间倒序）
+        """
         if repo_paths is None:
             repo_paths = self.git_repos if self.git_repos else self.discover_git_repos()
         
+        groups = self.group_by_object_store(repo_paths)
+        shared = sum(len(c) for c in groups.values() if len(c) > 1)
+        if shared:
+            print(f"  {shared} 个 worktree 检出共享对象库，合并为 {sum(1 for c in groups.values() if len(c) > 1)} 次扫描")
+        
+        # 活跃度预筛选：对象库的引用在开始日期之后没有任何变动时，范围内不可能有新提交，跳过 git log
+        skipped = 0
+        spooled = {}
+        window_start, window_end = self._date_window(start_date, end_date)
+        if self.prefilter:
+            use_spool = self.spool is not None and not no_merges
+            spool = self.spool.read(window_start) if use_spool else {}
+            installed = self.spool.installed() if use_spool else {}
+            active = {}
+            for common_dir, checkouts in groups.items():
+                git_dirs = [c['git_dir'] for c in checkouts]
+                activity = self.last_ref_activity(common_dir, git_dirs)
+                if activity < window_start.timestamp():
+                    skipped += 1
+                    continue
+                # 钩子在窗口开始前已安装、没有 amend/rebase 改写记录、且最近一次引用变动就是钩子记录的提交时，
+                # spool 即该对象库窗口内的完整提交；否则（pull/fetch/merge/reset 等）执行 git log 核对。
+                # spool 不记录提交可由哪些引用到达，引用范围有排除项时同样执行 git log
+                store = spool.get(common_dir)
+                if (store and not store['rewritten']
+                        and not self.ref_scope_for(checkouts[0]['path']).exclude
+                        and installed.get(common_dir, float('inf')) <= window_start.timestamp()
+                        and activity <= store['last'] + CLOCK_SLACK):
+                    spooled[common_dir] = checkouts
+                else:
+                    active[common_dir] = checkouts
+            groups = active
+            if skipped:
+                print(f"  预筛选跳过 {skipped} 个目标日期以来无引用变动的仓库")
+            if spooled:
+                print(f"  {len(spooled)} 个仓库从提交 spool 读取，{len(groups)} 个仓库执行 git log")
+        self.last_skipped = skipped
+        self.last_spooled = len(spooled)
+        
         all_commits = []
         
-        for repo_path in repo_paths:
-            commits = self.get_commits_by_date(repo_path, target_date)
+        for common_dir, checkouts in spooled.items():
+            selected = CommitSpool.select(spool[common_dir], checkouts, window_start, window_end)
+            for owner, record in selected:
+                if author is not None and record['author'] != author:
+                    continue
+                all_commits.append(self._to_commit(record, owner))
+                self.commit_paths[record['hash']] = owner
+        
+        # 连续超时的仓库熔断跳过；其余按历史耗时从慢到快并行收集，超时按各仓库历史耗时设定
+        order = list(groups)
+        self.last_broken = []
+        self.last_timed_out = []
+        if self.history:
+            self.last_broken = [checkouts[0]['path'] for d, checkouts in groups.items() if self.history.is_open(d)]
+            order = self.history.schedule([d for d in order if not self.history.is_open(d)])
+        
+        def collect(common_dir):
+            checkouts = groups[common_dir]
+            timeout = self.history.timeout(common_dir) if self.history else None
+            with telemetry.span('get_commits_by_date', CATEGORY_REPO, repo=checkouts[0]['path']) as span:
+                start = time.perf_counter()
+                try:
+                    commits = self._get_store_commits(checkouts, start_date, end_date, author, no_merges, timeout)
+                except subprocess.TimeoutExpired:
+                    commits = None
+                    span['timeout'] = timeout or GIT_LOG_TIMEOUT
+                    print(f"警告: 获取仓库 {checkouts[0]['path']} 的提交记录超时（{span['timeout']:.0f} 秒）")
+                    self.last_timed_out.append(checkouts[0]['path'])
+                if self.history:
+                    self.history.record(common_dir, time.perf_counter() - start, None if commits is not None else timeout)
+                span['commits'] = len(commits or [])
+                if len(checkouts) > 1:
+                    span['checkouts'] = len(checkouts)
+            return commits or []
+        
+        with ThreadPoolExecutor(max_workers=self.workers) as pool:
+            results = dict(zip(order, pool.map(collect, order)))
+        # 按原有仓库顺序合并，结果与调度顺序无关
+        for common_dir, checkouts in groups.items():
+            commits = results.get(common_dir, [])
+            self.commit_paths.update((c['hash'], checkouts[0]['path']) for c in commits)
             all_commits.extend(commits)
+        if self.last_broken:
+            print(f"  ⚠ {len(self.last_broken)} 个仓库连续超时，已熔断跳过（冷却后自动重试）: {', '.join(self.last_broken)}")
         
         # 按时间排序
         all_commits.sort(key=lambda x: x.get('date', ''), reverse=True)
         
-        return all_commits
+        unique = self.dedupe_commits(all_commits)
+        if self.last_duplicates:
+            print(f"  跨仓库去重合并 {self.last_duplicates} 条重复提交（同一项目的多个克隆/cherry-pick）")
+        return unique
+    
+    def save_history(self):
+        """把本次收集的耗时记录写回历史文件（未启用耗时历史时不做任何事）"""
+        if self.history:
+            self.history.save()
+    
+    @staticmethod
+    def _with_also_in(commit: Dict, duplicate: Dict) -> Dict:
+        """返回记录了重复副本所在仓库（also_in）的提交副本，不修改原记录"""
+        repos = [*commit.get('also_in', []), duplicate.get('repo', ''), *duplicate.get('also_in', [])]
+        repos = [r for r in dict.fromkeys(repos) if r and r != commit.get('repo')]
+        return dict(commit, also_in=repos) if repos else commit
+    
+    def dedupe_commits(self, commits: List[Dict]) -> List[Dict]:
+        """
+        跨仓库去重：同一项目的多个克隆/fork 中的同一提交按完整 hash 只保留一条；
+        开启 patch-id 去重时，作者和标题相同但 hash 不同的提交再按 git patch-id --stable 比较，
+        改动相同的 cherry-pick 只保留一条。保留的提交在 also_in 中记录其他副本所在的仓库
+        
+        Args:
+            commits: 提交记录（每组重复中保留最先出现的一条，顺序不变）
+            
+        Returns:
+            去重后的提交记录列表
+        """
+        kept: Dict[str, int] = {}
+        unique = []
+        for commit in commits:
+            index = kept.get(commit.get('hash'))
+            if index is None:
+                if commit.get('hash'):
+                    kept[commit['hash']] = len(unique)
+                unique.append(commit)
+            else:
+                unique[index] = self._with_also_in(unique[index], commit)
+        if self.dedupe_patch_id:
+            unique = self._dedupe_patch_ids(unique)
+        self.last_duplicates = len(commits) - len(unique)
+        return unique
+    
+    def _dedupe_patch_ids(self, commits: List[Dict]) -> List[Dict]:
+        """按 patch-id 合并 cherry-pick：只对作者和标题都相同的候选提交计算 patch-id"""
+        groups = defaultdict(list)
+        for commit in commits:
+            groups[(commit.get('author'), commit.get('message'))].append(commit)
+        candidates = [c for group in groups.values() if len(group) > 1 for c in group]
+        if not candidates:
+            return commits
+        patch_ids = self._patch_ids(candidates)
+        kept: Dict[tuple, int] = {}
+        unique = []
+        for commit in commits:
+            patch_id = patch_ids.get(commit.get('hash'))
+            key = (commit.get('author'), commit.get('message'), patch_id)
+            index = kept.get(key) if patch_id else None
+            if index is None:
+                if patch_id:
+                    kept[key] = len(unique)
+                unique.append(commit)
+            else:
+                unique[index] = self._with_also_in(unique[index], commit)
+        return unique
+    
+    def _patch_ids(self, commits: List[Dict]) -> Dict[str, str]:
+        """
+        按仓库分批计算提交的 patch-id（git show -p | git patch-id --stable），结果按 hash 缓存；
+        没有改动的提交（空提交、合并提交）没有 patch-id，记为空串，不参与合并
+        """
+        by_path = defaultdict(list)
+        for commit in commits:
+            commit_hash = commit.get('hash')
+            if commit_hash not in self.patch_ids and commit_hash in self.commit_paths:
+                by_path[self.commit_paths[commit_hash]].append(commit_hash)
+        git = git_executable()
+        for path, hashes in by_path.items():
+            with telemetry.span('patch_id', CATEGORY_REPO, repo=path, commits=len(hashes)):
+                try:
+                    show = subprocess.run(
+                        [git, 'show', '--no-color', '--no-ext-diff', '--format=commit %H', '-p', *hashes],
+                        cwd=path, capture_output=True, timeout=30, check=True,
+                    )
+                    result = subprocess.run(
+                        [git, 'patch-id', '--stable'],
+                        cwd=path, input=show.stdout, capture_output=True, timeout=30, check=True,
+                    )
+                except (subprocess.SubprocessError, OSError) as e:
+                    print(f"警告: 计算仓库 {path} 的 patch-id 失败: {str(e)}")
+                    continue
+            for line in result.stdout.decode('ascii', 'replace').splitlines():
+                parts = line.split()
+                if len(parts) == 2:
+                    self.patch_ids[parts[1]] = parts[0]
+            for commit_hash in hashes:
+                self.patch_ids.setdefault(commit_hash, '')
+        return self.patch_ids
     
     def get_all_today_commits(self, repo_paths: List[str] = None) -> List[Dict]:
         """
@@ -257,7 +1081,7 @@ class GitService:
         Returns:
             当前用户 Git 名称，获取失败时返回空字符串
         """
-        git_cmd = shutil.which('git') or 'git'
+        git_cmd = git_executable()
         cmd = [git_cmd, 'config', 'user.name']
         cwd = None
         if repo_path and os.path.exists(os.path.join(os.path.abspath(repo_path), '.git')):
@@ -0,0 +1,157 @@
+"""
+发布发件箱服务层 - 持久化记录每天生成的简报及其 CRM 发布状态，支持失败后仅重试发布步骤；
+状态的读取-修改-写回在进程间文件锁内完成，多个进程同时入队/发布时不会互相覆盖或重复发布
+"""
+import hashlib
+import json
+import os
+from datetime import datetime
+from typing import Dict, List, Optional
+
+from config import CRM_USERNAME, OUTBOX_DIR_NAME, REPORT_SAVE_DIR
+from service.atomic_file import write_atomic
+from service.brief_parser import Brief
+from service.run_lock import FileLock
+
+# 发布状态
+STATE_PENDING = 'pending'        # 已生成，待发布
+STATE_PUBLISHING = 'publishing'  # 正在发布（若进程中断停留在此状态，发布结果未知）
+STATE_PUBLISHED = 'published'    # 已发布
+STATE_FAILED = 'failed'          # 发布失败，可重试
+
+
+class OutboxService:
+    """发布发件箱：每个日期一条记录，保存在 REPORT_SAVE_DIR/outbox/YYYYMMDD.json"""
+
+    def __init__(self, outbox_dir: str = None, username: str = None):
+        """
+        Args:
+            outbox_dir: 发件箱目录，默认 REPORT_SAVE_DIR/outbox
+            username: CRM 用户名，参与生成幂等键
+        """
+        self.outbox_dir = outbox_dir or os.path.join(REPORT_SAVE_DIR, OUTBOX_DIR_NAME)
+        self.username = username if username is not None else CRM_USERNAME
+        self.lock = FileLock(os.path.join(self.outbox_dir, '.outbox.lock'))
+
+    def idempotency_key(self, date: str) -> str:
+        """同一用户同一天的幂等键（一天只发布一次）"""
+        return hashlib.sha1(f"{self.username}|{date}".encode('utf-8')).hexdigest()[:16]
+
+    def _path(self, date: str) -> str:
+        return os.path.join(self.outbox_dir, f"{date}.json")
+
+    def _write(self, entry: Dict):
+        # 原子写入：发布状态不会因进程中断而损坏
+        write_atomic(self._path(entry['date']), json.dumps(entry, ensure_ascii=False, indent=2), keep_versions=0)
+
+    def get(self, date: str) -> Optional[Dict]:
+        """读取指定日期的记录，不存在时返回 None"""
+        path = self._path(date)
+        if not os.path.exists(path):
+            return None
+        with open(path, 'r', encoding='utf-8') as f:
+            entry = json.load(f)
+        # 用户名变更后旧记录不再适用
+        if entry.get('idempotency_key') != self.idempotency_key(date):
+            return None
+        return entry
+
+    def enqueue(self, brief: Brief, date: str = None) -> Dict:
+        """
+        记录生成的简报。当天已发布时不覆盖（保证不会重复发布），否则更新为最新简报并置为待发布
+
+        Args:
+            brief: 已通过校验的结构化简报
+            date: 日期 YYYYMMDD，默认今天
+
+        Returns:
+            发件箱记录
+        """
+        date = date or datetime.now().strftime('%Y%m%d')
+        with self.lock:
+            entry = self.get(date)
+            now = datetime.now().isoformat(timespec='seconds')
+            if entry and entry['state'] == STATE_PUBLISHED:
+                return entry
+            if entry is None:
+                entry = {
+                    'date': date,
+                    'idempotency_key': self.idempotency_key(date),
+                    'attempts': 0,
+                    'created_at': now,
+                    'published_at': None,
+                    'last_error': None,
+                }
+            entry['brief'] = brief.to_dict()
+            # 上次发布结果未知时保持 publishing，需显式 --force 才会重试
+            if entry.get('state') != STATE_PUBLISHING:
+                entry['state'] = STATE_PENDING
+            entry['updated_at'] = now
+            self._write(entry)
+            return entry
+
+    def claim(self, date: str, include_in_flight: bool = False) -> Optional[Dict]:
+        """
+        认领一条记录准备发布：在锁内确认仍未发布后置为 publishing 并返回；
+        已发布、或已被其他进程认领（publishing）时返回 None
+
+        Args:
+            include_in_flight: 是否也认领停留在 publishing 状态（上次发布中断）的记录
+        """
+        states = {STATE_PENDING, STATE_FAILED}
+        if include_in_flight:
+            states.add(STATE_PUBLISHING)
+        with self.lock:
+            entry = self.get(date)
+            if entry is None or entry['state'] not in states:
+                return None
+            return self._mark(entry, STATE_PUBLISHING)
+
+    def mark(self, date: str, state: str, error: str = None) -> Dict:
+        """更新记录的发布状态"""
+        with self.lock:
+            entry = self.get(date)
+            if entry is None:
+                raise KeyError(f"发件箱中没有 {date} 的记录")
+            return self._mark(entry, state, error)
+
+    def _mark(self, entry: Dict, state: str, error: str = None) -> Dict:
+        now = datetime.now().isoformat(timespec='seconds')
+        entry['state'] = state
+        entry['updated_at'] = now
+        if state == STATE_PUBLISHING:
+            entry['attempts'] = entry.get('attempts', 0) + 1
+        elif state == STATE_PUBLISHED:
+            entry['published_at'] = now
+            entry['last_error'] = None
+        elif state == STATE_FAILED:
+            entry['last_error'] = error
+        self._write(entry)
+        return entry
+
+    def entries(self) -> List[Dict]:
+        """按日期顺序列出所有记录"""
+        if not os.path.isdir(self.outbox_dir):
+            return []
+        result = []
+        for name in sorted(os.listdir(self.outbox_dir)):
+            if name.endswith('.json'):
+                entry = self.get(name[:-len('.json')])
+                if entry:
+                    result.append(entry)
+        return result
+
+    def pending(self, include_in_flight: bool = False) -> List[Dict]:
+        """
+        列出未发布的记录
+
+        Args:
+            include_in_flight: 是否包含停留在 publishing 状态（结果未知）的记录
+        """
+        states = {STATE_PENDING, STATE_FAILED}
+        if include_in_flight:
+            states.add(STATE_PUBLISHING)
+        return [e for e in self.entries() if e['state'] in states]
+
+    def brief_of(self, entry: Dict) -> Brief:
+        return Brief.from_dict(entry['brief'])
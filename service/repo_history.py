@@ -0,0 +1,129 @@
+"""
+仓库收集耗时历史服务层 - 跨运行记录每个对象库 git log 的耗时与超时情况，用于：
+按历史耗时从慢到快调度并行收集、按历史耗时设定每个仓库的超时、以及对连续超时的仓库熔断（暂时跳过并提示）
+"""
+import json
+import os
+import threading
+import time
+from typing import Dict, List, Optional
+
+from config import (
+    COMMIT_CACHE_DIR_NAME,
+    GIT_BREAKER_COOLDOWN_HOURS,
+    GIT_BREAKER_THRESHOLD,
+    GIT_LOG_TIMEOUT,
+    GIT_LOG_TIMEOUT_FACTOR,
+    GIT_LOG_TIMEOUT_MAX,
+    GIT_LOG_TIMEOUT_MIN,
+    REPORT_SAVE_DIR,
+)
+from service.atomic_file import write_atomic
+from service.run_lock import FileLock
+
+# 每个仓库保留的最近耗时条数
+HISTORY_SIZE = 10
+
+
+class RepoHistory:
+    """
+    各对象库的收集耗时历史（线程安全，修改后调用 save 写回文件；写回时在文件锁内合并其他进程的记录）
+
+    记录格式: {common_dir: {'durations': [最近成功收集的耗时（秒）], 'timeouts': 连续超时次数,
+                            'last_timeout': 最近一次超时使用的超时秒数, 'opened_at': 熔断开始的时间戳}}
+    """
+
+    def __init__(self, path: str = None):
+        """
+        Args:
+            path: 历史文件，默认 reports/cache/repo_history.json
+        """
+        self.path = path or os.path.join(REPORT_SAVE_DIR, COMMIT_CACHE_DIR_NAME, 'repo_history.json')
+        self._lock = threading.Lock()
+        # 本进程更新过的对象库
+        self._updated = set()
+        self.repos: Dict[str, Dict] = self._load()
+
+    def _load(self) -> Dict[str, Dict]:
+        try:
+            with open(self.path, 'r', encoding='utf-8') as f:
+                return json.load(f)
+        except (OSError, ValueError):
+            return {}
+
+    def estimate(self, common_dir: str) -> Optional[float]:
+        """预计耗时：最近几次成功收集耗时的最大值；连续超时时为上次的超时秒数；没有历史时返回 None"""
+        entry = self.repos.get(common_dir, {})
+        if entry.get('timeouts'):
+            return entry.get('last_timeout', GIT_LOG_TIMEOUT)
+        durations = entry.get('durations')
+        return max(durations) if durations else None
+
+    def schedule(self, common_dirs: List[str]) -> List[str]:
+        """
+        从慢到快排序：没有历史的仓库（可能是新发现的大仓库）排在最前，其余按预计耗时倒序；
+        并行收集时最慢的仓库最先开始，不会拖在最后
+        """
+        def key(common_dir):
+            estimate = self.estimate(common_dir)
+            return (estimate is not None, -(estimate or 0))
+        return sorted(common_dirs, key=key)
+
+    def timeout(self, common_dir: str) -> float:
+        """
+        git log 超时秒数：没有历史时为 GIT_LOG_TIMEOUT；有成功记录时为最近最大耗时的 GIT_LOG_TIMEOUT_FACTOR 倍；
+        上次超时时加倍；均限制在 [GIT_LOG_TIMEOUT_MIN, GIT_LOG_TIMEOUT_MAX]
+        """
+        entry = self.repos.get(common_dir, {})
+        if entry.get('timeouts'):
+            timeout = entry.get('last_timeout', GIT_LOG_TIMEOUT) * 2
+        elif entry.get('durations'):
+            timeout = max(entry['durations']) * GIT_LOG_TIMEOUT_FACTOR
+        else:
+            timeout = GIT_LOG_TIMEOUT
+        return min(max(timeout, GIT_LOG_TIMEOUT_MIN), GIT_LOG_TIMEOUT_MAX)
+
+    def is_open(self, common_dir: str, now: float = None) -> bool:
+        """
+        熔断中：连续超时达到 GIT_BREAKER_THRESHOLD 次，且距上次超时不到 GIT_BREAKER_COOLDOWN_HOURS 小时；
+        冷却结束后放行一次，成功则恢复，再次超时则重新熔断
+        """
+        entry = self.repos.get(common_dir, {})
+        if entry.get('timeouts', 0) < GIT_BREAKER_THRESHOLD:
+            return False
+        now = time.time() if now is None else now
+        return now - entry.get('opened_at', 0) < GIT_BREAKER_COOLDOWN_HOURS * 3600
+
+    def record(self, common_dir: str, duration: float, timeout: float = None):
+        """
+        记录一次收集结果
+
+        Args:
+            duration: 耗时（秒）
+            timeout: 超时时传入本次使用的超时秒数，成功时为 None
+        """
+        with self._lock:
+            entry = self.repos.setdefault(common_dir, {'durations': [], 'timeouts': 0})
+            if timeout is None:
+                entry['durations'] = (entry.get('durations', []) + [round(duration, 3)])[-HISTORY_SIZE:]
+                entry['timeouts'] = 0
+                entry.pop('last_timeout', None)
+                entry.pop('opened_at', None)
+            else:
+                entry['timeouts'] = entry.get('timeouts', 0) + 1
+                entry['last_timeout'] = timeout
+                if entry['timeouts'] >= GIT_BREAKER_THRESHOLD:
+                    entry['opened_at'] = time.time()
+            self._updated.add(common_dir)
+
+    def save(self):
+        """有新记录时写回历史文件：重新读取文件，只覆盖本进程更新过的对象库，其余保留其他进程写入的记录"""
+        with self._lock:
+            if not self._updated:
+                return
+            updated = {d: dict(self.repos[d]) for d in self._updated}
+            self._updated = set()
+        with FileLock(self.path + '.lock'):
+            repos = self._load()
+            repos.update(updated)
+            write_atomic(self.path, json.dumps(repos, ensure_ascii=False, indent=2), keep_versions=0)
@@ -2,10 +2,40 @@
 日报生成服务层 - 处理日报内容生成的业务逻辑
 """
 import os
+import unicodedata
 from datetime import datetime
-from typing import List, Dict, Optional
-from collections import defaultdict
+from typing import List, Dict, Optional, Union
 from config import BRIEF_SYSTEM_MODIFIER, REPORT_SAVE_DIR, REPORT_FILE_FORMAT, BRIEF_FILE_FORMAT
+from service.atomic_file import write_atomic
+from service.brief_parser import Brief
+from service.commit_store import CommitStore
+from service.telemetry_service import telemetry, CATEGORY_IO, CATEGORY_STAGE
+
+# 统一的简报格式要求：要求模型输出 JSON 对象，由 Brief.parse 一次性解析
+# （当前不输出时间前缀，如 10:20-12:00：）
+BRIEF_FORMAT_INSTRUCTION = (
+    "请严格以 JSON 对象格式输出，只包含以下三个字段，不要添加任何其他内容：\n\n"
+    "{\n"
+    '  "morning": ["上午的工作内容条目，例如：优化证书关联关系的逻辑代码", "..."],\n'
+    '  "afternoon": ["下午的工作内容条目，例如：完成变更管理优化方案的讨论和联调测试", "..."],\n'
+    '  "learning": "今日计划的学习内容和学习进度，例如：学习Spring Boot配置管理相关技术，已完成基础概念学习"\n'
+    "}\n\n"
+    "字段含义：morning 对应「*上午时间安排与工作内容」，afternoon 对应「*下午时间安排与工作内容」，"
+    "learning 对应「*今日计划的学习内容与进度」。\n\n"
+    "注意：\n"
+    "1. 上午和下午的工作内容要基于提交记录合理分配，每个条目只写内容，不要加时间（禁止 10:20-12:00：、09:00-12:00： 等格式），也不要加序号\n"
+    "2. 学习内容要合理，可以基于工作内容推断相关技术学习\n"
+    "3. 只输出这个 JSON 对象，不要添加标题、日期等前缀\n"
+    "4. 今日计划的学习内容与进度随机生成,有时生成有时候不生成,占比百分之30生成,百分之70不生成,如果本次不生成,learning 填写\"无\"\n"
+)
+
+# 团队报告按时段统计的分段（小时区间）
+TIME_OF_DAY_BUCKETS = [
+    ("凌晨 00-06", range(0, 6)),
+    ("上午 06-12", range(6, 12)),
+    ("下午 12-18", range(12, 18)),
+    ("晚间 18-24", range(18, 24)),
+]
 
 
 class ReportService:
@@ -52,7 +82,7 @@ class ReportService:
         yesterday_commits: List[Dict],
         my_author: str,
         deepseek_service,
-    ) -> str:
+    ) -> Brief:
         """
         当今日无任何提交时，基于昨天的提交记录创造性生成今日简报。
         重点：内容要与昨天不同，要有创造性改写，避免被发现是复制。
@@ -63,28 +93,8 @@ class ReportService:
             deepseek_service: DeepSeekService 实例
             
         Returns:
-            创造性改写的简报内容
+            创造性改写的结构化简报
         """
-        # 统一的格式要求
-        format_instruction = (
-            "请严格按照以下格式输出，只包含三个字段，不要添加任何其他内容：\n\n"
-            "*上午时间安排与工作内容\n"
-            "[这里填写上午的工作内容，每条不要带时间，直接写内容。例如：\n"
-            " 1. 优化证书关联关系的逻辑代码\n"
-            " 2. 完成变更管理优化方案的讨论和联调测试]\n\n"
-            "*下午时间安排与工作内容\n"
-            "[这里填写下午的工作内容，每条不要带时间，直接写内容。例如：\n"
-            " 1. 完成变更管理优化方案的讨论和联调测试\n"
-            " 2. 优化证书关联关系的逻辑代码]\n\n"
-            "*今日计划的学习内容与进度\n"
-            "[这里填写今日计划的学习内容和学习进度，例如：学习Spring Boot配置管理相关技术，已完成基础概念学习]\n\n"
-            "注意：\n"
-            "1. 上午和下午的工作内容要基于提交记录合理分配，但每条内容前不要加时间（禁止 10:20-12:00：、09:00-12:00： 等格式），只写序号和内容，如「1. xxx」「2. xxx」\n"
-            "2. 学习内容要合理，可以基于工作内容推断相关技术学习\n"
-            "3. 只输出这三个字段的内容，不要添加标题、日期等前缀\n"
-            "4. 今日计划的学习内容与进度随机生成,有时生成有时候不生成,占比百分之30生成,百分之70不生成,如果本次不生成,生成一个无\n"
-        )
-        
         system = (
             "你是工作日报助手。今天团队没有任何代码提交，但你需要基于昨天的提交记录生成今日的工作简报。\n\n"
             "**重要要求：**\n"
@@ -95,7 +105,7 @@ class ReportService:
             "5. 学习内容要换一个相关但不同的技术点\n"
             "6. 使用不同的技术细节描述，让内容看起来是今天新做的工作\n\n"
             f"{BRIEF_SYSTEM_MODIFIER}\n\n"
-            + format_instruction
+            + BRIEF_FORMAT_INSTRUCTION
         )
         
         user = (
@@ -105,51 +115,52 @@ class ReportService:
         )
         
         try:
-            return deepseek_service.chat(system=system, user=user, max_tokens=1024)
+            text = deepseek_service.chat(system=system, user=user, max_tokens=1024, json_mode=True)
         except Exception as e:
-            return f"[基于昨日提交生成简报失败] {e!r}"
+            return Brief(raw=f"[基于昨日提交生成简报失败] {e!r}")
+        return Brief.parse(text)
+    
+    def _resolve_report_date(self, store: CommitStore, report_date: datetime = None) -> datetime:
+        """清单日期：优先使用指定日期；未指定时，提交都在同一天则取该天，否则取今天"""
+        if report_date is not None:
+            return report_date
+        days = store.days()
+        if len(days) == 1:
+            return datetime.strptime(days[0], '%Y-%m-%d')
+        return datetime.now()
     
-    def generate_commit_list(self, commits: List[Dict]) -> str:
+    def generate_commit_list(self, commits: Union[List[Dict], CommitStore], report_date: datetime = None) -> str:
         """
-        生成今日提交清单
+        生成提交清单
         
         Args:
-            commits: 提交记录列表
+            commits: 提交记录列表或已建立索引的 CommitStore
+            report_date: 清单日期，默认取提交所在日期（提交跨多天或无提交时为今天）
             
         Returns:
             格式化的提交清单字符串
         """
-        if not commits:
+        store = commits if isinstance(commits, CommitStore) else CommitStore(commits)
+        if not store:
             return "今日无提交记录"
-        
-        # 按作者分组
-        commits_by_author = defaultdict(list)
-        for commit in commits:
-            author = commit.get('author', '未知')
-            commits_by_author[author].append(commit)
+        report_date = self._resolve_report_date(store, report_date)
         
         # 生成清单内容
         report_lines = []
         report_lines.append("=" * 60)
-        report_lines.append(f"今日提交清单 - {datetime.now().strftime('%Y年%m月%d日')}")
+        report_lines.append(f"今日提交清单 - {report_date.strftime('%Y年%m月%d日')}")
         report_lines.append("=" * 60)
         report_lines.append("")
         
-        # 按作者分组显示
-        for author, author_commits in sorted(commits_by_author.items()):
+        # 按作者分组显示（作者索引），作者内按仓库分组
+        for author, author_commits in store.group('author').items():
             report_lines.append(f"【{author}】")
             report_lines.append("-" * 60)
             
-            # 按仓库分组
-            commits_by_repo = defaultdict(list)
-            for commit in author_commits:
-                repo = commit.get('repo', '未知仓库')
-                commits_by_repo[repo].append(commit)
-            
-            for repo, repo_commits in sorted(commits_by_repo.items()):
+            for repo, repo_commits in store.group('repo', author_commits).items():
                 report_lines.append(f"  仓库: {repo}")
                 for commit in repo_commits:
-                    hash_val = commit.get('hash', '')
+                    hash_val = store.short_hash(commit)
                     message = commit.get('message', '')
                     body = commit.get('body', '')
                     time = commit.get('date', '')
@@ -159,6 +170,8 @@ class ReportService:
                     
                     # 新的显示方式(标题+完整提交体):
                     report_lines.append(f"    [{hash_val}] {time} - {message}")
+                    if commit.get('also_in'):
+                        report_lines.append(f"      （同一提交也在: {', '.join(commit['also_in'])}）")
                     # 如果有提交体,缩进显示
                     if body:
                         # 将提交体按行分割,每行前面加上缩进
@@ -170,40 +183,147 @@ class ReportService:
             
             report_lines.append("")
         
-        # 统计信息
+        # 统计信息（直接读索引）
+        stats = store.stats()
         report_lines.append("=" * 60)
         report_lines.append("统计信息:")
-        report_lines.append(f"  总提交数: {len(commits)}")
-        report_lines.append(f"  参与人员: {len(commits_by_author)}")
-        report_lines.append(f"  涉及仓库: {len(set(c.get('repo', '') for c in commits))}")
+        report_lines.append(f"  总提交数: {stats['commits']}")
+        report_lines.append(f"  参与人员: {stats['authors']}")
+        report_lines.append(f"  涉及仓库: {stats['repos']}")
         report_lines.append("=" * 60)
         
         return "\n".join(report_lines)
     
-    def generate_daily_report(self, commits: List[Dict]) -> str:
+    def generate_daily_report(self, commits: List[Dict], report_date: datetime = None) -> str:
         """
         生成完整的日报内容
         
         Args:
             commits: 提交记录列表
+            report_date: 日报日期，默认取提交所在日期（无提交时为今天）
             
         Returns:
             完整的日报内容字符串
         """
+        with telemetry.span('generate_daily_report', CATEGORY_STAGE, commits=len(commits)):
+            return self._render_daily_report(commits, report_date)
+    
+    def _render_daily_report(self, commits: List[Dict], report_date: datetime = None) -> str:
+        store = CommitStore(commits)
+        report_date = self._resolve_report_date(store, report_date)
         report_content = []
         
         # 日报标题
-        report_content.append(f"# 工作日报 - {datetime.now().strftime('%Y年%m月%d日')}")
+        report_content.append(f"# 工作日报 - {report_date.strftime('%Y年%m月%d日')}")
         report_content.append("")
         
         # 今日提交清单
         report_content.append("## 今日提交清单")
         report_content.append("")
-        report_content.append(self.generate_commit_list(commits))
+        report_content.append(self.generate_commit_list(store, report_date))
         report_content.append("")
         
         return "\n".join(report_content)
     
+    @staticmethod
+    def _display_width(text: str) -> int:
+        """终端显示宽度（中文等全角字符占两列）"""
+        return sum(2 if unicodedata.east_asian_width(ch) in ('W', 'F') else 1 for ch in text)
+    
+    def _format_table(self, headers: List[str], rows: List[List]) -> List[str]:
+        """按显示宽度对齐的纯文本表格"""
+        cells = [[str(v) for v in row] for row in [headers] + rows]
+        widths = [max(self._display_width(row[i]) for row in cells) for i in range(len(headers))]
+        lines = []
+        for n, row in enumerate(cells):
+            lines.append("  " + "  ".join(
+                value + " " * (widths[i] - self._display_width(value)) for i, value in enumerate(row)
+            ).rstrip())
+            if n == 0:
+                lines.append("  " + "  ".join("-" * w for w in widths))
+        return lines
+    
+    def generate_team_report(self, commits: Union[List[Dict], CommitStore],
+                             start_date: datetime, end_date: datetime) -> str:
+        """
+        生成团队汇总报告：团队概览、按人员、按仓库、按日期、按时段统计表，
+        各视图均基于同一个 CommitStore 的索引生成
+        
+        Args:
+            commits: 提交记录列表或 CommitStore
+            start_date: 统计开始日期
+            end_date: 统计结束日期
+            
+        Returns:
+            团队报告内容字符串
+        """
+        store = commits if isinstance(commits, CommitStore) else CommitStore(commits)
+        with telemetry.span('generate_team_report', CATEGORY_STAGE, commits=len(store)):
+            return self._render_team_report(store, start_date, end_date)
+    
+    def _render_team_report(self, store: CommitStore, start_date: datetime, end_date: datetime) -> str:
+        lines = []
+        lines.append(
+            f"# 团队提交报告 - {start_date.strftime('%Y年%m月%d日')} ~ {end_date.strftime('%Y年%m月%d日')}"
+        )
+        lines.append("")
+        if not store:
+            lines.append("统计期间无提交记录")
+            return "\n".join(lines)
+        
+        stats = store.stats()
+        lines.append("## 团队概览")
+        lines.append("")
+        lines.append(f"  总提交数: {stats['commits']}")
+        lines.append(f"  参与人员: {stats['authors']}")
+        lines.append(f"  涉及仓库: {stats['repos']}")
+        lines.append(f"  活跃天数: {stats['days']}")
+        lines.append(f"  人均提交: {stats['commits'] / stats['authors']:.1f}")
+        lines.append("")
+        
+        lines.append("## 按人员")
+        lines.append("")
+        rows = []
+        for author, commits in store.group('author').items():
+            author_stats = store.stats(commits)
+            top_repo = max(store.group('repo', commits).items(), key=lambda kv: len(kv[1]))[0]
+            rows.append([author, author_stats['commits'], author_stats['repos'], author_stats['days'],
+                         author_stats['first'][:16], author_stats['last'][:16], top_repo])
+        rows.sort(key=lambda r: r[1], reverse=True)
+        lines.extend(self._format_table(['人员', '提交数', '仓库数', '活跃天数', '最早提交', '最晚提交', '主要仓库'], rows))
+        lines.append("")
+        
+        lines.append("## 按仓库")
+        lines.append("")
+        rows = []
+        for repo, commits in store.group('repo').items():
+            by_author = store.group('author', commits)
+            top_author = max(by_author.items(), key=lambda kv: len(kv[1]))[0]
+            rows.append([repo, len(commits), len(by_author), top_author])
+        rows.sort(key=lambda r: r[1], reverse=True)
+        lines.extend(self._format_table(['仓库', '提交数', '人员数', '主要贡献者'], rows))
+        lines.append("")
+        
+        lines.append("## 按日期")
+        lines.append("")
+        rows = []
+        for day, commits in store.group('day').items():
+            day_stats = store.stats(commits)
+            rows.append([day, day_stats['commits'], day_stats['authors'], day_stats['repos']])
+        lines.extend(self._format_table(['日期', '提交数', '人员数', '仓库数'], rows))
+        lines.append("")
+        
+        lines.append("## 按时段")
+        lines.append("")
+        rows = []
+        for label, hours in TIME_OF_DAY_BUCKETS:
+            count = sum(len(store.by_hour.get(h, [])) for h in hours)
+            rows.append([label, count, f"{count / stats['commits']:.0%}"])
+        lines.extend(self._format_table(['时段', '提交数', '占比'], rows))
+        lines.append("")
+        
+        return "\n".join(lines)
+    
     def save_report_to_file(self, report_content: str, file_path: str = None) -> str:
         """
         保存日报到文件
@@ -226,19 +346,31 @@ class ReportService:
         if file_dir:  # 如果路径包含目录部分
             os.makedirs(file_dir, exist_ok=True)
         
-        # 保存文件
-        with open(file_path, 'w', encoding='utf-8') as f:
-            f.write(report_content)
+        # 原子写入：内容未变化时不重写（不改动 mtime）
+        with telemetry.span('save_report_to_file', CATEGORY_IO, path=file_path) as span:
+            span['written'] = write_atomic(file_path, report_content)
         
         return file_path
 
+    @staticmethod
+    def brief_source(commits: List[Dict], my_author: str, yesterday_commits: List[Dict] = None) -> str:
+        """
+        简报依据的提交来源（与 generate_brief 的分支一致，记录到简报元数据）
+        
+        Returns:
+            'mine' 本人提交 / 'others' 他人提交 / 'yesterday' 昨日提交 / 'none' 无提交
+        """
+        if not commits:
+            return 'yesterday' if yesterday_commits else 'none'
+        return 'mine' if any(c.get("author") == my_author for c in commits) else 'others'
+    
     def generate_brief(
         self,
         commits: List[Dict],
         my_author: str,
         deepseek_service,
         yesterday_commits: List[Dict] = None,
-    ) -> str:
+    ) -> Brief:
         """
         根据今日提交生成本人工作简报，格式符合系统要求。
         1. 若本人有提交：根据本人提交记录生成简报；
@@ -252,7 +384,8 @@ class ReportService:
             yesterday_commits: 昨天的提交记录（可选），用于今日无提交时参考
             
         Returns:
-            简报正文，包含三个字段：上午工作内容、下午工作内容、今日计划学习内容与进度；无提交时返回说明文字。
+            结构化简报 Brief，包含三个字段：上午工作内容、下午工作内容、今日计划学习内容与进度；
+            无提交或生成失败时返回仅含说明文字的 Brief（validate 不通过，不会被发布）。
         """
         my_commits = [c for c in commits if c.get("author") == my_author]
         others_commits = [c for c in commits if c.get("author") != my_author]
@@ -263,33 +396,13 @@ class ReportService:
             return self._generate_brief_from_yesterday(yesterday_commits, my_author, deepseek_service)
         
         if not commits:
-            return "今日无提交记录，无法生成简报。"
-
-        # 统一的格式要求（当前不输出时间前缀，如 10:20-12:00：）
-        format_instruction = (
-            "请严格按照以下格式输出，只包含三个字段，不要添加任何其他内容：\n\n"
-            "*上午时间安排与工作内容\n"
-            "[这里填写上午的工作内容，每条不要带时间，直接写内容。例如：\n"
-            " 1. 优化证书关联关系的逻辑代码\n"
-            " 2. 完成变更管理优化方案的讨论和联调测试]\n\n"
-            "*下午时间安排与工作内容\n"
-            "[这里填写下午的工作内容，每条不要带时间，直接写内容。例如：\n"
-            " 1. 完成变更管理优化方案的讨论和联调测试\n"
-            " 2. 优化证书关联关系的逻辑代码]\n\n"
-            "*今日计划的学习内容与进度\n"
-            "[这里填写今日计划的学习内容和学习进度，例如：学习Spring Boot配置管理相关技术，已完成基础概念学习]\n\n"
-            "注意：\n"
-            "1. 上午和下午的工作内容要基于提交记录合理分配，但每条内容前不要加时间（禁止 10:20-12:00：、09:00-12:00： 等格式），只写序号和内容，如「1. xxx」「2. xxx」\n"
-            "2. 学习内容要合理，可以基于工作内容推断相关技术学习\n"
-            "3. 只输出这三个字段的内容，不要添加标题、日期等前缀\n"
-            "4. 今日计划的学习内容与进度随机生成,有时生成有时候不生成,占比百分之30生成,百分之70不生成,如果本次不生成,生成一个无\n"
-        )
+            return Brief(raw="今日无提交记录，无法生成简报。")
 
         if my_commits:
             system = (
                 "你是工作日报助手。请根据本人今日的 Git 提交记录，生成符合系统格式要求的工作简报。\n\n"
                 f"{BRIEF_SYSTEM_MODIFIER}\n\n"
-                + format_instruction
+                + BRIEF_FORMAT_INSTRUCTION
             )
             user = "本人今日提交如下：\n" + self._format_commits_for_prompt(my_commits)
         else:
@@ -299,21 +412,22 @@ class ReportService:
                 "用概括性语言说明协助了哪些方面（如评审、联调、支持、协作等），"
                 "不要直接照搬他人的提交内容，避免与同事的日报雷同。\n\n"
                 f"{BRIEF_SYSTEM_MODIFIER}\n\n"
-                + format_instruction
+                + BRIEF_FORMAT_INSTRUCTION
             )
             user = "他人今日提交如下：\n" + self._format_commits_for_prompt(others_commits)
 
         try:
-            return deepseek_service.chat(system=system, user=user, max_tokens=1024)
+            text = deepseek_service.chat(system=system, user=user, max_tokens=1024, json_mode=True)
         except Exception as e:
-            return f"[简报生成失败] {e!r}"
+            return Brief(raw=f"[简报生成失败] {e!r}")
+        return Brief.parse(text)
 
-    def save_brief_to_file(self, brief_content: str, file_path: Optional[str] = None) -> str:
+    def save_brief_to_file(self, brief: Union[Brief, str], file_path: Optional[str] = None) -> str:
         """
         保存简报到文件。
         
         Args:
-            brief_content: 简报内容
+            brief: 结构化简报（按三段式文本保存）或简报文本
             file_path: 保存路径，None 则使用 reports/简报_YYYYMMDD.txt
             
         Returns:
@@ -327,6 +441,6 @@ class ReportService:
         file_dir = os.path.dirname(file_path)
         if file_dir:
             os.makedirs(file_dir, exist_ok=True)
-        with open(file_path, "w", encoding="utf-8") as f:
-            f.write(brief_content)
+        with telemetry.span("save_brief_to_file", CATEGORY_IO, path=file_path) as span:
+            span['written'] = write_atomic(file_path, str(brief))
         return file_path
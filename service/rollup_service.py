@@ -0,0 +1,233 @@
+"""
+汇总报告服务层 - 基于已保存的每日简报和提交缓存生成周报/月报/季报，
+不重新执行 git log，也不逐天调用 DeepSeek：先把每日简报压缩为一行摘要，整个周期只调用一次模型
+"""
+import calendar
+import os
+import re
+from datetime import datetime, timedelta
+from typing import Dict, List
+
+from config import BRIEF_FILE_FORMAT, BRIEF_SYSTEM_MODIFIER, REPORT_SAVE_DIR, ROLLUP_FILE_FORMAT
+from service.atomic_file import write_atomic
+from service.brief_parser import Brief
+from service.commit_cache import CommitCache
+from service.commit_store import CommitStore
+from service.export_service import ExportService
+from service.telemetry_service import telemetry, CATEGORY_IO, CATEGORY_STAGE
+
+# 汇总周期
+PERIOD_WEEK = 'week'
+PERIOD_MONTH = 'month'
+PERIOD_QUARTER = 'quarter'
+PERIOD_NAMES = {PERIOD_WEEK: '周报', PERIOD_MONTH: '月报', PERIOD_QUARTER: '季报'}
+
+WEEKDAY_NAMES = ['周一', '周二', '周三', '周四', '周五', '周六', '周日']
+
+# 每日摘要中每个时段最多保留的条目数（控制一个季度的提示词长度）
+MAX_ITEMS_PER_SECTION = 4
+
+ROLLUP_FORMAT_INSTRUCTION = (
+    "请按以下格式输出，不要添加标题、日期等其他内容：\n\n"
+    "主要工作：\n1. ...\n2. ...\n\n"
+    "工作成果：\n1. ...\n\n"
+    "问题与改进：\n1. ...\n\n"
+    "下阶段计划：\n1. ...\n\n"
+    "注意：\n"
+    "1. 按业务模块/主题归纳合并相同方向的工作，不要逐天罗列\n"
+    "2. 每个部分 3~6 条，每条一句话\n"
+    "3. 只依据提供的每日简报，不要编造未出现的工作\n"
+)
+
+
+def period_range(period: str, date: datetime = None):
+    """
+    包含指定日期的自然周（周一~周日）/自然月/自然季度的起止日期
+
+    Returns:
+        (start_date, end_date)
+    """
+    date = (date or datetime.now()).replace(hour=0, minute=0, second=0, microsecond=0)
+    if period == PERIOD_WEEK:
+        start = date - timedelta(days=date.weekday())
+        return start, start + timedelta(days=6)
+    if period == PERIOD_MONTH:
+        last_day = calendar.monthrange(date.year, date.month)[1]
+        return date.replace(day=1), date.replace(day=last_day)
+    if period == PERIOD_QUARTER:
+        first_month = (date.month - 1) // 3 * 3 + 1
+        last_month = first_month + 2
+        last_day = calendar.monthrange(date.year, last_month)[1]
+        return date.replace(month=first_month, day=1), date.replace(month=last_month, day=last_day)
+    raise ValueError(f"未知汇总周期: {period}")
+
+
+def _items(text: str) -> List[str]:
+    """简报字段按行拆成条目，去掉序号"""
+    items = []
+    for line in (text or '').splitlines():
+        line = re.sub(r'^\s*\d+[.、]\s*', '', line).strip()
+        if line and line != '无':
+            items.append(line)
+    return items
+
+
+class RollupService:
+    """周报/月报/季报生成"""
+
+    def __init__(self, reports_dir: str = None, cache: CommitCache = None):
+        """
+        Args:
+            reports_dir: 每日简报所在目录，默认 REPORT_SAVE_DIR
+            cache: 提交缓存，默认 REPORT_SAVE_DIR/cache
+        """
+        self.reports_dir = reports_dir or REPORT_SAVE_DIR
+        self.cache = cache or CommitCache()
+        self.exporter = ExportService(self.reports_dir, self.cache)
+
+    def load_daily(self, start_date: datetime, end_date: datetime) -> List[Dict]:
+        """
+        读取周期内每天已保存的简报和提交缓存
+
+        Returns:
+            [{'date': datetime, 'brief': Brief 或 None, 'commits': 提交列表或 None}, ...]，按日期顺序
+        """
+        days = []
+        cached = self.cache.load_range(start_date, end_date)
+        for key, commits in cached.items():
+            date = datetime.strptime(key, '%Y%m%d')
+            brief = None
+            # 优先读取结构化简报 JSON，旧数据没有 JSON 时解析 txt
+            record = self.exporter.load_brief_json(date)
+            path = os.path.join(self.reports_dir, BRIEF_FILE_FORMAT.format(date=key))
+            if record is not None:
+                if record['valid']:
+                    brief = Brief.from_dict(record['brief'])
+            elif os.path.exists(path):
+                with open(path, 'r', encoding='utf-8') as f:
+                    parsed = Brief.parse(f.read())
+                # 生成失败/无提交时保存的说明文字不计入汇总
+                if parsed.is_valid:
+                    brief = parsed
+            days.append({'date': date, 'brief': brief, 'commits': commits})
+        return days
+
+    def _summarize_day(self, day: Dict) -> str:
+        """把一天的简报压缩为一行摘要"""
+        brief = day['brief']
+        date = day['date']
+        parts = []
+        for label, text in (('上午', brief.morning), ('下午', brief.afternoon), ('学习', brief.learning)):
+            items = _items(text)[:MAX_ITEMS_PER_SECTION]
+            if items:
+                parts.append(f"{label}: {'；'.join(items)}")
+        return f"{date.strftime('%m-%d')}({WEEKDAY_NAMES[date.weekday()]}) " + " | ".join(parts)
+
+    def _commit_stats(self, days: List[Dict], my_author: str = None) -> List[str]:
+        """基于提交缓存的统计（只读缓存，不执行 git）"""
+        cached = [d for d in days if d['commits'] is not None]
+        if not cached:
+            return ["  周期内无提交缓存"]
+        store = CommitStore(c for d in cached for c in d['commits'])
+        stats = store.stats()
+        lines = [
+            f"  总提交数: {stats['commits']}",
+            f"  参与人员: {stats['authors']}",
+            f"  涉及仓库: {stats['repos']}",
+            f"  有提交的天数: {stats['days']}（已缓存 {len(cached)}/{len(days)} 天）",
+        ]
+        if my_author:
+            mine = store.query(author=my_author)
+            lines.append(f"  本人提交数: {len(mine)}")
+            repos = store.group('repo', mine)
+            if repos:
+                top = sorted(repos.items(), key=lambda kv: len(kv[1]), reverse=True)[:5]
+                lines.append("  本人主要仓库: " + "、".join(f"{repo}({len(c)})" for repo, c in top))
+        return lines
+
+    def generate_rollup(
+        self,
+        start_date: datetime,
+        end_date: datetime,
+        period: str = PERIOD_WEEK,
+        deepseek_service=None,
+        my_author: str = None,
+    ) -> str:
+        """
+        生成汇总报告：工作总结（整个周期一次 DeepSeek 调用）、每日简报摘要、提交统计
+
+        Args:
+            start_date: 周期开始日期
+            end_date: 周期结束日期（含）
+            period: 周期类型，决定标题（周报/月报/季报）
+            deepseek_service: DeepSeekService 实例，None 时只输出每日摘要和统计
+            my_author: 本人 Git user.name，用于统计本人提交
+
+        Returns:
+            汇总报告内容
+        """
+        with telemetry.span('generate_rollup', CATEGORY_STAGE, period=period) as span:
+            days = self.load_daily(start_date, end_date)
+            briefed = [d for d in days if d['brief'] is not None]
+            span['days'] = len(briefed)
+            daily_lines = [self._summarize_day(d) for d in briefed]
+
+            lines = [
+                f"# 工作{PERIOD_NAMES.get(period, '汇总')} - "
+                f"{start_date.strftime('%Y年%m月%d日')} ~ {end_date.strftime('%Y年%m月%d日')}",
+                "",
+                "## 工作总结",
+                "",
+            ]
+            if not briefed:
+                lines.append("周期内没有已保存的每日简报")
+            elif deepseek_service is None:
+                lines.append("（未调用 DeepSeek，见下方每日简报摘要）")
+            else:
+                system = (
+                    f"你是工作{PERIOD_NAMES.get(period, '汇总')}助手。请根据以下每日工作简报摘要，"
+                    f"生成这一周期的工作总结。\n\n{BRIEF_SYSTEM_MODIFIER}\n\n" + ROLLUP_FORMAT_INSTRUCTION
+                )
+                user = (
+                    f"周期：{start_date.strftime('%Y-%m-%d')} ~ {end_date.strftime('%Y-%m-%d')}，"
+                    f"共 {len(briefed)} 天有简报。每日简报摘要如下：\n" + "\n".join(daily_lines)
+                )
+                try:
+                    lines.append(deepseek_service.chat(system=system, user=user, max_tokens=1536))
+                except Exception as e:
+                    lines.append(f"[汇总生成失败] {e!r}")
+            lines.append("")
+
+            lines.append("## 每日简报摘要")
+            lines.append("")
+            lines.extend(f"  {line}" for line in daily_lines)
+            if not daily_lines:
+                lines.append("  无")
+            lines.append("")
+
+            lines.append("## 提交统计")
+            lines.append("")
+            lines.extend(self._commit_stats(days, my_author))
+            return "\n".join(lines)
+
+    def save_rollup(self, content: str, start_date: datetime, end_date: datetime,
+                    period: str = PERIOD_WEEK, file_path: str = None) -> str:
+        """
+        保存汇总报告，默认 REPORT_SAVE_DIR/周报_开始日期_结束日期.txt
+
+        Returns:
+            保存的文件路径
+        """
+        if file_path is None:
+            filename = ROLLUP_FILE_FORMAT.format(
+                name=PERIOD_NAMES.get(period, '汇总'),
+                start=start_date.strftime('%Y%m%d'),
+                end=end_date.strftime('%Y%m%d'),
+            )
+            file_path = os.path.join(self.reports_dir, filename)
+        file_dir = os.path.dirname(file_path)
+        if file_dir:
+            os.makedirs(file_dir, exist_ok=True)
+        with telemetry.span('save_rollup', CATEGORY_IO, path=file_path) as span:
+            span['written'] = write_atomic(file_path, content)
+        return file_path
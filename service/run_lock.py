@@ -0,0 +1,139 @@
+"""
+进程间文件锁 - POSIX 使用 fcntl.flock，Windows 使用 msvcrt.locking，进程退出（包括崩溃）时锁自动释放。
+FileLock 保护缓存、发件箱等文件的“读取-修改-写回”；RunLock 保证同一时刻只有一个日报流程在运行，
+并记录持有者（进程号、启动时间、命令），供等待或退出时提示
+"""
+import json
+import os
+import sys
+import threading
+import time
+from datetime import datetime
+from typing import Dict, Optional
+
+from config import REPORT_SAVE_DIR, RUN_LOCK_DIR_NAME
+from service.atomic_file import write_atomic
+
+if sys.platform == 'win32':
+    import msvcrt
+
+    def _try_lock(fd: int) -> bool:
+        try:
+            os.lseek(fd, 0, os.SEEK_SET)
+            msvcrt.locking(fd, msvcrt.LK_NBLCK, 1)
+            return True
+        except OSError:
+            return False
+
+    def _unlock(fd: int):
+        os.lseek(fd, 0, os.SEEK_SET)
+        msvcrt.locking(fd, msvcrt.LK_UNLCK, 1)
+else:
+    import fcntl
+
+    def _try_lock(fd: int) -> bool:
+        try:
+            fcntl.flock(fd, fcntl.LOCK_EX | fcntl.LOCK_NB)
+            return True
+        except OSError:
+            return False
+
+    def _unlock(fd: int):
+        fcntl.flock(fd, fcntl.LOCK_UN)
+
+# 等待锁时的轮询间隔（秒）
+POLL_INTERVAL = 0.1
+
+
+class FileLock:
+    """
+    基于锁文件的进程间互斥锁（同一进程内的多个线程也互斥）
+
+    用法:
+        with FileLock(path + '.lock'):
+            data = read(path)
+            write_atomic(path, modify(data))
+    """
+
+    def __init__(self, path: str):
+        self.path = path
+        self._fd = None
+        self._thread_lock = threading.Lock()
+
+    def acquire(self, wait: bool = True, timeout: float = None) -> bool:
+        """
+        获取锁
+
+        Args:
+            wait: 被占用时是否等待
+            timeout: 最长等待秒数，None 表示一直等待
+
+        Returns:
+            是否获取成功
+        """
+        deadline = None if timeout is None else time.monotonic() + timeout
+        if not wait:
+            acquired = self._thread_lock.acquire(blocking=False)
+        else:
+            acquired = self._thread_lock.acquire(timeout=-1 if timeout is None else timeout)
+        if not acquired:
+            return False
+        try:
+            os.makedirs(os.path.dirname(os.path.abspath(self.path)), exist_ok=True)
+            fd = os.open(self.path, os.O_RDWR | os.O_CREAT, 0o666)
+            while not _try_lock(fd):
+                if not wait or (deadline is not None and time.monotonic() >= deadline):
+                    os.close(fd)
+                    self._thread_lock.release()
+                    return False
+                time.sleep(POLL_INTERVAL)
+        except BaseException:
+            self._thread_lock.release()
+            raise
+        self._fd = fd
+        return True
+
+    def release(self):
+        if self._fd is None:
+            return
+        try:
+            _unlock(self._fd)
+        finally:
+            os.close(self._fd)
+            self._fd = None
+            self._thread_lock.release()
+
+    def __enter__(self):
+        self.acquire()
+        return self
+
+    def __exit__(self, *exc):
+        self.release()
+
+
+class RunLock(FileLock):
+    """日报流程的运行锁（reports/locks/<name>.lock），持有者信息写在同名 .json 中"""
+
+    def __init__(self, name: str = 'pipeline', lock_dir: str = None):
+        lock_dir = lock_dir or os.path.join(REPORT_SAVE_DIR, RUN_LOCK_DIR_NAME)
+        super().__init__(os.path.join(lock_dir, f"{name}.lock"))
+        self.info_path = os.path.join(lock_dir, f"{name}.json")
+
+    def acquire(self, wait: bool = True, timeout: float = None) -> bool:
+        if not super().acquire(wait, timeout):
+            return False
+        info = {
+            'pid': os.getpid(),
+            'started_at': datetime.now().isoformat(timespec='seconds'),
+            'command': ' '.join(sys.argv),
+        }
+        write_atomic(self.info_path, json.dumps(info, ensure_ascii=False, indent=2), keep_versions=0)
+        return True
+
+    def holder(self) -> Optional[Dict]:
+        """当前（或最近一次）持有者的信息：{'pid', 'started_at', 'command'}"""
+        try:
+            with open(self.info_path, 'r', encoding='utf-8') as f:
+                return json.load(f)
+        except (OSError, ValueError):
+            return None
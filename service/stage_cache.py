@@ -0,0 +1,84 @@
+"""
+流水线阶段缓存服务层 - 每个阶段（发现仓库、收集提交、日报、简报、发布）保存其输出及输入指纹，
+重新运行时输入指纹未变化的阶段直接复用上次的输出，例如只修改简报风格配置时只重新执行简报和发布阶段
+"""
+import json
+import os
+from datetime import datetime
+from typing import Any, Dict, Optional
+
+from config import COMMIT_CACHE_DIR_NAME, REPORT_SAVE_DIR, STAGE_CACHE_DIR_NAME
+from service.atomic_file import content_hash, write_atomic
+
+# 流水线阶段（按执行顺序）
+STAGE_DISCOVER = 'discover'
+STAGE_COLLECT = 'collect'
+STAGE_REPORT = 'report'
+STAGE_BRIEF = 'brief'
+STAGE_PUBLISH = 'publish'
+STAGES = [STAGE_DISCOVER, STAGE_COLLECT, STAGE_REPORT, STAGE_BRIEF, STAGE_PUBLISH]
+
+
+def fingerprint(*inputs) -> str:
+    """输入内容指纹：各输入按 JSON（键排序）序列化后的 SHA-256"""
+    data = json.dumps(inputs, ensure_ascii=False, sort_keys=True, default=str)
+    return content_hash(data.encode('utf-8'))
+
+
+class StageCache:
+    """每天每个阶段一条记录：REPORT_SAVE_DIR/cache/stages/YYYYMMDD/<阶段>.json"""
+
+    def __init__(self, date: datetime = None, cache_dir: str = None, refresh: bool = False):
+        """
+        Args:
+            date: 流水线运行日期，默认今天
+            cache_dir: 阶段缓存根目录，默认 REPORT_SAVE_DIR/cache/stages
+            refresh: 为 True 时忽略已有记录（所有阶段重新执行），新的输出仍会保存
+        """
+        self.date = date or datetime.now()
+        root = cache_dir or os.path.join(REPORT_SAVE_DIR, COMMIT_CACHE_DIR_NAME, STAGE_CACHE_DIR_NAME)
+        self.cache_dir = os.path.join(root, self.date.strftime('%Y%m%d'))
+        self.refresh = refresh
+
+    def path(self, stage: str) -> str:
+        return os.path.join(self.cache_dir, f"{stage}.json")
+
+    def load(self, stage: str) -> Optional[Dict]:
+        """读取阶段记录，不存在或已损坏时返回 None"""
+        try:
+            with open(self.path(stage), 'r', encoding='utf-8') as f:
+                return json.load(f)
+        except (OSError, ValueError):
+            return None
+
+    def lookup(self, stage: str, fp: str) -> Optional[Any]:
+        """
+        输入指纹与上次记录一致时返回上次的输出，否则返回 None（需要重新执行该阶段）
+        """
+        if self.refresh:
+            return None
+        record = self.load(stage)
+        if record is None or record.get('fingerprint') != fp:
+            return None
+        return record.get('output')
+
+    def save(self, stage: str, fp: str, output: Any):
+        """保存阶段输出及其输入指纹"""
+        record = {
+            'stage': stage,
+            'fingerprint': fp,
+            'updated_at': datetime.now().isoformat(timespec='seconds'),
+            'output': output,
+        }
+        previous = self.load(stage)
+        # 输入和输出都未变化时保留原记录（不改写文件）
+        if previous and previous.get('fingerprint') == fp and previous.get('output') == output:
+            return
+        write_atomic(self.path(stage), json.dumps(record, ensure_ascii=False, indent=2), keep_versions=0)
+
+    def invalidate(self, stage: str):
+        """删除阶段记录"""
+        try:
+            os.remove(self.path(stage))
+        except OSError:
+            pass
@@ -0,0 +1,143 @@
+"""
+运行耗时统计服务层 - 记录各阶段/各仓库耗时（span），导出 JSON 运行记录并打印最慢的仓库和阶段
+"""
+import json
+import os
+import threading
+import time
+from collections import defaultdict
+from contextlib import contextmanager
+from datetime import datetime
+from typing import Dict, List
+
+from config import REPORT_SAVE_DIR, TELEMETRY_DIR_NAME, TELEMETRY_TOP_N
+from service.atomic_file import write_atomic
+
+# span 分类
+CATEGORY_STAGE = 'stage'  # 流程阶段（仓库发现、日报渲染等）
+CATEGORY_REPO = 'repo'    # 单个仓库的提交收集
+CATEGORY_IO = 'io'        # 文件保存
+CATEGORY_LLM = 'llm'      # DeepSeek 调用
+CATEGORY_CRM = 'crm'      # CRM 登录/发布各阶段
+
+
+class TelemetryService:
+    """一次运行的耗时记录（线程安全）"""
+
+    def __init__(self):
+        self.reset()
+
+    def reset(self):
+        """开始新的运行记录"""
+        self.started_at = datetime.now()
+        self._t0 = time.perf_counter()
+        self.spans: List[Dict] = []
+        self._lock = threading.Lock()
+
+    @contextmanager
+    def span(self, name: str, category: str = CATEGORY_STAGE, **attrs):
+        """
+        记录一段代码的耗时，可在 with 块内向返回的 dict 中补充属性
+
+        用法:
+            with telemetry.span('get_commits_by_date', CATEGORY_REPO, repo=path) as s:
+                commits = ...
+                s['commits'] = len(commits)
+        """
+        record = dict(attrs)
+        start = time.perf_counter()
+        ok = True
+        try:
+            yield record
+        except BaseException:
+            ok = False
+            raise
+        finally:
+            duration = time.perf_counter() - start
+            span = {
+                'name': name,
+                'category': category,
+                'start': round(start - self._t0, 6),
+                'duration': round(duration, 6),
+                'ok': ok,
+                'thread': threading.current_thread().name,
+            }
+            if record:
+                span['attrs'] = record
+            with self._lock:
+                self.spans.append(span)
+
+    def stage_totals(self) -> List[Dict]:
+        """按名称汇总非仓库类 span：次数、总耗时、最大耗时，按总耗时降序"""
+        totals = defaultdict(lambda: {'count': 0, 'total': 0.0, 'max': 0.0})
+        for span in self.spans:
+            if span['category'] == CATEGORY_REPO:
+                continue
+            item = totals[(span['category'], span['name'])]
+            item['count'] += 1
+            item['total'] += span['duration']
+            item['max'] = max(item['max'], span['duration'])
+        result = [dict(v, category=c, name=n) for (c, n), v in totals.items()]
+        result.sort(key=lambda x: x['total'], reverse=True)
+        return result
+
+    def slowest_repos(self, top_n: int = None) -> List[Dict]:
+        """耗时最长的仓库 span"""
+        repos = [s for s in self.spans if s['category'] == CATEGORY_REPO]
+        repos.sort(key=lambda s: s['duration'], reverse=True)
+        return repos[:top_n or TELEMETRY_TOP_N]
+
+    def to_dict(self) -> Dict:
+        return {
+            'started_at': self.started_at.isoformat(timespec='seconds'),
+            'wall_time': round(time.perf_counter() - self._t0, 6),
+            'pid': os.getpid(),
+            'stages': self.stage_totals(),
+            'spans': list(self.spans),
+        }
+
+    def export(self, file_path: str = None) -> str:
+        """
+        导出 JSON 运行记录
+
+        Args:
+            file_path: 保存路径，默认 REPORT_SAVE_DIR/runs/run_YYYYMMDD_HHMMSS.json
+
+        Returns:
+            保存的文件路径
+        """
+        if file_path is None:
+            runs_dir = os.path.join(REPORT_SAVE_DIR, TELEMETRY_DIR_NAME)
+            os.makedirs(runs_dir, exist_ok=True)
+            file_path = os.path.join(runs_dir, f"run_{self.started_at.strftime('%Y%m%d_%H%M%S')}.json")
+        write_atomic(file_path, json.dumps(self.to_dict(), ensure_ascii=False, indent=2), keep_versions=0)
+        return file_path
+
+    def summary(self, top_n: int = None) -> str:
+        """控制台耗时摘要：最慢的阶段和最慢的仓库"""
+        top_n = top_n or TELEMETRY_TOP_N
+        lines = []
+        lines.append("=" * 60)
+        lines.append(f"耗时统计（总耗时 {time.perf_counter() - self._t0:.2f}s）")
+        lines.append("=" * 60)
+        lines.append(f"最慢的阶段（前 {top_n}）:")
+        for item in self.stage_totals()[:top_n]:
+            lines.append(
+                f"  {item['name']:<28} {item['total']:>8.2f}s"
+                f"  (次数 {item['count']}, 最长 {item['max']:.2f}s)"
+            )
+        repos = self.slowest_repos(top_n)
+        if repos:
+            lines.append(f"最慢的仓库（前 {top_n}）:")
+            for span in repos:
+                attrs = span.get('attrs', {})
+                lines.append(
+                    f"  {attrs.get('repo', span['name']):<40} {span['duration']:>8.2f}s"
+                    f"  (提交 {attrs.get('commits', 0)})"
+                )
+        lines.append("=" * 60)
+        return "\n".join(lines)
+
+
+# 进程级共享实例，各服务通过 telemetry.span(...) 记录耗时
+telemetry = TelemetryService()
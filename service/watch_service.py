@@ -0,0 +1,211 @@
+"""
+仓库监听服务层 - 常驻进程中监听所有仓库的 refs/、packed-refs、HEAD 和 logs/HEAD，
+只对有引用变动的仓库重新收集今日提交，维护今日提交的内存索引；
+日终生成日报时直接读取索引，不需要在同一时刻对所有仓库执行 git log。
+安装 watchdog（inotify/FSEvents/ReadDirectoryChangesW）时使用文件系统事件，否则按间隔轮询引用修改时间
+"""
+import os
+import threading
+from datetime import datetime
+from typing import Callable, Dict, List, Set
+
+from config import WATCH_BACKEND, WATCH_DEBOUNCE, WATCH_POLL_INTERVAL
+from service.commit_store import CommitStore
+from service.git_service import GitService
+from service.telemetry_service import telemetry, CATEGORY_STAGE
+
+# 监听方式
+WATCH_AUTO = 'auto'
+WATCH_WATCHDOG = 'watchdog'
+WATCH_POLL = 'poll'
+
+
+def load_watchdog():
+    """按需导入可选依赖 watchdog，未安装时返回 None"""
+    try:
+        from watchdog.events import FileSystemEventHandler
+        from watchdog.observers import Observer
+    except ImportError:
+        return None
+    return Observer, FileSystemEventHandler
+
+
+class CommitIndex:
+    """今日提交的内存索引：按对象库保存提交，某个对象库有变动时整体替换它的提交"""
+
+    def __init__(self, day: datetime, dedupe: Callable[[List[Dict]], List[Dict]] = None):
+        """
+        Args:
+            day: 索引的日期
+            dedupe: 跨对象库去重函数（如 GitService.dedupe_commits），默认不去重
+        """
+        self.day = day
+        self.dedupe = dedupe
+        self.by_store: Dict[str, List[Dict]] = {}
+        self._store = None
+
+    def update(self, common_dir: str, commits: List[Dict]):
+        self.by_store[common_dir] = commits
+        self._store = None
+
+    def commits(self) -> List[Dict]:
+        """今日全部提交（按时间倒序）"""
+        commits = [c for store_commits in self.by_store.values() for c in store_commits]
+        commits.sort(key=lambda x: x.get('date', ''), reverse=True)
+        return self.dedupe(commits) if self.dedupe else commits
+
+    def store(self) -> CommitStore:
+        """带索引的提交集合（有变动后首次访问时重建）"""
+        if self._store is None:
+            self._store = CommitStore(self.commits())
+        return self._store
+
+
+class _PollingWatcher:
+    """轮询各对象库的引用修改时间，与上次记录不同即视为有变动"""
+
+    def __init__(self, git_service: GitService, groups: Dict[str, List[Dict]]):
+        self.git_service = git_service
+        self.groups = groups
+        self.seen = {common_dir: self._activity(common_dir) for common_dir in groups}
+
+    def _activity(self, common_dir: str) -> float:
+        git_dirs = [c['git_dir'] for c in self.groups[common_dir]]
+        return self.git_service.last_ref_activity(common_dir, git_dirs)
+
+    def wait(self, timeout: float):
+        threading.Event().wait(timeout)
+
+    def changed(self) -> Set[str]:
+        changed = set()
+        for common_dir in self.groups:
+            activity = self._activity(common_dir)
+            if activity != self.seen[common_dir]:
+                self.seen[common_dir] = activity
+                changed.add(common_dir)
+        return changed
+
+    def stop(self):
+        pass
+
+
+class _WatchdogWatcher:
+    """
+    基于文件系统事件：监听 refs/（递归）、公共 git 目录（packed-refs、HEAD）、logs/（logs/HEAD），
+    以及各 worktree git 目录的 HEAD 和 logs/HEAD；git 先写 .lock 再重命名，按重命名后的路径判断
+    """
+
+    def __init__(self, groups: Dict[str, List[Dict]]):
+        Observer, FileSystemEventHandler = load_watchdog()
+        self.pending: Set[str] = set()
+        self.lock = threading.Lock()
+        self.event = threading.Event()
+        # 被监听文件的路径 -> 对象库；refs/ 目录前缀 -> 对象库
+        self.files: Dict[str, str] = {}
+        self.prefixes: Dict[str, str] = {}
+        watcher = self
+
+        class Handler(FileSystemEventHandler):
+            def on_any_event(self, event):
+                watcher._on_event(getattr(event, 'dest_path', '') or event.src_path)
+
+        handler = Handler()
+        self.observer = Observer()
+        for common_dir, checkouts in groups.items():
+            refs_dir = os.path.join(common_dir, 'refs')
+            self.prefixes[refs_dir + os.sep] = common_dir
+            self.files[os.path.join(common_dir, 'packed-refs')] = common_dir
+            watched = [(refs_dir, True)]
+            for git_dir in {common_dir, *(c['git_dir'] for c in checkouts)}:
+                self.files[os.path.join(git_dir, 'HEAD')] = common_dir
+                self.files[os.path.join(git_dir, 'logs', 'HEAD')] = common_dir
+                watched.extend([(git_dir, False), (os.path.join(git_dir, 'logs'), False)])
+            for path, recursive in watched:
+                if os.path.isdir(path):
+                    self.observer.schedule(handler, path, recursive=recursive)
+        self.observer.daemon = True
+        self.observer.start()
+
+    def _on_event(self, path: str):
+        path = os.fsdecode(path)
+        if path.endswith('.lock'):
+            return
+        common_dir = self.files.get(path)
+        if common_dir is None:
+            common_dir = next((c for prefix, c in self.prefixes.items() if path.startswith(prefix)), None)
+        if common_dir is not None:
+            with self.lock:
+                self.pending.add(common_dir)
+            self.event.set()
+
+    def wait(self, timeout: float):
+        if self.event.wait(timeout):
+            # 一次提交/拉取会连续改写多个文件，稍等片刻合并为一次收集
+            threading.Event().wait(WATCH_DEBOUNCE)
+
+    def changed(self) -> Set[str]:
+        with self.lock:
+            changed, self.pending = self.pending, set()
+            self.event.clear()
+        return changed
+
+    def stop(self):
+        self.observer.stop()
+        self.observer.join(timeout=5)
+
+
+class WatchService:
+    """监听仓库引用变动，增量维护今日提交索引"""
+
+    def __init__(self, git_service: GitService, repo_paths: List[str], backend: str = None):
+        """
+        Args:
+            git_service: 收集提交使用的 GitService（沿用其预筛选、spool、读取后端设置）
+            repo_paths: 监听的仓库
+            backend: 'auto'、'watchdog' 或 'poll'，默认 config.WATCH_BACKEND；watchdog 未安装时使用轮询
+        """
+        self.git_service = git_service
+        self.groups = git_service.group_by_object_store(repo_paths)
+        self.index = CommitIndex(datetime.now(), git_service.dedupe_commits)
+        backend = WATCH_BACKEND if backend is None else backend
+        if backend != WATCH_POLL and load_watchdog() is None:
+            if backend == WATCH_WATCHDOG:
+                print("警告: 未安装 watchdog，改为轮询引用修改时间")
+            backend = WATCH_POLL
+        self.backend = WATCH_POLL if backend == WATCH_POLL else WATCH_WATCHDOG
+        if self.backend == WATCH_WATCHDOG:
+            self.watcher = _WatchdogWatcher(self.groups)
+        else:
+            self.watcher = _PollingWatcher(git_service, self.groups)
+        # 最近一次收集超时或被熔断跳过的对象库（索引中缺少它们的提交，重新收集成功后移除）
+        self.incomplete: Set[str] = set()
+
+    def refresh(self, stores=None) -> int:
+        """
+        重新收集指定对象库（默认全部）的今日提交并替换索引中的记录
+
+        Returns:
+            重新收集的对象库数
+        """
+        stores = list(self.groups) if stores is None else [s for s in stores if s in self.groups]
+        with telemetry.span('watch.refresh', CATEGORY_STAGE, stores=len(stores)):
+            for common_dir in stores:
+                paths = [c['path'] for c in self.groups[common_dir]]
+                self.index.update(common_dir, self.git_service.get_all_commits_by_date(paths, self.index.day))
+                if self.git_service.last_timed_out or self.git_service.last_broken:
+                    self.incomplete.add(common_dir)
+                else:
+                    self.incomplete.discard(common_dir)
+        self.git_service.save_history()
+        return len(stores)
+
+    def wait(self, timeout: float = None):
+        """等待引用变动（轮询方式直接等待 timeout 秒）"""
+        self.watcher.wait(WATCH_POLL_INTERVAL if timeout is None else timeout)
+
+    def changed(self) -> Set[str]:
+        """上次调用以来有引用变动的对象库"""
+        return self.watcher.changed()
+
+    def stop(self):
+        self.watcher.stop()
@@ -0,0 +1,221 @@
+"""
+本地 CRM 桩服务 - 模拟 CRM 登录页、工作汇报页（日志标签及日志表单字段）和发布接口，
+用于离线测试和基准测试 CRM 发布流程（HTTP 与 Playwright 两种方式均可使用）
+"""
+import secrets
+import threading
+import time
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from http.cookies import SimpleCookie
+from urllib.parse import parse_qs, urlparse
+
+BASE_PATH = '/crm/'
+
+LOGIN_PAGE = """<!DOCTYPE html>
+<html><head><meta charset="utf-8"><title>CRM 登录</title></head>
+<body>
+<div id="form_login">
+  <form id="loginForm" method="post" action="index.php?module=Users&amp;action=Authenticate">
+    <input type="hidden" name="return_module" value="Home">
+    <input type="text" id="login_user_name" name="login_user_name" class="text-input" placeholder="请输入账号">
+    <input type="password" id="login_password" name="login_password" placeholder="请输入密码">
+  </form>
+  <div class="crm-container-btn">
+    <a class="btn-submit inline-block" href="javascript:;" onclick="return Check();">登 录</a>
+  </div>
+</div>
+<script>
+function Check() {
+  document.getElementById('loginForm').submit();
+  return false;
+}
+</script>
+</body></html>
+"""
+
+HOME_PAGE = """<!DOCTYPE html>
+<html><head><meta charset="utf-8"><title>CRM 首页</title></head>
+<body><a href="index.php?module=Users&amp;action=Logout">退出</a></body></html>
+"""
+
+# 日志表单中的字段顺序与真实页面一致：页面第 0 个 textarea 属于"分享"标签页，
+# 日志标签页字段依次为上午/下午/学习/明日计划/售前/项目交付/上级支持/其他
+LOG_FIELDS = [
+    ('worksummary', '*上午时间安排与工作内容【时间:内容】'),
+    ('workfld_21', '*下午时间安排与工作内容【时间:内容】'),
+    ('workexperience', '*今日计划的学习内容与进度'),
+    ('workplan', '明日工作计划'),
+    ('workfld_22', '售前/销售支持工作'),
+    ('workfld_23', '项目交付(PM)/售后工作'),
+    ('workfld_24', '需上级支持或紧急事项'),
+    ('workfld_25', '其他'),
+]
+
+WORK_REPORT_PAGE = """<!DOCTYPE html>
+<html><head><meta charset="utf-8"><title>工作汇报</title></head>
+<body>
+<ul id="stream-hsent-title">
+  <li><a href="javascript:;" tag="share" cont="sendTxt" onclick="switchTab('sendTxt')">分享</a></li>
+  <li><a href="javascript:;" tag="day" cont="sendLog" onclick="switchTab('sendLog')">日志</a></li>
+</ul>
+<div id="sendTxt"><textarea name="sharecontent"></textarea></div>
+<div id="sendLog" class="pubclear Edit_box" style="display:none; max-height:400px; overflow-y:auto;">
+<form id="sendLogForm" method="post" action="index.php?module=CooperativeWork&amp;action=SaveLog">
+  <input type="hidden" name="token" value="{token}">
+  <input type="hidden" name="logtype" value="day">
+{fields}
+  <select name="visibility"><option value="self">仅自己</option><option value="dept" selected>本部门</option></select>
+  <select name="category"><option>日常工作</option><option>项目</option></select>
+  <label><input type="checkbox" name="notify_leader" value="1" checked>通知上级</label>
+  <label><input type="checkbox" name="send_sms" value="1">短信提醒</label>
+  <input type="button" id="ReleaseBtn" value="发布" onclick="releaseLog()">
+</form>
+<div id="releaseMsg"></div>
+</div>
+<script>
+function switchTab(id) {{
+  document.getElementById('sendTxt').style.display = id === 'sendTxt' ? '' : 'none';
+  document.getElementById('sendLog').style.display = id === 'sendLog' ? '' : 'none';
+}}
+function releaseLog() {{
+  var form = document.getElementById('sendLogForm');
+  fetch(form.action, {{
+    method: 'POST',
+    credentials: 'same-origin',
+    headers: {{'Content-Type': 'application/x-www-form-urlencoded'}},
+    body: new URLSearchParams(new FormData(form)).toString()
+  }}).then(function (resp) {{
+    document.getElementById('releaseMsg').innerText = resp.ok ? '发布成功' : '发布失败';
+  }});
+}}
+</script>
+</body></html>
+"""
+
+LOG_FIELD_TEMPLATE = """  <fieldset><label>{label}</label>
+    <textarea name="{name}" rows="4" style="height:120px"></textarea></fieldset>"""
+
+PUBLISH_OK_PAGE = """<!DOCTYPE html>
+<html><head><meta charset="utf-8"><title>工作汇报</title></head>
+<body><div class="msg">发布成功</div></body></html>
+"""
+
+
+class StubCRMHandler(BaseHTTPRequestHandler):
+    """桩 CRM 请求处理"""
+
+    server_version = 'StubCRM/1.0'
+
+    def log_message(self, format, *args):
+        pass
+
+    def _session(self):
+        cookie = SimpleCookie(self.headers.get('Cookie', ''))
+        sid = cookie['PHPSESSID'].value if 'PHPSESSID' in cookie else ''
+        return sid if sid in self.server.sessions else None
+
+    def _send(self, status: int, body: str = '', headers: dict = None):
+        data = body.encode('utf-8')
+        self.send_response(status)
+        self.send_header('Content-Type', 'text/html; charset=utf-8')
+        self.send_header('Content-Length', str(len(data)))
+        for key, value in (headers or {}).items():
+            self.send_header(key, value)
+        self.end_headers()
+        self.wfile.write(data)
+
+    def _redirect(self, location: str, headers: dict = None):
+        self._send(302, '', dict(headers or {}, Location=location))
+
+    def _route(self):
+        parsed = urlparse(self.path)
+        return parsed.path, {k: v[0] for k, v in parse_qs(parsed.query).items()}
+
+    def do_GET(self):
+        path, query = self._route()
+        if not path.startswith(BASE_PATH):
+            self._send(404, 'not found')
+            return
+        sid = self._session()
+        if query.get('pageto_module') == 'CooperativeWork':
+            if not sid:
+                self._redirect(BASE_PATH)
+                return
+            fields = '\n'.join(LOG_FIELD_TEMPLATE.format(name=n, label=l) for n, l in LOG_FIELDS)
+            self._send(200, WORK_REPORT_PAGE.format(token=self.server.sessions[sid], fields=fields))
+        elif query.get('module') == 'Home' and sid:
+            self._send(200, HOME_PAGE)
+        else:
+            self._send(200, LOGIN_PAGE)
+
+    def do_POST(self):
+        path, query = self._route()
+        length = int(self.headers.get('Content-Length') or 0)
+        form = {k: v[0] for k, v in parse_qs(self.rfile.read(length).decode('utf-8'), keep_blank_values=True).items()}
+        if query.get('action') == 'Authenticate':
+            if (form.get('login_user_name') == self.server.username
+                    and form.get('login_password') == self.server.password):
+                sid = secrets.token_hex(8)
+                self.server.sessions[sid] = secrets.token_hex(8)
+                self._redirect(
+                    f'{BASE_PATH}index.php?module=Home&action=index',
+                    {'Set-Cookie': f'PHPSESSID={sid}; Path=/'},
+                )
+            else:
+                self._send(200, LOGIN_PAGE)
+        elif query.get('action') == 'SaveLog':
+            sid = self._session()
+            if not sid or form.get('token') != self.server.sessions[sid]:
+                self._send(403, '未登录或令牌无效')
+                return
+            with self.server.lock:
+                self.server.published.append(form)
+            # 模拟日志已保存但响应缓慢或网关出错
+            time.sleep(self.server.publish_delay)
+            self._send(self.server.publish_status, self.server.publish_page)
+        else:
+            self._send(404, 'not found')
+
+
+class StubCRMServer(ThreadingHTTPServer):
+    """
+    桩 CRM 服务，published 保存所有已提交的日志表单；publish_page / publish_status 为提交日志后返回的页面和状态码，
+    publish_delay 为保存日志后延迟响应的秒数
+    """
+
+    daemon_threads = True
+
+    def __init__(self, host: str = '127.0.0.1', port: int = 0,
+                 username: str = 'tester', password: str = 'secret'):
+        super().__init__((host, port), StubCRMHandler)
+        self.username = username
+        self.password = password
+        self.sessions = {}
+        self.published = []
+        self.publish_page = PUBLISH_OK_PAGE
+        self.publish_status = 200
+        self.publish_delay = 0
+        self.lock = threading.Lock()
+
+    @property
+    def url(self) -> str:
+        host, port = self.server_address[:2]
+        return f'http://{host}:{port}{BASE_PATH}'
+
+    def start(self) -> 'StubCRMServer':
+        """在后台线程中启动服务"""
+        threading.Thread(target=self.serve_forever, daemon=True).start()
+        return self
+
+    def stop(self):
+        self.shutdown()
+        self.server_close()
+
+
+if __name__ == '__main__':
+    server = StubCRMServer(port=8765)
+    print(f"桩 CRM 已启动: {server.url} (账号 {server.username} / 密码 {server.password})")
+    try:
+        server.serve_forever()
+    except KeyboardInterrupt:
+        server.server_close()
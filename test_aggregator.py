@@ -0,0 +1,101 @@
+"""
+测试多机提交汇总：两台机器的采集端推送到本机聚合服务，按 hash 去重合并、增量推送、令牌校验、批量压缩，
+额外字段（also_in）随提交传输，全量推送替换本机当天的记录
+"""
+import json
+import os
+import tempfile
+from datetime import datetime
+
+from service.aggregator_service import AggregateStore, AggregatorServer, CollectorAgent
+
+DAY = datetime(2026, 1, 26)
+
+
+def _commits(prefix: str, count: int, repo: str):
+    return [
+        {'hash': f'{prefix}{i:05d}', 'author': '张三', 'date': f'2026-01-26 {9 + i % 9:02d}:{i % 60:02d}:00',
+         'message': f'feat: 提交 {i}', 'body': '调整模块参数并补充单元测试说明\n' * 3, 'repo': repo}
+        for i in range(count)
+    ]
+
+
+def test_push_and_merge():
+    with tempfile.TemporaryDirectory() as root:
+        server = AggregatorServer('127.0.0.1', 0, AggregateStore(os.path.join(root, 'aggregate')), token='secret').start()
+        try:
+            laptop = CollectorAgent(server.url, 'secret', 'laptop', os.path.join(root, 'laptop'), batch_size=100)
+            vm = CollectorAgent(server.url, 'secret', 'vm', os.path.join(root, 'vm'), batch_size=100)
+            laptop_commits = _commits('a', 250, 'crm')
+            # 同一仓库在两台机器上都有克隆：共享部分提交
+            vm_commits = laptop_commits[:50] + _commits('b', 30, 'api')
+
+            result = laptop.push(laptop_commits, DAY)
+            assert result == {'sent': 250, 'accepted': 250, 'duplicates': 0, 'removed': 0, 'batches': 3}
+            result = vm.push(vm_commits, DAY)
+            assert result['accepted'] == 30 and result['duplicates'] == 50
+
+            # 批量 + 压缩后的流量远小于逐条 JSON
+            raw = sum(len(json.dumps(c, ensure_ascii=False).encode('utf-8')) for c in laptop_commits)
+            assert laptop.bytes_sent < raw / 4
+
+            # 增量推送：已推送的提交不再发送
+            assert laptop.push(laptop_commits + _commits('c', 1, 'crm'), DAY)['sent'] == 1
+
+            merged = vm.fetch(DAY)
+            assert len(merged) == 281
+            assert len({c['hash'] for c in merged}) == 281
+            assert {c['machine'] for c in merged} == {'laptop', 'vm'}
+            assert merged == sorted(merged, key=lambda c: c['date'], reverse=True)
+
+            try:
+                CollectorAgent(server.url, 'wrong', 'x', os.path.join(root, 'x')).fetch(DAY)
+                assert False, "令牌错误应被拒绝"
+            except RuntimeError as e:
+                assert '403' in str(e)
+        finally:
+            server.stop()
+
+        # 重启后从磁盘恢复
+        assert len(AggregateStore(os.path.join(root, 'aggregate')).get('20260126')) == 281
+
+
+def test_full_push_replaces_machine_rows():
+    with tempfile.TemporaryDirectory() as root:
+        server = AggregatorServer('127.0.0.1', 0, AggregateStore(os.path.join(root, 'aggregate')), token='').start()
+        try:
+            laptop = CollectorAgent(server.url, '', 'laptop', os.path.join(root, 'laptop'))
+            vm = CollectorAgent(server.url, '', 'vm', os.path.join(root, 'vm'))
+            shared = _commits('s', 1, 'crm')
+            commits = _commits('a', 3, 'crm') + shared
+            commits[0] = dict(commits[0], also_in=['crm-fork'])
+            laptop.push(commits, DAY)
+            vm.push(shared + _commits('b', 1, 'api'), DAY)
+
+            merged = {c['hash']: c for c in vm.fetch(DAY)}
+            assert merged['a00000']['also_in'] == ['crm-fork']
+            assert 'also_in' not in merged['a00001']
+
+            # amend 掉 a00002、不再有共享提交：增量推送改为全量推送，替换本机当天的记录
+            amended = commits[:2] + [dict(commits[2], hash='a99999', message='feat: 提交 2（amend）')]
+            result = laptop.push(amended, DAY)
+            assert result['sent'] == 3 and result['removed'] == 1 and result['accepted'] == 1
+            merged = {c['hash']: c for c in vm.fetch(DAY)}
+            assert sorted(merged) == ['a00000', 'a00001', 'a99999', 'b00000', 's00000']
+            # 共享提交仍由 vm 上报，不因 laptop 替换记录而丢失
+            assert merged['s00000']['machine'] == 'vm'
+
+            # 没有新提交、也没有被移除的提交时不发送
+            assert laptop.push(amended, DAY)['batches'] == 0
+            # 本机当天已没有提交：发送一批空的全量推送清除旧记录
+            assert laptop.push([], DAY) == {'sent': 0, 'accepted': 0, 'duplicates': 0, 'removed': 3, 'batches': 1}
+            assert sorted(c['hash'] for c in vm.fetch(DAY)) == ['b00000', 's00000']
+        finally:
+            server.stop()
+        assert len(AggregateStore(os.path.join(root, 'aggregate')).get('20260126')) == 2
+
+
+if __name__ == "__main__":
+    test_push_and_merge()
+    test_full_push_replaces_machine_rows()
+    print("测试完成")
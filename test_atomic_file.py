@@ -0,0 +1,81 @@
+"""
+测试原子写入：内容未变化时跳过写入、保留有限个历史版本、写入失败时原文件不受影响，
+新文件权限遵循写入时的 umask、覆盖时沿用原权限
+"""
+import os
+import sys
+import tempfile
+
+from service import atomic_file
+from service.atomic_file import write_atomic
+
+
+def test_skip_unchanged_and_versions():
+    with tempfile.TemporaryDirectory() as root:
+        path = os.path.join(root, '日报_20260126.txt')
+        assert write_atomic(path, "第一版", keep_versions=2) is True
+        os.utime(path, (1_700_000_000, 1_700_000_000))
+        # 内容未变化：不重写，mtime 保持不变
+        assert write_atomic(path, "第一版", keep_versions=2) is False
+        assert os.stat(path).st_mtime == 1_700_000_000
+
+        for i, content in enumerate(("第二版", "第三版", "第四版")):
+            os.utime(path, (1_700_000_000 + i * 60, 1_700_000_000 + i * 60))
+            assert write_atomic(path, content, keep_versions=2) is True
+        with open(path, 'r', encoding='utf-8') as f:
+            assert f.read() == "第四版"
+
+        history = os.path.join(root, 'history')
+        versions = sorted(os.listdir(history))
+        assert len(versions) == 2
+        with open(os.path.join(history, versions[-1]), 'r', encoding='utf-8') as f:
+            assert f.read() == "第三版"
+        # 不残留临时文件
+        assert sorted(os.listdir(root)) == ['history', '日报_20260126.txt']
+
+
+def test_failed_write_keeps_original():
+    with tempfile.TemporaryDirectory() as root:
+        path = os.path.join(root, 'outbox.json')
+        write_atomic(path, '{"state": "pending"}')
+
+        original_replace = atomic_file.os.replace
+
+        def crash(src, dst):
+            raise OSError("模拟写入过程中崩溃")
+
+        atomic_file.os.replace = crash
+        try:
+            write_atomic(path, '{"state": "published"}')
+            assert False, "应抛出异常"
+        except OSError:
+            pass
+        finally:
+            atomic_file.os.replace = original_replace
+
+        with open(path, 'r', encoding='utf-8') as f:
+            assert f.read() == '{"state": "pending"}'
+        assert os.listdir(root) == ['outbox.json']
+
+
+def test_permissions_follow_umask():
+    if sys.platform == 'win32':
+        return
+    saved = os.umask(0o027)
+    try:
+        with tempfile.TemporaryDirectory() as root:
+            path = os.path.join(root, 'report.txt')
+            atomic_file.write_atomic(path, "第一版")
+            assert os.stat(path).st_mode & 0o777 == 0o640
+            os.chmod(path, 0o600)
+            atomic_file.write_atomic(path, "第二版")
+            assert os.stat(path).st_mode & 0o777 == 0o600
+    finally:
+        os.umask(saved)
+
+
+if __name__ == "__main__":
+    test_skip_unchanged_and_versions()
+    test_failed_write_keeps_original()
+    test_permissions_follow_umask()
+    print("测试完成")
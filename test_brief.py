@@ -0,0 +1,75 @@
+"""
+测试结构化简报 Brief 的解析与校验
+"""
+from service.brief_parser import Brief, BriefFormatError
+
+TEXT_BRIEF = (
+    "*上午时间安排与工作内容【时间:内容】\n"
+    " 1. 优化证书关联关系的逻辑代码\n"
+    " 2. 修复登录模块的bug\n"
+    "\n"
+    "*下午时间安排与工作内容\n"
+    " 1. 完成变更管理优化方案的联调测试\n"
+    "\n"
+    "*今日计划的学习内容与进度\n"
+    "无\n"
+)
+
+
+def test_parse_text():
+    """测试三段式文本解析"""
+    brief = Brief.parse(TEXT_BRIEF)
+    assert brief.morning == "1. 优化证书关联关系的逻辑代码\n2. 修复登录模块的bug"
+    assert brief.afternoon == "1. 完成变更管理优化方案的联调测试"
+    assert brief.learning == "无"
+    assert brief.is_valid
+    # 渲染后再次解析结果不变
+    assert Brief.parse(brief.to_text()).to_dict()['morning'] == brief.morning
+
+
+def test_parse_json():
+    """测试 JSON 解析（条目列表自动编号，支持代码块包裹）"""
+    brief = Brief.parse(
+        '```json\n{"morning": ["优化证书关联关系的逻辑代码", "修复登录模块的bug"],'
+        ' "afternoon": "1. 完成联调测试", "learning": "无"}\n```'
+    )
+    assert brief.morning == "1. 优化证书关联关系的逻辑代码\n2. 修复登录模块的bug"
+    assert brief.afternoon == "1. 完成联调测试"
+    assert brief.is_valid
+
+
+def test_strict_grammar():
+    """测试不符合语法的文本：解析失败时保留原文且校验不通过"""
+    for text in (
+        "今天主要在写代码\n*上午时间安排与工作内容\n1. xxx",
+        "*上午时间安排与工作内容\n1. xxx\n*上午时间安排与工作内容\n2. yyy",
+        "*上午时间安排与工作内容\n1. xxx\n*晚上加班内容\n2. yyy",
+    ):
+        try:
+            Brief.from_text(text)
+        except BriefFormatError:
+            pass
+        else:
+            raise AssertionError(f"应当解析失败: {text!r}")
+        brief = Brief.parse(text)
+        assert brief.raw == text
+        assert not brief.is_valid
+
+
+def test_validate_missing_section():
+    """测试缺少下午内容时校验失败"""
+    brief = Brief.parse('{"morning": ["优化代码"], "afternoon": [], "learning": ""}')
+    try:
+        brief.validate()
+    except BriefFormatError as e:
+        assert "下午" in str(e)
+    else:
+        raise AssertionError("缺少下午内容时应当校验失败")
+
+
+if __name__ == "__main__":
+    test_parse_text()
+    test_parse_json()
+    test_strict_grammar()
+    test_validate_missing_section()
+    print("测试完成")
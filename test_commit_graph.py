@@ -0,0 +1,53 @@
+"""
+测试 commit-graph 维护：缺少/过期检测、有限并发写入、写入前后耗时记录，没有新提交时依据写入记录判定为最新
+"""
+import os
+import tempfile
+import time
+
+from git_fixtures import commit, git, init_repo
+from service.commit_graph_service import GRAPH_FRESH, GRAPH_MISSING, GRAPH_STALE, CommitGraphService
+from service.git_service import GitService
+
+
+def _statuses(graphs: CommitGraphService, repos):
+    return {os.path.basename(item['repo']): item['status'] for item in graphs.scan(repos)}
+
+
+def test_commit_graph_maintenance():
+    with tempfile.TemporaryDirectory() as root:
+        repos = []
+        for name in ('crm', 'api', 'web'):
+            repo = init_repo(os.path.join(root, name))
+            for i in range(3):
+                commit(repo, f'{name} 提交 {i}')
+            repos.append(repo)
+        # worktree 与主检出共用对象库，只处理一次
+        git(repos[0], 'worktree', 'add', '-q', os.path.join(root, 'crm-wt'), '-b', 'wt')
+        checkouts = repos + [os.path.join(root, 'crm-wt')]
+
+        graphs = CommitGraphService(GitService(spool=False), workers=2,
+                                    state_path=os.path.join(root, 'state', 'commit_graph.json'))
+        assert set(_statuses(graphs, checkouts).values()) == {GRAPH_MISSING}
+
+        results = graphs.maintain(checkouts)
+        assert len(results) == 3 and not any(r['error'] for r in results)
+        assert all(r['before'] > 0 and r['after'] > 0 and r['write'] > 0 for r in results)
+        assert all(graphs.graph_mtime(r['common_dir']) for r in results)
+        assert set(_statuses(graphs, checkouts).values()) == {GRAPH_FRESH}
+        assert graphs.maintain(checkouts) == []
+
+        time.sleep(1.1)
+        commit(repos[1], 'api 新提交')
+        # 只新建分支（没有新提交）时 git 不改写 commit-graph 文件，依据写入记录判定
+        git(repos[2], 'branch', 'feature')
+        assert _statuses(graphs, checkouts) == {'crm': GRAPH_FRESH, 'api': GRAPH_STALE, 'web': GRAPH_STALE}
+        assert sorted(os.path.basename(r['repo']) for r in graphs.maintain(checkouts)) == ['api', 'web']
+        assert set(_statuses(graphs, checkouts).values()) == {GRAPH_FRESH}
+
+        assert len(graphs.maintain(checkouts, force=True)) == 3
+
+
+if __name__ == "__main__":
+    test_commit_graph_maintenance()
+    print("测试完成")
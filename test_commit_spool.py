@@ -0,0 +1,97 @@
+"""
+测试提交 spool：钩子安装/卸载、提交写入 spool、收集时从 spool 读取，以及引用有钩子之外的变动时回退到 git log
+"""
+import json
+import os
+import tempfile
+import time
+from datetime import datetime
+
+from git_fixtures import commit, git, init_repo
+from service.commit_spool import CommitSpool
+from service.git_service import GitService
+
+
+def _setup(root: str):
+    repo = init_repo(os.path.join(root, 'repo'))
+    spool = CommitSpool(os.path.join(root, 'spool'))
+    common_dir = GitService.resolve_git_dirs(repo)[1]
+    return repo, spool, common_dir
+
+
+def test_install_and_record():
+    with tempfile.TemporaryDirectory() as root:
+        repo, spool, common_dir = _setup(root)
+        hook = os.path.join(common_dir, 'hooks', 'post-commit')
+        with open(hook, 'w', encoding='utf-8') as f:
+            f.write('#!/bin/sh\necho "已有钩子"\nexit 0\n')
+        assert spool.install(repo, common_dir) == "已安装"
+        git(repo, 'commit', '-q', '--allow-empty', '-m', '修复登录', '-m', '补充说明')
+
+        today = datetime.now()
+        store = spool.read(today)[common_dir]
+        assert not store['rewritten'] and len(store['records']) == 1
+        record = store['records'][0]
+        assert record['message'] == '修复登录' and record['body'] == '补充说明' and record['author'] == 'tester'
+        assert len(record['hash']) == 40
+
+        git(repo, 'commit', '-q', '--amend', '--allow-empty', '-m', '修复登录（改）')
+        assert spool.read(today)[common_dir]['rewritten']
+
+        # 卸载后保留原有钩子内容
+        assert spool.uninstall(repo, common_dir)
+        with open(hook, 'r', encoding='utf-8') as f:
+            assert f.read() == '#!/bin/sh\necho "已有钩子"\nexit 0\n'
+        assert not os.path.exists(os.path.join(common_dir, 'hooks', 'post-rewrite'))
+        assert spool.installed() == {}
+
+
+def test_collect_from_spool():
+    with tempfile.TemporaryDirectory() as root:
+        repo, spool, common_dir = _setup(root)
+        spool.install(repo, common_dir)
+        # 模拟钩子在今天之前已安装
+        with open(spool.registry_path, 'w', encoding='utf-8') as f:
+            json.dump({common_dir: time.time() - 2 * 86400}, f)
+        commit(repo, '今日提交')
+
+        git_service = GitService(prefilter=True, spool=True)
+        git_service.spool = spool
+        commits = git_service.get_all_today_commits([repo])
+        assert git_service.last_spooled == 1
+        assert commits == GitService(spool=False).get_all_today_commits([repo])
+
+        # 引用有钩子之外的变动（如 fetch 新建分支）：回退到 git log
+        git(repo, 'branch', 'feature')
+        future = time.time() + 10
+        os.utime(os.path.join(common_dir, 'refs', 'heads'), (future, future))
+        assert len(git_service.get_all_today_commits([repo])) == 1
+        assert git_service.last_spooled == 0
+
+
+def test_spool_respects_ref_exclude():
+    with tempfile.TemporaryDirectory() as root:
+        repo, spool, common_dir = _setup(root)
+        spool.install(repo, common_dir)
+        with open(spool.registry_path, 'w', encoding='utf-8') as f:
+            json.dump({common_dir: time.time() - 2 * 86400}, f)
+        commit(repo, '今日提交')
+        git(repo, 'checkout', '-q', '-b', 'wip/draft')
+        commit(repo, '草稿提交')
+        git(repo, 'checkout', '-q', 'main')
+
+        # 排除的分支上的提交不从 spool 读取，与 git log 结果一致
+        scope = {'exclude': ['refs/heads/wip/*']}
+        git_service = GitService(prefilter=True, spool=True, ref_scope=scope)
+        git_service.spool = spool
+        commits = git_service.get_all_today_commits([repo])
+        assert git_service.last_spooled == 0
+        assert [c['message'] for c in commits] == ['今日提交']
+        assert commits == GitService(spool=False, ref_scope=scope).get_all_today_commits([repo])
+
+
+if __name__ == "__main__":
+    test_install_and_record()
+    test_collect_from_spool()
+    test_spool_respects_ref_exclude()
+    print("测试完成")
@@ -0,0 +1,58 @@
+"""
+测试提交索引 CommitStore 与团队报告：按作者/仓库/日期/时段查询，提交清单使用提交所在日期
+"""
+from datetime import datetime
+
+from service.commit_store import CommitStore
+from service.report_service import ReportService
+
+COMMITS = [
+    {'hash': 'a1', 'author': '张三', 'date': '2026-01-26 09:30:00', 'message': '修复登录', 'body': '', 'repo': 'crm'},
+    {'hash': 'a2', 'author': '张三', 'date': '2026-01-26 20:10:00', 'message': '补充测试', 'body': '', 'repo': 'crm'},
+    {'hash': 'b1', 'author': '李四', 'date': '2026-01-26 14:00:00', 'message': '新增接口', 'body': '细节', 'repo': 'api'},
+    {'hash': 'b2', 'author': '李四', 'date': '2026-01-27 10:00:00', 'message': '优化查询', 'body': '', 'repo': 'crm'},
+    # 同一仓库的重复提交只保存一次
+    {'hash': 'b2', 'author': '李四', 'date': '2026-01-27 10:00:00', 'message': '优化查询', 'body': '', 'repo': 'crm'},
+]
+
+
+def test_store_queries():
+    store = CommitStore(COMMITS)
+    assert len(store) == 4
+    assert store.authors() == ['张三', '李四']
+    assert store.days() == ['2026-01-26', '2026-01-27']
+    assert [c['hash'] for c in store.query(author='李四')] == ['b2', 'b1']
+    assert [c['hash'] for c in store.query(repo='crm', day='2026-01-26')] == ['a2', 'a1']
+    assert [c['hash'] for c in store.query(since='2026-01-27')] == ['b2']
+    assert [c['hash'] for c in store.query(hours=range(18, 24))] == ['a2']
+    assert store.count(author='张三') == 2
+    assert store.stats() == {
+        'commits': 4, 'authors': 2, 'repos': 2, 'days': 2,
+        'first': '2026-01-26 09:30:00', 'last': '2026-01-27 10:00:00',
+    }
+
+
+def test_commit_list_uses_commit_date():
+    report_service = ReportService()
+    one_day = [c for c in COMMITS if c['date'].startswith('2026-01-26')]
+    text = report_service.generate_commit_list(one_day)
+    assert "今日提交清单 - 2026年01月26日" in text
+    assert "总提交数: 3" in text and "涉及仓库: 2" in text
+    text = report_service.generate_commit_list(COMMITS, datetime(2026, 1, 27))
+    assert "今日提交清单 - 2026年01月27日" in text
+
+
+def test_team_report():
+    report = ReportService().generate_team_report(COMMITS, datetime(2026, 1, 26), datetime(2026, 1, 27))
+    assert "团队提交报告 - 2026年01月26日 ~ 2026年01月27日" in report
+    for section in ("## 团队概览", "## 按人员", "## 按仓库", "## 按日期", "## 按时段"):
+        assert section in report
+    assert "总提交数: 4" in report
+    assert "晚间 18-24  1       25%" in report
+
+
+if __name__ == "__main__":
+    test_store_queries()
+    test_commit_list_uses_commit_date()
+    test_team_report()
+    print("测试完成")
@@ -0,0 +1,122 @@
+"""
+测试 CRM HTTP 发布功能（使用本地桩 CRM 服务，无需浏览器和外网）
+"""
+import tempfile
+
+import main
+from service.brief_parser import Brief
+from service.crm_http_service import CRMHttpService
+from service.outbox_service import STATE_PUBLISHING, OutboxService
+from stub_crm_server import StubCRMServer
+
+BRIEF = (
+    "*上午时间安排与工作内容\n"
+    "1. 优化证书关联关系的逻辑代码\n"
+    "\n"
+    "*下午时间安排与工作内容\n"
+    "1. 完成变更管理优化方案的联调测试\n"
+    "\n"
+    "*今日计划的学习内容与进度\n"
+    "无\n"
+)
+
+
+def test_login_and_publish():
+    """测试登录并提交日志表单"""
+    server = StubCRMServer().start()
+    try:
+        crm_service = CRMHttpService(server.url, server.username, server.password)
+        assert crm_service.login()
+        assert crm_service.publish_report(BRIEF)
+        crm_service.close()
+
+        assert len(server.published) == 1
+        form = server.published[0]
+        assert form['worksummary'] == "1. 优化证书关联关系的逻辑代码"
+        assert form['workfld_21'] == "1. 完成变更管理优化方案的联调测试"
+        assert form['workexperience'] == "无"
+        assert form['workfld_22'] == "无"
+        # 明日工作计划保留原值，与浏览器发布一致
+        assert form['workplan'] == ""
+        assert form['logtype'] == "day"
+        # select 取选中项，无选中项时取第一项；只提交已勾选的 checkbox
+        assert form['visibility'] == "dept"
+        assert form['category'] == "日常工作"
+        assert form['notify_leader'] == "1"
+        assert 'send_sms' not in form
+    finally:
+        server.stop()
+
+
+def test_login_with_wrong_password():
+    """测试密码错误时登录失败且不会提交"""
+    server = StubCRMServer().start()
+    try:
+        crm_service = CRMHttpService(server.url, server.username, 'wrong')
+        assert not crm_service.login()
+        assert not crm_service.publish_report(BRIEF)
+        crm_service.close()
+        assert not server.published
+    finally:
+        server.stop()
+
+
+def test_unknown_result_not_republished():
+    """测试表单已提交但未检测到成功提示时：不回退到浏览器重发，发件箱记录保持 publishing"""
+    server = StubCRMServer().start()
+    server.publish_page = "<html><body>请稍候</body></html>"
+    saved = {name: getattr(main, name) for name in ('CRM_PUBLISH_BACKEND', 'CRM_URL', 'CRM_USERNAME', 'CRM_PASSWORD')}
+    try:
+        crm_service = CRMHttpService(server.url, server.username, server.password)
+        assert crm_service.login()
+        assert crm_service.publish_report(BRIEF) is None
+        crm_service.close()
+
+        main.CRM_PUBLISH_BACKEND, main.CRM_URL = 'http', server.url
+        main.CRM_USERNAME, main.CRM_PASSWORD = server.username, server.password
+        with tempfile.TemporaryDirectory() as outbox_dir:
+            outbox = OutboxService(outbox_dir, username="tester")
+            entry = outbox.enqueue(Brief.parse(BRIEF), "20260126")
+            assert not main.publish_outbox_entry(outbox, entry)
+            assert len(server.published) == 2
+            assert outbox.get("20260126")['state'] == STATE_PUBLISHING
+            # 未加 --force 时不会再次发布
+            assert not main.publish_outbox_entry(outbox, entry)
+            assert len(server.published) == 2
+    finally:
+        for name, value in saved.items():
+            setattr(main, name, value)
+        server.stop()
+
+
+def test_server_error_not_republished():
+    """测试提交后服务端 5xx 或读取超时时返回结果未知（不回退重发），连接失败时返回 False"""
+    server = StubCRMServer().start()
+    try:
+        server.publish_status = 502
+        crm_service = CRMHttpService(server.url, server.username, server.password)
+        assert crm_service.login()
+        assert crm_service.publish_report(BRIEF) is None
+        crm_service.close()
+
+        server.publish_status, server.publish_delay = 200, 1
+        crm_service = CRMHttpService(server.url, server.username, server.password, timeout=0.3)
+        assert crm_service.login()
+        assert crm_service.publish_report(BRIEF) is None
+        assert len(server.published) == 2
+
+        server.stop()
+        server = None
+        crm_service.close()
+        assert crm_service.publish_report(BRIEF) is False
+    finally:
+        if server is not None:
+            server.stop()
+
+
+if __name__ == "__main__":
+    test_login_and_publish()
+    test_login_with_wrong_password()
+    test_unknown_result_not_republished()
+    test_server_error_not_republished()
+    print("测试完成")
@@ -0,0 +1,98 @@
+"""
+测试结构化导出：带元数据的简报 JSON、按日期范围导出 JSON Lines / Parquet
+"""
+import json
+import os
+import tempfile
+from datetime import datetime
+
+from service import export_service
+from service.brief_parser import Brief
+from service.export_service import FORMAT_JSONL, FORMAT_PARQUET, ExportService, load_pyarrow
+from service.rollup_service import RollupService
+
+DAY = datetime(2026, 1, 26)
+COMMITS = [
+    {'hash': 'a1', 'author': 'tester', 'date': '2026-01-26 09:30:00', 'message': '修复登录', 'body': '', 'repo': 'crm'},
+    {'hash': 'b1', 'author': '李四', 'date': '2026-01-26 14:00:00', 'message': '新增接口', 'body': '', 'repo': 'api'},
+]
+
+
+def _prepare(reports_dir: str) -> ExportService:
+    exporter = ExportService(reports_dir)
+    exporter.cache.save(DAY, COMMITS)
+    exporter.save_brief_json(
+        Brief(morning="1. 修复登录", afternoon="1. 联调测试", learning="无"), DAY,
+        author='tester', source='mine', commit_count=2, repos=['api', 'crm'],
+    )
+    return exporter
+
+
+def test_brief_json():
+    with tempfile.TemporaryDirectory() as reports_dir:
+        exporter = _prepare(reports_dir)
+        record = exporter.load_brief_json(DAY)
+        # 简报和元数据未变化时重新保存不会改写文件
+        path = exporter.brief_json_path(DAY)
+        os.utime(path, (1_700_000_000, 1_700_000_000))
+        _prepare(reports_dir)
+        assert os.stat(path).st_mtime == 1_700_000_000
+        assert record['valid'] is True
+        assert record['brief']['morning'] == "1. 修复登录"
+        assert record['metadata']['source'] == 'mine'
+        # 汇总报告优先读取 JSON 简报
+        days = RollupService(reports_dir, exporter.cache).load_daily(DAY, DAY)
+        assert days[0]['brief'].afternoon == "1. 联调测试"
+
+
+def test_export_jsonl_and_parquet():
+    with tempfile.TemporaryDirectory() as reports_dir:
+        exporter = _prepare(reports_dir)
+        commits_path, briefs_path = exporter.export(DAY, datetime(2026, 1, 27), FORMAT_JSONL)
+        with open(commits_path, 'r', encoding='utf-8') as f:
+            rows = [json.loads(line) for line in f]
+        assert [r['hash'] for r in rows] == ['a1', 'b1'] and rows[0]['day'] == '2026-01-26'
+        with open(briefs_path, 'r', encoding='utf-8') as f:
+            brief_row = json.loads(f.readline())
+        assert brief_row['repos'] == '["api", "crm"]'
+
+        pyarrow = load_pyarrow()
+        if pyarrow is None:
+            print("未安装 pyarrow，跳过 Parquet 导出")
+            return
+        commits_path, _ = exporter.export(DAY, DAY, FORMAT_PARQUET)
+        assert os.path.basename(commits_path) == "commits_20260126_20260126.parquet"
+        table = pyarrow.parquet.read_table(commits_path)
+        assert table.num_rows == 2 and 'author' in table.column_names
+
+
+def test_parquet_keeps_late_columns_and_falls_back():
+    with tempfile.TemporaryDirectory() as reports_dir:
+        exporter = ExportService(reports_dir)
+        # 只在后面的行出现的字段（跨仓库去重、多机汇总）也要导出
+        exporter.cache.save(DAY, COMMITS + [dict(COMMITS[0], hash='c1', also_in=['crm-fork'], machine='vm')])
+
+        pyarrow = load_pyarrow()
+        if pyarrow is not None:
+            commits_path, _ = exporter.export(DAY, DAY, FORMAT_PARQUET)
+            table = pyarrow.parquet.read_table(commits_path)
+            assert {'also_in', 'machine'} <= set(table.column_names)
+            assert table.column('also_in').to_pylist() == [None, None, ['crm-fork']]
+
+        # 未安装 pyarrow 时改为导出 JSON Lines
+        original = export_service.load_pyarrow
+        export_service.load_pyarrow = lambda: None
+        try:
+            commits_path, _ = exporter.export(DAY, DAY, FORMAT_PARQUET)
+        finally:
+            export_service.load_pyarrow = original
+        assert commits_path.endswith('.jsonl')
+        with open(commits_path, 'r', encoding='utf-8') as f:
+            assert json.loads(f.readlines()[-1])['machine'] == 'vm'
+
+
+if __name__ == "__main__":
+    test_brief_json()
+    test_export_jsonl_and_parquet()
+    test_parquet_keeps_late_columns_and_falls_back()
+    print("测试完成")
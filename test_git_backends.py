@@ -0,0 +1,47 @@
+"""
+测试 pygit2 进程内读取后端：与 git log 子进程返回相同的提交记录（含来源引用、提交体、日期窗口）
+"""
+import os
+import tempfile
+from datetime import datetime, timedelta
+
+import pytest
+
+from git_fixtures import commit, git, init_repo
+from service.git_service import GitService, load_pygit2
+
+
+def test_pygit2_matches_subprocess():
+    if load_pygit2() is None:
+        pytest.skip("未安装 pygit2")
+    today = datetime.now().replace(hour=10, minute=0, second=0, microsecond=0)
+    with tempfile.TemporaryDirectory() as root:
+        repo = init_repo(os.path.join(root, 'repo'))
+        commit(repo, '昨天的提交', when=today - timedelta(days=1))
+        commit(repo, '标题第一行\n标题第二行\n\n提交体第一段\n\n提交体第二段', when=today)
+        git(repo, 'checkout', '-q', '-b', 'feature')
+        commit(repo, 'feature 提交', when=today + timedelta(minutes=5), author='张三')
+        git(repo, 'checkout', '-q', 'main')
+        commit(repo, 'main 提交', when=today + timedelta(minutes=10))
+        git(repo, 'tag', 'v1.0')
+        git(repo, 'checkout', '-q', '--detach', 'HEAD~1')
+        commit(repo, '分离 HEAD 提交', when=today + timedelta(minutes=20))
+
+        for target in (today, today - timedelta(days=1), today + timedelta(days=1)):
+            expected = GitService(backend='subprocess')._run_log(repo, target)
+            actual = GitService(backend='pygit2')._run_log(repo, target)
+            key = lambda r: r['hash']
+            assert sorted(actual, key=key) == sorted(expected, key=key), (actual, expected)
+
+        records = GitService(backend='pygit2')._run_log(repo, today)
+        assert len(records) == 4
+        merged = next(r for r in records if r['message'] == '标题第一行 标题第二行')
+        assert merged['body'] == '提交体第一段\n\n提交体第二段'
+
+
+if __name__ == "__main__":
+    if load_pygit2() is None:
+        print("未安装 pygit2，跳过")
+    else:
+        test_pygit2_matches_subprocess()
+    print("测试完成")
@@ -0,0 +1,66 @@
+"""
+测试跨仓库提交去重：同一项目的两个克隆中的同一提交按完整 hash 只保留一条，cherry-pick 的提交按 patch-id 合并，
+空提交即使标题相同也不合并；日报清单中显示短 hash 和其他副本所在的仓库
+"""
+import os
+import tempfile
+
+from git_fixtures import commit, git, init_repo
+from service.git_service import GitService
+from service.report_service import ReportService
+
+
+def _commit_file(repo: str, name: str, content: str, message: str):
+    with open(os.path.join(repo, name), 'w', encoding='utf-8') as f:
+        f.write(content)
+    git(repo, 'add', name)
+    git(repo, 'commit', '-q', '-m', message)
+
+
+def _setup(root: str):
+    crm = init_repo(os.path.join(root, 'crm'))
+    _commit_file(crm, 'a.txt', 'a\n', '共同提交')
+    fork = os.path.join(root, 'crm-fork')
+    git(root, 'clone', '-q', crm, fork)
+    # fork 上的修复被 cherry-pick 回 crm（hash 不同、改动相同）
+    _commit_file(fork, 'b.txt', 'b\n', '修复登录')
+    _commit_file(crm, 'c.txt', 'c\n', '新增接口')
+    git(crm, 'fetch', '-q', fork, 'main')
+    git(crm, 'cherry-pick', 'FETCH_HEAD')
+    # 标题相同的空提交不是同一改动
+    commit(crm, '同步')
+    commit(fork, '同步')
+    return [crm, fork]
+
+
+def test_dedupe_by_hash_and_patch_id():
+    with tempfile.TemporaryDirectory() as root:
+        repos = _setup(root)
+
+        by_hash = GitService(spool=False, dedupe_patch_id=False)
+        commits = by_hash.get_all_today_commits(repos)
+        assert all(len(c['hash']) == 40 for c in commits)
+        assert by_hash.last_duplicates == 1
+        assert [c['message'] for c in commits].count('共同提交') == 1
+        assert [c['message'] for c in commits].count('修复登录') == 2
+        shared = next(c for c in commits if c['message'] == '共同提交')
+        assert shared['also_in'] == ['crm-fork' if shared['repo'] == 'crm' else 'crm']
+
+        git_service = GitService(spool=False)
+        commits = git_service.get_all_today_commits(repos)
+        assert git_service.last_duplicates == 2
+        assert sorted(c['message'] for c in commits) == ['修复登录', '共同提交', '同步', '同步', '新增接口']
+        fix = next(c for c in commits if c['message'] == '修复登录')
+        assert len(fix['also_in']) == 1 and fix['also_in'][0] != fix['repo']
+
+        # 去重不修改原记录，重复调用结果一致
+        assert git_service.dedupe_commits(commits) == commits
+
+        report = ReportService().generate_commit_list(commits)
+        assert f"[{fix['hash'][:7]}]" in report and fix['hash'] not in report
+        assert '同一提交也在' in report
+
+
+if __name__ == "__main__":
+    test_dedupe_by_hash_and_patch_id()
+    print("测试完成")
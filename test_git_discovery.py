@@ -0,0 +1,83 @@
+"""
+测试 Git 仓库发现：排除规则、最大深度、嵌套仓库、符号链接循环保护
+"""
+import os
+import tempfile
+
+from service.git_service import GitService
+
+
+def _make_repo(path: str):
+    os.makedirs(os.path.join(path, '.git'))
+
+
+def _build_tree(root: str):
+    _make_repo(os.path.join(root, 'a', 'repo1'))
+    _make_repo(os.path.join(root, 'a', 'repo1', 'vendor', 'nested'))
+    _make_repo(os.path.join(root, 'b', 'c', 'd', 'repo2'))
+    _make_repo(os.path.join(root, 'node_modules', 'pkg'))
+    _make_repo(os.path.join(root, 'build-output', 'repo3'))
+
+
+def test_discover_defaults():
+    """默认：排除 node_modules，且不深入仓库工作区"""
+    with tempfile.TemporaryDirectory() as root:
+        _build_tree(root)
+        repos = GitService().discover_git_repos(root)
+        names = sorted(os.path.relpath(r, root) for r in repos)
+        assert names == [
+            os.path.join('a', 'repo1'),
+            os.path.join('b', 'c', 'd', 'repo2'),
+            os.path.join('build-output', 'repo3'),
+        ]
+
+
+def test_discover_options():
+    """通配符排除、最大深度、搜索嵌套仓库"""
+    with tempfile.TemporaryDirectory() as root:
+        _build_tree(root)
+        repos = GitService(exclude_dirs=['node_modules', 'build*'], max_depth=2).discover_git_repos(root)
+        assert [os.path.relpath(r, root) for r in repos] == [os.path.join('a', 'repo1')]
+
+        repos = GitService(include_submodules=True).discover_git_repos(root)
+        assert os.path.join(root, 'a', 'repo1', 'vendor', 'nested') in repos
+
+
+def test_symlink_loop():
+    """跟随符号链接时不会因循环链接无限遍历"""
+    with tempfile.TemporaryDirectory() as root:
+        _build_tree(root)
+        os.symlink(root, os.path.join(root, 'b', 'loop'))
+        os.symlink(os.path.join(root, 'b', 'c'), os.path.join(root, 'alias'))
+        repos = GitService(follow_symlinks=True).discover_git_repos(root)
+        assert len(repos) == 3
+        assert len(GitService().discover_git_repos(root)) == 3
+
+
+def test_discover_multi_roots():
+    """多路径并行发现：合并重叠路径，符号链接指向的同一仓库只保留一个"""
+    with tempfile.TemporaryDirectory() as root:
+        _build_tree(root)
+        os.symlink(os.path.join(root, 'a'), os.path.join(root, 'link-a'))
+        roots = [
+            os.path.join(root, 'a'),
+            root,
+            os.path.join(root, 'b', 'c'),
+            os.path.join(root, 'link-a'),
+            os.path.join(root, 'missing'),
+        ]
+        repos = GitService().discover_git_repos_multi(roots, workers=4)
+        real_root = os.path.realpath(root)
+        assert repos == [
+            os.path.join(real_root, 'a', 'repo1'),
+            os.path.join(real_root, 'b', 'c', 'd', 'repo2'),
+            os.path.join(real_root, 'build-output', 'repo3'),
+        ]
+
+
+if __name__ == "__main__":
+    test_discover_defaults()
+    test_discover_options()
+    test_symlink_loop()
+    test_discover_multi_roots()
+    print("测试完成")
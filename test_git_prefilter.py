@@ -0,0 +1,44 @@
+"""
+测试仓库活跃度预筛选：引用在目标日期以来无变动的仓库跳过 git log，关闭预筛选时照常收集
+"""
+import os
+import tempfile
+import time
+
+from git_fixtures import commit, git, init_repo
+from service.git_service import GitService
+
+
+def _age_tree(path: str, seconds: float):
+    """把目录树下所有文件和目录的修改时间改为 seconds 秒之前"""
+    stamp = time.time() - seconds
+    for dirpath, dirnames, filenames in os.walk(path):
+        for name in filenames:
+            os.utime(os.path.join(dirpath, name), (stamp, stamp))
+        os.utime(dirpath, (stamp, stamp))
+
+
+def test_prefilter_skips_idle_repo():
+    with tempfile.TemporaryDirectory() as root:
+        repo = init_repo(os.path.join(root, 'repo'))
+        commit(repo, '今日提交')
+
+        git_service = GitService()
+        assert len(git_service.get_all_today_commits([repo])) == 1
+        assert git_service.last_skipped == 0
+
+        # 引用修改时间早于今天 00:00：预筛选跳过，关闭预筛选时仍能查到提交
+        _age_tree(os.path.join(repo, '.git'), 3 * 86400)
+        assert git_service.get_all_today_commits([repo]) == []
+        assert git_service.last_skipped == 1
+        assert len(GitService(prefilter=False).get_all_today_commits([repo])) == 1
+
+        # 新增分支会改写 refs/heads 目录，仓库重新视为活跃
+        git(repo, 'branch', 'feature')
+        assert len(git_service.get_all_today_commits([repo])) == 1
+        assert git_service.last_skipped == 0
+
+
+if __name__ == "__main__":
+    test_prefilter_skips_idle_repo()
+    print("测试完成")
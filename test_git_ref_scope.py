@@ -0,0 +1,93 @@
+"""
+测试引用范围与过滤下推：all / local / remotes 范围、排除标签和 PR 引用、按仓库覆盖范围，
+以及 --author / --no-merges 交给 git 过滤（subprocess 与 pygit2 两种后端结果一致）
+"""
+import os
+import tempfile
+from datetime import datetime
+
+from git_fixtures import git, init_repo
+from service.git_service import GitService, RefScope, load_pygit2
+
+
+def _commit_at(repo: str, ref: str, message: str, *parents: str, author: str = 'tester') -> str:
+    """在 parents 之上创建空提交并让 ref 指向它"""
+    args = ['commit-tree', '4b825dc642cb6eb9a060e54bf8d69288fbee4904']
+    for parent in parents:
+        args.extend(['-p', parent])
+    commit = git(repo, *args, '-m', message, author=author)
+    git(repo, 'update-ref', ref, commit)
+    return commit
+
+
+def _setup(root: str) -> str:
+    repo = init_repo(os.path.join(root, 'repo'))
+    base = _commit_at(repo, 'refs/heads/main', '初始')
+    feature = _commit_at(repo, 'refs/heads/feature/x', '功能提交', base)
+    colleague = _commit_at(repo, 'refs/heads/main', '同事提交', base, author='colleague')
+    _commit_at(repo, 'refs/heads/main', '合并', colleague, feature)
+    _commit_at(repo, 'refs/tags/v1', '标签提交', base)
+    _commit_at(repo, 'refs/pull/1/head', 'PR 提交', base)
+    _commit_at(repo, 'refs/remotes/origin/dev', 'origin 提交', base)
+    _commit_at(repo, 'refs/remotes/upstream/dev', 'upstream 提交', base)
+    return repo
+
+
+LOCAL = {'初始', '功能提交', '同事提交', '合并'}
+ALL = LOCAL | {'标签提交', 'PR 提交', 'origin 提交', 'upstream 提交'}
+
+
+def _messages(repo: str, **kwargs) -> set:
+    author = kwargs.pop('author', None)
+    no_merges = kwargs.pop('no_merges', False)
+    service = GitService(spool=False, **kwargs)
+    return {c['message'] for c in service.get_all_commits_by_date([repo], datetime.now(), author, no_merges)}
+
+
+def _check_backend(repo: str, backend: str):
+    assert _messages(repo, backend=backend) == ALL
+    assert _messages(repo, backend=backend, ref_scope='local') == LOCAL
+    assert _messages(repo, backend=backend, ref_scope={'scope': 'remotes', 'remotes': ['origin']}) == LOCAL | {'origin 提交'}
+    assert _messages(repo, backend=backend, ref_scope='remotes') == LOCAL | {'origin 提交', 'upstream 提交'}
+    excluded = {'scope': 'all', 'exclude': ['refs/tags/*', 'refs/pull/*']}
+    assert _messages(repo, backend=backend, ref_scope=excluded) == ALL - {'标签提交', 'PR 提交'}
+    # 按目录名、按路径覆盖全局范围
+    assert _messages(repo, backend=backend, ref_scope_overrides={'repo': 'local'}) == LOCAL
+    assert _messages(repo, backend=backend, ref_scope_overrides={repo: 'local', 'other': 'all'}) == LOCAL
+    # 作者（完全一致）和合并提交过滤
+    assert _messages(repo, backend=backend, ref_scope='local', author='colleague') == {'同事提交'}
+    assert _messages(repo, backend=backend, ref_scope='local', author='test') == set()
+    assert _messages(repo, backend=backend, ref_scope='local', author='tester', no_merges=True) == {'初始', '功能提交'}
+
+
+def test_ref_scope_args():
+    assert RefScope().log_args() == ['--all']
+    assert RefScope('remotes', ['origin'], ['refs/tags/*']).log_args() == [
+        '--exclude=refs/tags/*', '--glob=refs/heads/*', '--exclude=refs/tags/*', '--glob=refs/remotes/origin/*', 'HEAD',
+    ]
+    assert RefScope('local').includes('refs/heads/feature/x') and not RefScope('local').includes('refs/tags/v1')
+    try:
+        RefScope('tags')
+        assert False, "未知范围应报错"
+    except ValueError:
+        pass
+
+
+def test_ref_scope_subprocess():
+    with tempfile.TemporaryDirectory() as root:
+        _check_backend(_setup(root), 'subprocess')
+
+
+def test_ref_scope_pygit2():
+    if load_pygit2() is None:
+        print("未安装 pygit2，跳过")
+        return
+    with tempfile.TemporaryDirectory() as root:
+        _check_backend(_setup(root), 'pygit2')
+
+
+if __name__ == "__main__":
+    test_ref_scope_args()
+    test_ref_scope_subprocess()
+    test_ref_scope_pygit2()
+    print("测试完成")
@@ -0,0 +1,63 @@
+"""
+测试 worktree / 子模块识别：.git 为文件的检出目录能被发现，共享对象库的 worktree 只扫描一次，
+提交仍归属到对应的检出目录
+"""
+import os
+import tempfile
+
+from git_fixtures import commit, git, init_repo
+from service.git_service import GitService
+
+
+def _build_worktrees(root: str):
+    main = init_repo(os.path.join(root, 'project'))
+    commit(main, 'main 分支提交')
+    git(main, 'worktree', 'add', '-q', os.path.join(root, 'project-feature'), '-b', 'feature')
+    commit(os.path.join(root, 'project-feature'), 'feature 分支提交')
+    git(main, 'worktree', 'add', '-q', '--detach', os.path.join(root, 'project-hotfix'))
+    commit(os.path.join(root, 'project-hotfix'), '分离 HEAD 提交')
+    return main
+
+
+def test_worktrees_share_one_scan():
+    """三个检出目录共享一个对象库：只执行一次 git log，提交按检出目录归属且不重复"""
+    with tempfile.TemporaryDirectory() as root:
+        root = os.path.realpath(root)
+        _build_worktrees(root)
+        git_service = GitService()
+        repos = git_service.discover_git_repos(root)
+        assert [os.path.basename(r) for r in repos] == ['project', 'project-feature', 'project-hotfix']
+
+        groups = git_service.group_by_object_store(repos)
+        assert list(groups) == [os.path.join(root, 'project', '.git')]
+        assert groups[os.path.join(root, 'project', '.git')][0]['path'] == os.path.join(root, 'project')
+
+        commits = git_service.get_all_commits_by_date(repos)
+        by_message = {c['message']: c['repo'] for c in commits}
+        assert len(commits) == 3
+        assert by_message == {
+            'main 分支提交': 'project',
+            'feature 分支提交': 'project-feature',
+            '分离 HEAD 提交': 'project-hotfix',
+        }
+
+
+def test_gitfile_submodule():
+    """子模块的 .git 为文件且拥有独立对象库"""
+    with tempfile.TemporaryDirectory() as root:
+        sub_git = os.path.join(root, 'parent', '.git', 'modules', 'lib')
+        os.makedirs(sub_git)
+        os.makedirs(os.path.join(root, 'parent', 'lib'))
+        with open(os.path.join(root, 'parent', 'lib', '.git'), 'w') as f:
+            f.write('gitdir: ../.git/modules/lib\n')
+
+        repos = GitService(include_submodules=True).discover_git_repos(root)
+        assert os.path.join(root, 'parent', 'lib') in repos
+        git_dir, common_dir = GitService.resolve_git_dirs(os.path.join(root, 'parent', 'lib'))
+        assert git_dir == common_dir == os.path.realpath(sub_git)
+
+
+if __name__ == "__main__":
+    test_worktrees_share_one_scan()
+    test_gitfile_submodule()
+    print("测试完成")
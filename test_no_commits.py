@@ -61,7 +61,7 @@ def test_no_commits_today():
     # 保存到临时文件
     test_path = f"/Users/sai0/Documents/开发代码/自动化日报提交/reports/简报_测试_{datetime.now().strftime('%Y%m%d_%H%M%S')}.txt"
     with open(test_path, 'w', encoding='utf-8') as f:
-        f.write(brief)
+        f.write(brief.to_text())
     print(f"\n简报已保存到: {test_path}")
 
 if __name__ == "__main__":
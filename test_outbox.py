@@ -0,0 +1,84 @@
+"""
+测试发布发件箱：记录简报、更新发布状态、已发布的日期不会被重复发布
+"""
+import tempfile
+from datetime import datetime, timedelta
+
+import main
+from service.brief_parser import Brief
+from service.outbox_service import (
+    OutboxService,
+    STATE_FAILED,
+    STATE_PENDING,
+    STATE_PUBLISHED,
+    STATE_PUBLISHING,
+)
+
+BRIEF = Brief(morning="1. 优化代码", afternoon="1. 联调测试", learning="无")
+
+
+def test_outbox_lifecycle():
+    """测试 pending -> publishing -> failed -> published 的状态流转"""
+    with tempfile.TemporaryDirectory() as outbox_dir:
+        outbox = OutboxService(outbox_dir, username="tester")
+        entry = outbox.enqueue(BRIEF, "20260126")
+        assert entry['state'] == STATE_PENDING
+        assert [e['date'] for e in outbox.pending()] == ["20260126"]
+        assert outbox.brief_of(entry).morning == "1. 优化代码"
+
+        outbox.mark("20260126", STATE_PUBLISHING)
+        # 发布中断（结果未知）的记录默认不会被重试
+        assert outbox.pending() == []
+        assert len(outbox.pending(include_in_flight=True)) == 1
+
+        outbox.mark("20260126", STATE_FAILED, error="CRM 发布失败")
+        assert outbox.get("20260126")['last_error'] == "CRM 发布失败"
+        outbox.mark("20260126", STATE_PUBLISHING)
+        entry = outbox.mark("20260126", STATE_PUBLISHED)
+        assert entry['attempts'] == 2
+        assert outbox.pending() == []
+
+
+def test_published_entry_not_overwritten():
+    """测试已发布的日期重新生成简报后仍保持已发布状态"""
+    with tempfile.TemporaryDirectory() as outbox_dir:
+        outbox = OutboxService(outbox_dir, username="tester")
+        outbox.enqueue(BRIEF, "20260126")
+        outbox.mark("20260126", STATE_PUBLISHED)
+        entry = outbox.enqueue(Brief(morning="新内容", afternoon="新内容"), "20260126")
+        assert entry['state'] == STATE_PUBLISHED
+        assert entry['brief']['morning'] == "1. 优化代码"
+        # 幂等键按用户区分
+        assert OutboxService(outbox_dir, username="other").get("20260126") is None
+
+
+def test_publish_pending_skips_past_dates():
+    """测试默认只发布今天的简报：以前日期的简报会作为今天的日志发布，需显式指定才发布"""
+    today = datetime.now().strftime('%Y%m%d')
+    yesterday = (datetime.now() - timedelta(days=1)).strftime('%Y%m%d')
+    saved = main.OutboxService, main.publish_outbox_entry
+    published = []
+    with tempfile.TemporaryDirectory() as outbox_dir:
+        outbox = OutboxService(outbox_dir, username="tester")
+        outbox.enqueue(BRIEF, yesterday)
+        outbox.enqueue(BRIEF, today)
+        main.OutboxService = lambda: outbox
+        main.publish_outbox_entry = lambda box, entry, force=False: published.append(entry['date']) or True
+        try:
+            assert main.publish_pending()
+            assert published == [today]
+            published.clear()
+            assert main.publish_pending(date=yesterday)
+            assert published == [yesterday]
+            published.clear()
+            assert main.publish_pending(include_past=True)
+            assert published == [yesterday, today]
+        finally:
+            main.OutboxService, main.publish_outbox_entry = saved
+
+
+if __name__ == "__main__":
+    test_outbox_lifecycle()
+    test_published_entry_not_overwritten()
+    test_publish_pending_skips_past_dates()
+    print("测试完成")
@@ -0,0 +1,88 @@
+"""
+测试仓库耗时历史：从慢到快调度、按历史设定超时、连续超时熔断与冷却后恢复、并行收集结果与串行一致
+"""
+import os
+import subprocess
+import tempfile
+import time
+
+from git_fixtures import commit, init_repo
+from service.git_service import GitService
+from service.repo_history import RepoHistory
+
+
+def test_schedule_and_timeout():
+    with tempfile.TemporaryDirectory() as root:
+        history = RepoHistory(os.path.join(root, 'history.json'))
+        history.record('small', 0.2)
+        history.record('giant', 12.0)
+        history.record('giant', 8.0)
+        history.record('medium', 1.5)
+        assert history.schedule(['small', 'medium', 'new', 'giant']) == ['new', 'giant', 'medium', 'small']
+
+        assert history.timeout('new') == 30
+        assert history.timeout('small') == 10        # 下限
+        assert history.timeout('giant') == 48        # 最近最大耗时 × 4
+        history.record('medium', 30, timeout=6)
+        assert history.timeout('medium') == 12       # 上次超时：加倍
+        assert history.schedule(['small', 'medium']) == ['medium', 'small']
+
+        history.save()
+        assert RepoHistory(history.path).repos == history.repos
+
+
+def test_circuit_breaker():
+    with tempfile.TemporaryDirectory() as root:
+        history = RepoHistory(os.path.join(root, 'history.json'))
+        for _ in range(2):
+            history.record('giant', 30, timeout=30)
+        assert not history.is_open('giant')
+        history.record('giant', 60, timeout=60)
+        assert history.is_open('giant')
+        # 冷却结束后放行一次，成功则恢复
+        assert not history.is_open('giant', now=time.time() + 25 * 3600)
+        history.record('giant', 5.0)
+        assert not history.is_open('giant') and history.timeout('giant') == 20
+
+
+def test_collect_with_history():
+    with tempfile.TemporaryDirectory() as root:
+        repos = []
+        for name in ('crm', 'api', 'web'):
+            repo = init_repo(os.path.join(root, name))
+            for i in range(2):
+                commit(repo, f'{name} {i}')
+            repos.append(repo)
+
+        expected = GitService(spool=False, history=False, workers=1).get_all_today_commits(repos)
+        history = RepoHistory(os.path.join(root, 'history.json'))
+        git_service = GitService(spool=False, history=history, workers=3)
+        assert git_service.get_all_today_commits(repos) == expected
+        stores = {os.path.basename(checkouts[0]['path']): common_dir
+                  for common_dir, checkouts in git_service.group_by_object_store(repos).items()}
+        assert all(len(history.repos[d]['durations']) == 1 for d in stores.values())
+
+        # 熔断中的仓库跳过并提示，其余照常收集
+        for _ in range(3):
+            history.record(stores['api'], 30, timeout=30)
+        commits = git_service.get_all_today_commits(repos)
+        assert git_service.last_broken == [repos[1]]
+        assert {c['repo'] for c in commits} == {'crm', 'web'}
+
+        # 超时由调用方记录
+        checkouts = git_service.group_by_object_store([repos[0]])[stores['crm']]
+        try:
+            git_service._get_store_commits(checkouts, timeout=1e-6)
+            assert False, "应超时"
+        except subprocess.TimeoutExpired:
+            pass
+
+        git_service.save_history()
+        assert os.path.exists(history.path)
+
+
+if __name__ == "__main__":
+    test_schedule_and_timeout()
+    test_circuit_breaker()
+    test_collect_with_history()
+    print("测试完成")
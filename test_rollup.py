@@ -0,0 +1,78 @@
+"""
+测试周报/月报汇总：读取已保存的每日简报和提交缓存，整个周期只调用一次模型
+"""
+import os
+import tempfile
+from datetime import datetime
+
+import main
+from config import BRIEF_FILE_FORMAT
+from service.brief_parser import Brief
+from service.commit_cache import CommitCache
+from service.rollup_service import PERIOD_MONTH, PERIOD_QUARTER, PERIOD_WEEK, RollupService, period_range
+from service.telemetry_service import telemetry
+
+
+class RecordingChat:
+    """记录调用次数的模型替身"""
+
+    def __init__(self):
+        self.calls = []
+
+    def chat(self, system, user, max_tokens=1024, json_mode=False):
+        self.calls.append(user)
+        return "主要工作：\n1. 完成证书模块优化"
+
+
+def test_period_range():
+    assert period_range(PERIOD_WEEK, datetime(2026, 1, 28)) == (datetime(2026, 1, 26), datetime(2026, 2, 1))
+    assert period_range(PERIOD_MONTH, datetime(2026, 2, 10)) == (datetime(2026, 2, 1), datetime(2026, 2, 28))
+    assert period_range(PERIOD_QUARTER, datetime(2026, 5, 3)) == (datetime(2026, 4, 1), datetime(2026, 6, 30))
+
+
+def test_weekly_rollup():
+    with tempfile.TemporaryDirectory() as reports_dir:
+        cache = CommitCache(os.path.join(reports_dir, 'cache'))
+        for day, item in ((26, '优化证书关联逻辑'), (27, '联调变更管理接口')):
+            brief = Brief(morning=f"1. {item}", afternoon="1. 编写单元测试", learning="无")
+            with open(os.path.join(reports_dir, BRIEF_FILE_FORMAT.format(date=f"202601{day}")), 'w',
+                      encoding='utf-8') as f:
+                f.write(str(brief))
+            cache.save(datetime(2026, 1, day), [
+                {'hash': f'h{day}', 'author': 'tester', 'date': f'2026-01-{day} 10:00:00',
+                 'message': item, 'body': '', 'repo': 'crm'},
+            ])
+        # 生成失败时保存的说明文字不计入汇总
+        with open(os.path.join(reports_dir, BRIEF_FILE_FORMAT.format(date="20260128")), 'w', encoding='utf-8') as f:
+            f.write("今日无提交记录，无法生成简报。")
+
+        service = RollupService(reports_dir, cache)
+        start, end = period_range(PERIOD_WEEK, datetime(2026, 1, 27))
+        llm = RecordingChat()
+        content = service.generate_rollup(start, end, PERIOD_WEEK, llm, my_author='tester')
+        assert len(llm.calls) == 1
+        assert "01-26(周一) 上午: 优化证书关联逻辑 | 下午: 编写单元测试" in llm.calls[0]
+        assert "# 工作周报 - 2026年01月26日 ~ 2026年02月01日" in content
+        assert "完成证书模块优化" in content
+        assert "本人提交数: 2" in content
+        assert "已缓存 2/7 天" in content
+
+        path = service.save_rollup(content, start, end, PERIOD_WEEK)
+        assert os.path.basename(path) == "周报_20260126_20260201.txt"
+
+
+def test_rollup_rejects_until_without_since():
+    # 清空前面测试留下的耗时记录，避免退出时导出运行记录
+    telemetry.reset()
+    try:
+        main.main(['rollup', '--until', '20260116', '--no-llm'])
+        assert False, "只指定 --until 应报错"
+    except SystemExit as e:
+        assert e.code == 2
+
+
+if __name__ == "__main__":
+    test_period_range()
+    test_weekly_rollup()
+    test_rollup_rejects_until_without_since()
+    print("测试完成")
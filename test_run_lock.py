@@ -0,0 +1,159 @@
+"""
+测试运行锁与并发安全：另一进程持有运行锁时立即退出或等待其结束，询问是否发布前释放运行锁，
+多个进程同时认领同一条发件箱记录只有一个成功，多个进程写回耗时历史时互不覆盖
+"""
+import builtins
+import os
+import subprocess
+import sys
+import tempfile
+import time
+from concurrent.futures import ProcessPoolExecutor
+
+import main
+from service.brief_parser import Brief
+from service.outbox_service import STATE_PUBLISHING, OutboxService
+from service.repo_history import RepoHistory
+from service.run_lock import RunLock
+from service.telemetry_service import telemetry
+
+ROOT = os.path.dirname(os.path.abspath(__file__))
+
+HOLD = """
+import sys, time
+from service.run_lock import RunLock
+lock = RunLock(lock_dir=sys.argv[1])
+assert lock.acquire(wait=False)
+print('locked', flush=True)
+time.sleep(float(sys.argv[2]))
+"""
+
+
+def _hold_lock(lock_dir: str, seconds: float) -> subprocess.Popen:
+    """在子进程中持有运行锁 seconds 秒"""
+    process = subprocess.Popen([sys.executable, '-c', HOLD, lock_dir, str(seconds)], cwd=ROOT,
+                               stdout=subprocess.PIPE, text=True)
+    assert process.stdout.readline().strip() == 'locked'
+    return process
+
+
+def _claim(outbox_dir: str) -> bool:
+    return OutboxService(outbox_dir, username="tester").claim("20260126") is not None
+
+
+def _record(path: str, name: str):
+    history = RepoHistory(path)
+    history.record(name, 1.0)
+    time.sleep(0.2)
+    history.save()
+
+
+def test_run_lock_exit_or_wait():
+    with tempfile.TemporaryDirectory() as lock_dir:
+        process = _hold_lock(lock_dir, 1.5)
+        try:
+            lock = RunLock(lock_dir=lock_dir)
+            assert not main.acquire_run_lock(lock, wait=False)
+            assert lock.holder()['pid'] == process.pid
+            assert not main.acquire_run_lock(lock, wait=True, timeout=0.3)
+
+            start = time.time()
+            assert main.acquire_run_lock(lock, wait=True, timeout=10)
+            assert time.time() - start > 0.5 and process.poll() is not None
+            assert lock.holder()['pid'] == os.getpid()
+            # 同一进程内的另一个实例也互斥
+            assert not RunLock(lock_dir=lock_dir).acquire(wait=False)
+            lock.release()
+            assert RunLock(lock_dir=lock_dir).acquire(wait=False)
+        finally:
+            process.wait()
+
+
+def test_lock_released_before_prompt():
+    brief = Brief(morning="1. 优化代码", afternoon="1. 联调")
+    names = ('collect_stage', 'merge_remote_commits', 'report_stage', 'brief_stage', 'enqueue_brief')
+    saved = {name: getattr(main, name) for name in names}
+    saved_input = builtins.input
+    prompted = []
+    with tempfile.TemporaryDirectory() as root:
+        outbox = OutboxService(os.path.join(root, 'outbox'), username="tester")
+        lock_dir = os.path.join(root, 'locks')
+
+        def fake_input():
+            # 等待输入时其他流程可以获取运行锁
+            other = RunLock(lock_dir=lock_dir)
+            prompted.append(other.acquire(wait=False))
+            other.release()
+            return 'n'
+
+        main.collect_stage = lambda prefilter, stages: (['repo'], [], [])
+        main.merge_remote_commits = lambda commits: commits
+        main.report_stage = lambda commits, stages: None
+        main.brief_stage = lambda today, yesterday, repo, stages: brief
+        main.enqueue_brief = lambda b: (outbox, outbox.enqueue(b, "20260126"))
+        builtins.input = fake_input
+        try:
+            run_lock = RunLock(lock_dir=lock_dir)
+            assert run_lock.acquire(wait=False)
+            assert not RunLock(lock_dir=lock_dir).acquire(wait=False)
+            main.run_daily_report(run_lock=run_lock)
+            assert prompted == [True]
+            run_lock.release()
+        finally:
+            builtins.input = saved_input
+            for name, value in saved.items():
+                setattr(main, name, value)
+
+
+def test_export_error_does_not_mask_failure():
+    saved = main.RunLock, main.run_collect
+    with tempfile.TemporaryDirectory() as lock_dir:
+        def failing_collect(prefilter, refresh):
+            with telemetry.span('collect'):
+                pass
+            raise RuntimeError('收集失败')
+
+        def failing_export(file_path=None):
+            raise OSError('磁盘已满')
+
+        main.RunLock = lambda: RunLock(lock_dir=lock_dir)
+        main.run_collect = failing_collect
+        telemetry.export = failing_export
+        try:
+            main.main(['collect'])
+            assert False, "应抛出流程本身的异常"
+        except RuntimeError as e:
+            assert str(e) == '收集失败'
+        finally:
+            main.RunLock, main.run_collect = saved
+            del telemetry.export
+            telemetry.reset()
+        assert RunLock(lock_dir=lock_dir).acquire(wait=False)
+
+
+def test_outbox_claim_once():
+    with tempfile.TemporaryDirectory() as outbox_dir:
+        OutboxService(outbox_dir, username="tester").enqueue(Brief(morning="1. 优化代码", afternoon="1. 联调"), "20260126")
+        with ProcessPoolExecutor(max_workers=4) as pool:
+            results = list(pool.map(_claim, [outbox_dir] * 8))
+        assert results.count(True) == 1
+        entry = OutboxService(outbox_dir, username="tester").get("20260126")
+        assert entry['state'] == STATE_PUBLISHING and entry['attempts'] == 1
+
+
+def test_history_concurrent_save():
+    with tempfile.TemporaryDirectory() as root:
+        path = os.path.join(root, 'repo_history.json')
+        names = [f'repo{i}' for i in range(6)]
+        with ProcessPoolExecutor(max_workers=6) as pool:
+            list(pool.map(_record, [path] * len(names), names))
+        assert sorted(RepoHistory(path).repos) == names
+
+
+if __name__ == "__main__":
+    test_run_lock_exit_or_wait()
+    test_lock_released_before_prompt()
+    test_export_error_does_not_mask_failure()
+    test_outbox_claim_once()
+    test_history_concurrent_save()
+    print("测试完成")
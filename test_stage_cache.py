@@ -0,0 +1,116 @@
+"""
+测试流水线阶段缓存：输入指纹未变化时复用上次输出，仓库引用变动后重新收集提交，--refresh 忽略缓存
+"""
+import os
+import tempfile
+import time
+from datetime import datetime
+
+import main
+from git_fixtures import commit, init_repo
+from service import git_service
+from service.commit_cache import CommitCache
+from service.commit_spool import CommitSpool
+from service.repo_history import RepoHistory
+from service.run_lock import RunLock
+from service.stage_cache import STAGE_BRIEF, STAGE_COLLECT, StageCache, fingerprint
+from service.telemetry_service import telemetry
+
+
+def test_lookup_by_fingerprint():
+    with tempfile.TemporaryDirectory() as root:
+        stages = StageCache(cache_dir=root)
+        style = {'tone': '积极'}
+        fp = fingerprint('commits', style)
+        stages.save(STAGE_BRIEF, fp, {'brief': {'morning': '1. 修复登录'}})
+        assert stages.lookup(STAGE_BRIEF, fp) == {'brief': {'morning': '1. 修复登录'}}
+        # 任一输入变化（如简报风格配置）都视为未命中
+        assert stages.lookup(STAGE_BRIEF, fingerprint('commits', {'tone': '简洁'})) is None
+        assert StageCache(cache_dir=root, refresh=True).lookup(STAGE_BRIEF, fp) is None
+        assert stages.lookup(STAGE_COLLECT, fp) is None
+
+
+def _collected() -> bool:
+    """本次运行是否实际执行了 git log 收集"""
+    return any(s['name'] == 'get_all_today_commits' for s in telemetry.spans)
+
+
+def test_collect_stage_reuses_cache():
+    with tempfile.TemporaryDirectory() as root:
+        search_root = os.path.join(root, 'code')
+        repo = init_repo(os.path.join(search_root, 'repo'))
+        commit(repo, '第一条提交')
+
+        original = main.resolve_search_paths, main.CommitCache, git_service.RepoHistory
+        main.resolve_search_paths = lambda: [search_root]
+        main.CommitCache = lambda: CommitCache(os.path.join(root, 'cache'))
+        git_service.RepoHistory = lambda: RepoHistory(os.path.join(root, 'repo_history.json'))
+        try:
+            stages_dir = os.path.join(root, 'stages')
+            telemetry.reset()
+            repos, today, _ = main.collect_stage(stages=StageCache(cache_dir=stages_dir))
+            assert repos == [repo] and len(today) == 1 and _collected()
+
+            # 引用未变化：直接读取提交缓存，不执行 git log
+            telemetry.reset()
+            _, today, _ = main.collect_stage(stages=StageCache(cache_dir=stages_dir))
+            assert len(today) == 1 and not _collected()
+
+            # 新提交改变引用签名：重新收集
+            time.sleep(0.01)
+            commit(repo, '第二条提交')
+            telemetry.reset()
+            _, today, _ = main.collect_stage(stages=StageCache(cache_dir=stages_dir))
+            assert len(today) == 2 and _collected()
+
+            # 关闭预筛选（核对结果）时不复用预筛选下的收集结果
+            telemetry.reset()
+            main.collect_stage(prefilter=False, stages=StageCache(cache_dir=stages_dir))
+            assert _collected()
+
+            telemetry.reset()
+            main.collect_stage(stages=StageCache(cache_dir=stages_dir, refresh=True))
+            assert _collected()
+        finally:
+            main.resolve_search_paths, main.CommitCache, git_service.RepoHistory = original
+            telemetry.reset()
+
+
+def test_fingerprint_tracks_spool_hooks():
+    with tempfile.TemporaryDirectory() as root:
+        repo = init_repo(os.path.join(root, 'repo'))
+        commit(repo, '第一条提交')
+        service = git_service.GitService(prefilter=True, spool=True, history=False)
+        service.spool = CommitSpool(os.path.join(root, 'spool'))
+        day = datetime.now()
+        before = main.collect_fingerprint(service, [repo], day)
+        # 安装钩子后 spool 参与收集，收集阶段缓存失效
+        service.spool.install(repo, git_service.GitService.resolve_git_dirs(repo)[1])
+        assert main.collect_fingerprint(service, [repo], day) != before
+
+
+def test_stage_options_after_subcommand():
+    """--refresh / --no-prefilter / --wait 写在子命令前后均可，写在子命令前的取值不会被子命令覆盖"""
+    calls = []
+    saved = main.RunLock, main.run_collect, main.run_report
+    with tempfile.TemporaryDirectory() as lock_dir:
+        main.RunLock = lambda: RunLock(lock_dir=lock_dir)
+        main.run_collect = lambda prefilter, refresh: calls.append(('collect', prefilter, refresh)) or True
+        main.run_report = lambda prefilter, refresh: calls.append(('report', prefilter, refresh)) or True
+        try:
+            assert main.main(['collect', '--refresh', '--no-prefilter', '--wait', '--lock-timeout', '5']) == 0
+            assert main.main(['--refresh', 'collect']) == 0
+            assert main.main(['--no-prefilter', 'report', '--refresh']) == 0
+            assert main.main(['report']) == 0
+        finally:
+            main.RunLock, main.run_collect, main.run_report = saved
+            telemetry.reset()
+    assert calls == [('collect', False, True), ('collect', None, True), ('report', False, True), ('report', None, False)]
+
+
+if __name__ == "__main__":
+    test_lookup_by_fingerprint()
+    test_collect_stage_reuses_cache()
+    test_fingerprint_tracks_spool_hooks()
+    test_stage_options_after_subcommand()
+    print("测试完成")
@@ -0,0 +1,63 @@
+"""
+测试仓库监听：引用变动后只重新收集有变动的仓库，内存索引与全量收集结果一致（轮询与 watchdog 两种方式）
+"""
+import os
+import tempfile
+import time
+
+import pytest
+
+from git_fixtures import commit, init_repo
+from service.git_service import GitService
+from service.watch_service import WATCH_POLL, WATCH_WATCHDOG, WatchService, load_watchdog
+
+
+def _check_backend(backend: str):
+    with tempfile.TemporaryDirectory() as root:
+        repos = []
+        for name in ('crm', 'api'):
+            repo = init_repo(os.path.join(root, name))
+            commit(repo, f'{name} 第一条提交')
+            repos.append(repo)
+
+        git_service = GitService(spool=False, history=False)
+        watcher = WatchService(git_service, repos, backend)
+        try:
+            assert watcher.backend == backend
+            assert watcher.refresh() == 2 and len(watcher.index.commits()) == 2
+            watcher.changed()
+
+            time.sleep(0.01)
+            commit(repos[0], 'crm 第二条提交')
+            changed = set()
+            deadline = time.time() + 5
+            while not changed and time.time() < deadline:
+                watcher.wait(0.2)
+                changed = watcher.changed()
+            common_dir = GitService.resolve_git_dirs(repos[0])[1]
+            assert changed == {common_dir}
+
+            watcher.refresh(changed)
+            assert watcher.index.commits() == git_service.get_all_today_commits(repos)
+            assert len(watcher.index.store().query(repo='crm')) == 2
+        finally:
+            watcher.stop()
+
+
+def test_polling_watch():
+    _check_backend(WATCH_POLL)
+
+
+def test_watchdog_watch():
+    if load_watchdog() is None:
+        pytest.skip("未安装 watchdog")
+    _check_backend(WATCH_WATCHDOG)
+
+
+if __name__ == "__main__":
+    test_polling_watch()
+    if load_watchdog() is None:
+        print("未安装 watchdog，跳过")
+    else:
+        test_watchdog_watch()
+    print("测试完成")